@@ -0,0 +1,122 @@
+"""
+Sound effects for the Tower of Hanoi game.
+This module preloads the WAV files in the sounds folder once and plays them
+on a pool of pygame mixer channels so overlapping effects do not cut each other off.
+pygame is imported lazily so the game window can appear before audio is ready.
+"""
+import os
+import threading
+import time
+
+
+class SoundManager:
+    """Preloads sound effects and plays them on a pool of mixer channels"""
+
+    def __init__(self, sound_dir="sounds", channels=8, min_interval=0.05,
+                 enabled=True, clock=time.monotonic, startup_budget=0.5):
+        """
+        Args:
+            sound_dir: Folder containing the *.wav effects
+            channels: Number of mixer channels to mix effects on
+            min_interval: Minimum seconds between two plays of the same effect
+            enabled: Set to False to turn all sound off (e.g. headless runs)
+            clock: Monotonic time source, replaceable in tests
+            startup_budget: Seconds audio setup may take before a warning is printed
+        """
+        self.sound_dir = sound_dir
+        self.channels = channels
+        self.min_interval = min_interval
+        self.clock = clock
+        self.startup_budget = startup_budget
+        self.startup_time = None
+        self.sounds = {}
+        self.last_played = {}
+        self.pygame = None
+        self.ready = threading.Event()
+
+        # HANOI_NO_AUDIO=1 disables audio without touching the code
+        self.enabled = enabled and not os.environ.get("HANOI_NO_AUDIO")
+
+    def start_async(self):
+        """Set up audio on a background thread; effects are silent until it finishes"""
+        thread = threading.Thread(target=self.start, name="audio-init", daemon=True)
+        thread.start()
+        return thread
+
+    def start(self):
+        """Import pygame, initialise the mixer and preload every effect into memory"""
+        started = time.perf_counter()
+        try:
+            return self._start()
+        finally:
+            self.startup_time = time.perf_counter() - started
+            if self.startup_time > self.startup_budget:
+                print(f"Audio setup took {self.startup_time:.2f}s "
+                      f"(budget {self.startup_budget:.2f}s)")
+            self.ready.set()
+
+    def _start(self):
+        if not self.enabled:
+            return False
+
+        try:
+            import pygame
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            pygame.mixer.set_num_channels(self.channels)
+        except Exception as e:
+            print(f"Audio disabled: {e}")
+            self.enabled = False
+            return False
+
+        sounds = {}
+        for filename in sorted(os.listdir(self.sound_dir)) if os.path.isdir(self.sound_dir) else []:
+            name, ext = os.path.splitext(filename)
+            if ext.lower() != ".wav":
+                continue
+            try:
+                sounds[name] = pygame.mixer.Sound(os.path.join(self.sound_dir, filename))
+            except Exception as e:
+                print(f"Error loading sound {filename}: {e}")
+
+        self.sounds = sounds
+        self.pygame = pygame
+        return True
+
+    def should_play(self, name):
+        """Rate-limit rapid repeats of the same effect (e.g. during fast auto-play)"""
+        now = self.clock()
+        last = self.last_played.get(name)
+        if last is not None and now - last < self.min_interval:
+            return False
+        self.last_played[name] = now
+        return True
+
+    def play(self, name):
+        """
+        Play a preloaded effect by name ("move", "win", ...).
+
+        Returns:
+            True if the effect was started, False if it was skipped
+        """
+        if not self.enabled or self.pygame is None:
+            return False
+
+        sound = self.sounds.get(name)
+        if sound is None or not self.should_play(name):
+            return False
+
+        try:
+            # Steal the longest-running channel when all of them are busy
+            channel = self.pygame.mixer.find_channel(True)
+            channel.play(sound)
+            return True
+        except Exception as e:
+            print(f"Error playing sound: {e}")
+            return False
+
+    def stop(self):
+        """Stop all effects and release the mixer"""
+        if self.pygame is not None and self.pygame.mixer.get_init():
+            self.pygame.mixer.stop()
+            self.pygame.mixer.quit()
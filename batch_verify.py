@@ -0,0 +1,277 @@
+"""
+Bulk verification of submitted Tower of Hanoi move sequences.
+Reads submissions in the format the game accepts ("A->C,A->B,..."), checks
+them against the rules on a pool of worker processes and writes one report row
+per submission: the first illegal move, the move count against the minimum, and
+whether the solution is correct (solved in the minimum number of moves).
+
+Input:
+    - a text file with one submission per line, either "moves",
+      "id<TAB>moves" or "id<TAB>disks<TAB>pegs<TAB>moves"
+    - a .jsonl file with {"id", "disks", "pegs", "moves"} objects
+    - a directory, where every file holds one submission named after the file
+
+Usage:
+    python batch_verify.py SUBMISSIONS --disks 5 [--pegs 3] [--rules classic] [--report report.csv] [--workers N]
+    python batch_verify.py --benchmark 100000
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from functools import lru_cache, partial
+from game_engine import verify_moves, solution_moves
+from hanoi_algorithms import RULES, MIN_PEGS, MAX_PEGS
+from move_codec import parse_move, format_moves
+
+REPORT_FIELDS = ["id", "disks", "pegs", "moves", "min_moves", "error_index", "error", "solved", "correct"]
+
+# Submissions handed to a worker at a time; large enough to amortise the IPC
+CHUNK_SIZE = 256
+
+
+def sequence_moves(sequence):
+    """Yield the moves of a "A->C,A->B" sequence, raising ValueError at the first malformed one"""
+    if not sequence.strip():
+        return
+    for move in sequence.split(','):
+        if not move.strip():
+            raise ValueError("Move sequence contains empty moves")
+        yield parse_move(move)
+
+
+# Largest disk count accepted in a submission, as in the game
+MAX_DISKS = 20
+
+# Largest disk count whose reference solution is kept in memory for the
+# exact-match shortcut; past it, submissions are replayed move by move
+REFERENCE_MAX_DISKS = 16
+
+
+@lru_cache(maxsize=16)
+def reference_report(disks, pegs, rules="classic"):
+    """Return (reference solution text, its verification report) for a configuration"""
+    solution = solution_moves(disks, pegs, rules)
+    return format_moves(solution), verify_moves(solution, disks, pegs, rules)
+
+
+def parse_count(value, name):
+    """Return a disk or peg count as an int, raising ValueError if it is not a whole number"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    raise ValueError(f"{name} must be a whole number, not {value!r}")
+
+
+def verify_submission(submission, rules="classic"):
+    """
+    Verify one submission.
+
+    Args:
+        submission: Tuple of (id, disks, pegs, move sequence text); the sequence is a
+            ValueError for records that could not be read
+        rules: Rule variant the moves must follow (see hanoi_algorithms.RULES)
+
+    Returns:
+        Report row as a dict with the REPORT_FIELDS keys
+    """
+    submission_id, disks, pegs, sequence = submission
+    try:
+        if isinstance(sequence, ValueError):
+            raise sequence
+        if not isinstance(sequence, str):
+            raise ValueError("moves must be a string")
+        disks = parse_count(disks, "disks")
+        pegs = parse_count(pegs, "pegs")
+        if not 1 <= disks <= MAX_DISKS:
+            raise ValueError(f"disks must be between 1 and {MAX_DISKS}")
+        if not MIN_PEGS <= pegs <= MAX_PEGS:
+            raise ValueError(f"pegs must be between {MIN_PEGS} and {MAX_PEGS}")
+        report = None
+        if disks <= REFERENCE_MAX_DISKS:
+            # Many submissions are exactly the reference solution; skip replaying those
+            reference, report = reference_report(disks, pegs, rules)
+            if sequence != reference:
+                report = None
+        if report is None:
+            report = verify_moves(sequence_moves(sequence), disks, pegs, rules)
+    except ValueError as e:
+        # Unreadable record or unsupported configuration, e.g. a peg count without a known minimum
+        return {'id': submission_id, 'disks': disks, 'pegs': pegs, 'moves': 0, 'min_moves': None,
+                'error_index': 0, 'error': str(e), 'solved': False, 'correct': False}
+    return {
+        'id': submission_id, 'disks': disks, 'pegs': pegs,
+        'moves': report['moves'], 'min_moves': report['min_moves'],
+        'error_index': report['error_index'], 'error': report['error'],
+        'solved': report['solved'], 'correct': report['optimal']
+    }
+
+
+def read_submissions(path, disks, pegs):
+    """
+    Yield (id, disks, pegs, sequence) tuples from a file or directory, lazily.
+
+    Fields are passed on as read and checked by verify_submission, so a bad
+    record becomes an error row; a line that is not valid JSON, or a file in
+    a directory that is not UTF-8 text, yields a ValueError in place of its
+    sequence.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if os.path.isfile(file_path):
+                try:
+                    with open(file_path, encoding="utf-8") as f:
+                        sequence = f.read().strip()
+                except UnicodeDecodeError as e:
+                    sequence = ValueError(f"Not UTF-8 text: {e}")
+                yield name, disks, pegs, sequence
+        return
+
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    yield line_number, disks, pegs, ValueError(f"Invalid JSON: {e}")
+                    continue
+                if not isinstance(item, dict):
+                    yield line_number, disks, pegs, ValueError("Expected a JSON object")
+                    continue
+                yield (item.get('id', line_number), item.get('disks', disks),
+                       item.get('pegs', pegs), item.get('moves', ""))
+            return
+
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            fields = line.split("\t")
+            if len(fields) == 4:
+                submission_id, record_disks, record_pegs, sequence = fields
+                yield (submission_id, int(record_disks) if record_disks.isdigit() else record_disks,
+                       int(record_pegs) if record_pegs.isdigit() else record_pegs, sequence)
+            elif len(fields) == 2:
+                yield fields[0], disks, pegs, fields[1]
+            else:
+                yield line_number, disks, pegs, line
+
+
+def verify_all(submissions, workers=None, chunk_size=CHUNK_SIZE, rules="classic"):
+    """
+    Verify submissions on a process pool, yielding report rows in input order.
+
+    Args:
+        submissions: Iterable of (id, disks, pegs, sequence) tuples
+        workers: Number of worker processes; 1 verifies in this process
+        chunk_size: Submissions sent to a worker per task
+        rules: Rule variant every submission must follow
+    """
+    workers = workers or os.cpu_count() or 1
+    verify = partial(verify_submission, rules=rules)
+    if workers == 1:
+        yield from map(verify, submissions)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(verify, submissions, chunksize=chunk_size)
+
+
+def write_report(rows, stream, fmt="csv"):
+    """
+    Write report rows as CSV or JSON lines.
+
+    Returns:
+        Tuple of (number of submissions, number correct)
+    """
+    total = correct = 0
+    writer = csv.DictWriter(stream, fieldnames=REPORT_FIELDS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(row) + "\n")
+        total += 1
+        correct += row['correct']
+    return total, correct
+
+
+def synthetic_submissions(count, disks=5, pegs=3, seed=0, rules="classic"):
+    """
+    Generate a classroom-like mix of submissions for benchmarking.
+
+    About half are the optimal solution, the rest have a detour, a swapped
+    move or a typo in them.
+    """
+    rng = random.Random(seed)
+    solution = list(solution_moves(disks, pegs, rules))
+    for i in range(count):
+        moves = list(solution)
+        kind = rng.random()
+        if kind < 0.5:
+            text = format_moves(moves)
+        elif kind < 0.7:
+            position = rng.randrange(len(moves))
+            source, target = moves[position]
+            moves[position:position] = [(source, target), (target, source)]
+            text = format_moves(moves)
+        elif kind < 0.9:
+            position = rng.randrange(len(moves) - 1)
+            moves[position], moves[position + 1] = moves[position + 1], moves[position]
+            text = format_moves(moves)
+        else:
+            text = format_moves(moves).replace("->", "-", 1)
+        yield i, disks, pegs, text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify many submitted move sequences in parallel")
+    parser.add_argument("submissions", nargs="?", help="submission file or directory")
+    parser.add_argument("--disks", type=int, default=5, help="disks when a submission does not say")
+    parser.add_argument("--pegs", type=int, default=3, help="pegs when a submission does not say")
+    parser.add_argument("--rules", choices=RULES, default="classic", help="rule variant to check against")
+    parser.add_argument("--report", default="-", help="report path, .csv or .jsonl (default CSV on stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="verify N generated submissions instead of reading a file")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        submissions = synthetic_submissions(args.benchmark, args.disks, args.pegs, rules=args.rules)
+    elif args.submissions:
+        submissions = read_submissions(args.submissions, args.disks, args.pegs)
+    else:
+        parser.error("a submissions path or --benchmark is required")
+
+    fmt = "jsonl" if args.report.endswith(".jsonl") else "csv"
+    start = time.perf_counter()
+    try:
+        rows = verify_all(submissions, args.workers, rules=args.rules)
+        if args.report == "-":
+            total, correct = write_report(rows, sys.stdout, fmt)
+        else:
+            with open(args.report, "w", newline="") as f:
+                total, correct = write_report(rows, f, fmt)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+
+    print(f"{total} submissions verified in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.0f}/s, {args.workers or os.cpu_count()} workers); "
+          f"{correct} correct", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
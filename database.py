@@ -1,21 +1,245 @@
 import sqlite3
-import os.path
+import json
+import math
+import pathlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from move_codec import encode_moves, MoveSequence, encode_events, decode_events, EVENT_MOVE
+
+DB_FILE = "hanoi_game.db"
+
+# Results the writer could not commit are kept here, one JSON object per line
+UNSAVED_FILE = "unsaved_results.jsonl"
+
+# Execution times are grouped into logarithmic histogram buckets, 16 per doubling
+# (~4.4% wide), from which percentiles are estimated without fetching every row.
+BUCKETS_PER_DOUBLING = 16
+
+STATS_PERCENTILES = (50, 90, 99)
+
+# PRAGMA user_version once legacy move text has been converted to blobs; the
+# scan runs once per database rather than on every start
+MOVE_ENCODING_VERSION = 1
+
+
+def time_bucket(execution_time):
+    """Return the histogram bucket of an execution time (SQL function time_bucket)"""
+    if execution_time is None or execution_time <= 0:
+        return None
+    return math.floor(math.log2(execution_time) * BUCKETS_PER_DOUBLING)
+
+
+def approximate_percentile(buckets, count, percentile):
+    """
+    Estimate a percentile from histogram buckets.
+
+    Args:
+        buckets: List of (bucket, count, min_time, max_time) sorted by bucket
+        count: Total number of samples
+        percentile: Percentile between 0 and 100
+
+    Returns:
+        Estimated value, interpolated between the bucket's observed min and max
+    """
+    rank = percentile / 100 * (count - 1)
+    seen = 0
+    for _, bucket_count, min_time, max_time in buckets:
+        if rank < seen + bucket_count:
+            if bucket_count == 1:
+                return min_time
+            return min_time + (max_time - min_time) * (rank - seen) / (bucket_count - 1)
+        seen += bucket_count
+    return buckets[-1][3]
+
 
 class Database:
-    def __init__(self):
-        db_exists = os.path.exists("hanoi_game.db")
+    # Number of read-only connections shared by leaderboard/stats queries
+    READER_POOL_SIZE = 4
+
+    # Per-connection tuning: 16 MB page cache and up to 256 MB memory-mapped I/O
+    CACHE_SIZE_KB = 16 * 1024
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    # Prepared statements kept per connection; the hot statements below are
+    # constant strings so sqlite3 reuses their compiled form on every call
+    CACHED_STATEMENTS = 256
+
+    # Most recently used username -> id mappings kept in memory
+    USER_CACHE_SIZE = 1024
+
+    UPSERT_USER_SQL = "INSERT INTO users (name) VALUES (?) ON CONFLICT(name) DO NOTHING RETURNING id"
+    SELECT_USER_ID_SQL = "SELECT id FROM users WHERE name = ?"
+
+    INSERT_GAME_SQL = '''
+        INSERT INTO games (
+            user_id, disks, pegs, completed,
+            user_time, user_moves, actual_moves,
+            is_correct, efficiency_note, min_moves,
+            user_move_count, actual_move_count, events, event_count,
+            start_position, goal_position
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+    INSERT_PERFORMANCE_SQL = '''
+        INSERT INTO algorithm_performance (game_id, algorithm_name, execution_time)
+        VALUES (?, ?, ?)
+    '''
+
+    # Hot read queries, kept here so their query plans can be checked in tests
+    TOP_SCORES_SQL = '''
+        SELECT u.name, b.best_time AS user_time, b.disks, b.pegs
+        FROM best_times b
+        JOIN users u ON b.user_id = u.id
+        ORDER BY b.best_time ASC, b.game_id ASC
+        LIMIT ?
+    '''
+
+    # One row per (algorithm, disks, pegs, histogram bucket); see get_algorithm_stats_grouped
+    ALGORITHM_STATS_SQL = '''
+        SELECT ap.algorithm_name, g.disks, g.pegs,
+               time_bucket(ap.execution_time) AS bucket,
+               COUNT(*) AS count,
+               SUM(ap.execution_time) AS total_time,
+               MIN(ap.execution_time) AS min_time,
+               MAX(ap.execution_time) AS max_time
+        FROM algorithm_performance ap
+        JOIN games g ON g.id = ap.game_id
+        GROUP BY ap.algorithm_name, g.disks, g.pegs, bucket
+    '''
+
+    # The aggregates only guarantee one row for unknown users; at most one row matches
+    USER_STATS_SQL = '''
+        SELECT 
+            COALESCE(MAX(s.games_played), 0) as games_played,
+            MAX(CAST(s.total_time AS REAL) / NULLIF(s.timed_games, 0)) as avg_time,
+            MAX(s.best_time) as best_time,
+            MAX(s.correct_predictions) as correct_predictions
+        FROM user_stats s
+        WHERE s.user_id = ?
+    '''
+
+    # Per peg count, since times on different peg counts are not comparable
+    USER_PEG_STATS_SQL = '''
+        SELECT
+            pegs,
+            COUNT(*) as games_played,
+            AVG(user_time) as avg_time,
+            MIN(user_time) as best_time,
+            SUM(COALESCE(is_correct, 0)) as correct_predictions
+        FROM games
+        WHERE user_id = ? AND completed = 1
+        GROUP BY pegs
+        ORDER BY pegs
+    '''
+
+    def __init__(self, path=DB_FILE, memory=False, readers=READER_POOL_SIZE, initialize=True):
+        """
+        Args:
+            path: Database file, ":memory:", or a "file:" URI such as
+                "file:games?mode=memory&cache=shared"
+            memory: Use a private in-memory database instead of path
+            readers: Number of pooled read-only connections (file databases only)
+            initialize: Create or migrate the schema; clone() skips this
+        """
+        self.path = ":memory:" if memory else path
+        self.is_uri = self.path.startswith("file:")
+        self.is_memory = self.path == ":memory:" or "mode=memory" in self.path
+        self.write_lock = threading.RLock()
+        self.readers = queue.Queue()
+        self.reader_count = 0
+
+        # Grouped algorithm stats, keyed by the writer's PRAGMA data_version
+        self.stats_cache = None
+
+        # Username -> id, in least recently used order. Ids created inside a
+        # transaction wait in pending_user_ids until it commits
+        self.user_ids = OrderedDict()
+        self.pending_user_ids = {}
+        self.user_cache_version = None
+
         try:
-            self.conn = sqlite3.connect("hanoi_game.db", check_same_thread=False)
-            self.conn.row_factory = sqlite3.Row
+            # Single writer connection; the Tk thread and worker threads share it under write_lock
+            self.conn = self.connect()
+            if not self.is_memory:
+                self.conn.execute("PRAGMA journal_mode = WAL")
 
-            if not db_exists:
-                self.create_tables()
-                print("Database created successfully with all required tables")
-            else:
-                self.migrate_schema()
+            if initialize:
+                cursor = self.conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name='games'")
+                if cursor.fetchone() is None:
+                    self.create_tables()
+                    print("Database created successfully with all required tables")
+                else:
+                    self.migrate_schema()
+
+            # WAL lets these read concurrently with the writer without blocking it;
+            # in-memory databases have no WAL, so their reads go through the writer
+            if not self.is_memory:
+                for _ in range(readers):
+                    self.readers.put(self.connect(read_only=True))
+                    self.reader_count += 1
         except Exception as e:
             print(f"Database initialization error: {e}")
 
+    def connect(self, read_only=False):
+        """Open a tuned connection to the database"""
+        if read_only:
+            if self.is_uri:
+                uri = self.path + ("&" if "?" in self.path else "?") + "mode=ro"
+            else:
+                uri = pathlib.Path(self.path).absolute().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=self.CACHED_STATEMENTS)
+        else:
+            conn = sqlite3.connect(self.path, uri=self.is_uri, check_same_thread=False,
+                                   cached_statements=self.CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        conn.create_function("time_bucket", 1, time_bucket, deterministic=True)
+
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def clone(self):
+        """
+        Copy this database into a new private in-memory Database.
+
+        Uses the SQLite backup API, so a prepared template (schema, fixtures)
+        can be duplicated per test or benchmark run without touching the disk.
+        """
+        copy = Database(memory=True, initialize=False)
+        with self.write_lock:
+            self.conn.backup(copy.conn)
+        return copy
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection, or the writer when no pool is available"""
+        if not self.reader_count:
+            with self.write_lock:
+                yield self.conn
+            return
+
+        conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put(conn)
+
+    def close(self):
+        """Close the writer and every pooled reader"""
+        with self.write_lock:
+            while self.reader_count:
+                self.readers.get().close()
+                self.reader_count -= 1
+            self.conn.close()
+
     def create_tables(self):
         try:
             self.conn.execute('''
@@ -56,6 +280,9 @@ class Database:
 
             # Make sure to commit the changes
             self.conn.commit()
+
+            # Indexes and later schema additions live in the migration
+            self.migrate_schema()
             
             # Verify the tables were created
             cursor = self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -83,106 +310,901 @@ class Database:
             if 'min_moves' not in columns:
                 self.conn.execute("ALTER TABLE games ADD COLUMN min_moves INTEGER")
                 self.conn.commit()
+
+            # Move sequences are stored as packed blobs with their lengths alongside
+            if 'user_move_count' not in columns:
+                self.conn.execute("ALTER TABLE games ADD COLUMN user_move_count INTEGER")
+                self.conn.execute("ALTER TABLE games ADD COLUMN actual_move_count INTEGER")
+                self.conn.commit()
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < MOVE_ENCODING_VERSION:
+                self.migrate_move_encoding()
+                self.conn.execute(f"PRAGMA user_version = {MOVE_ENCODING_VERSION}")
+                self.conn.commit()
+
+            # Timestamped move/hint log for replays (see move_codec.encode_events)
+            if 'events' not in columns:
+                self.conn.execute("ALTER TABLE games ADD COLUMN events BLOB")
+                self.conn.execute("ALTER TABLE games ADD COLUMN event_count INTEGER")
+                self.conn.commit()
+
+            # Non-classic layouts (see game_engine.layout_positions): peg letter of
+            # each disk, smallest first; NULL is all disks from A to the last peg
+            if 'start_position' not in columns:
+                self.conn.execute("ALTER TABLE games ADD COLUMN start_position TEXT")
+                self.conn.execute("ALTER TABLE games ADD COLUMN goal_position TEXT")
+                self.conn.commit()
+
+            # Keyset pagination: leaderboard pages and newest-first history, one
+            # index per filter (none, player, disks and pegs) so a filtered page
+            # seeks on its filter columns. Every index ends with the rowid, which
+            # is the (..., id) tiebreaker, so nothing may sit between the sort
+            # column and the end. The player ones also serve get_user_peg_stats
+            self.conn.execute("DROP INDEX IF EXISTS idx_games_leaderboard")
+            self.conn.execute("DROP INDEX IF EXISTS idx_games_user")
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_time_page
+                ON games (completed, user_time)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_user_page
+                ON games (user_id, completed, user_time)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_config_leaderboard
+                ON games (completed, disks, pegs, user_time)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_history
+                ON games (created_at)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_user_history
+                ON games (user_id, created_at)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_config_history
+                ON games (disks, pegs, created_at)
+            ''')
+            self.conn.execute("DROP INDEX IF EXISTS idx_algorithm_performance_name")
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_algorithm_performance_stats
+                ON algorithm_performance (algorithm_name, game_id, execution_time)
+            ''')
+            self.conn.commit()
+
+            self.create_summary_tables()
+            self.conn.execute("PRAGMA optimize")
                 
         except Exception as e:
             print(f"Migration error: {e}")
 
+    def migrate_move_encoding(self, batch_size=1000):
+        """
+        Convert comma separated move text to packed blobs, one batch per transaction.
+
+        Rows whose text cannot be parsed are left as text, which readers still
+        accept; migrate_schema runs this once per database (see MOVE_ENCODING_VERSION).
+
+        Returns:
+            Number of games converted
+        """
+        converted = 0
+        last_id = 0
+        while True:
+            rows = self.conn.execute('''
+                SELECT id, user_moves, actual_moves FROM games
+                WHERE id > ? AND (typeof(user_moves) = 'text' OR typeof(actual_moves) = 'text')
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                return converted
+
+            updates = []
+            for row in rows:
+                try:
+                    user_blob, user_count = encode_moves(row['user_moves'] or "")
+                    actual_blob, actual_count = encode_moves(row['actual_moves'] or "")
+                except ValueError:
+                    continue
+                updates.append((user_blob, user_count, actual_blob, actual_count, row['id']))
+
+            with self.transaction():
+                self.conn.executemany('''
+                    UPDATE games
+                    SET user_moves = ?, user_move_count = ?, actual_moves = ?, actual_move_count = ?
+                    WHERE id = ?
+                ''', updates)
+            converted += len(updates)
+            last_id = rows[-1]['id']
+
+    def create_summary_tables(self):
+        """Create the trigger-maintained leaderboard and per-user summary tables"""
+        cursor = self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        existing = {row['name'] for row in cursor.fetchall()}
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id INTEGER PRIMARY KEY,
+                games_played INTEGER NOT NULL DEFAULT 0,
+                timed_games INTEGER NOT NULL DEFAULT 0,
+                total_time INTEGER NOT NULL DEFAULT 0,
+                best_time INTEGER,
+                correct_predictions INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        ''')
+
+        # Best completed time per user and (disks, pegs) configuration
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS best_times (
+                user_id INTEGER NOT NULL,
+                disks INTEGER NOT NULL,
+                pegs INTEGER NOT NULL,
+                best_time INTEGER NOT NULL,
+                game_id INTEGER NOT NULL,
+                PRIMARY KEY (user_id, disks, pegs),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_best_times_leaderboard
+            ON best_times (best_time, game_id)
+        ''')
+
+        self.conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_games_summaries
+            AFTER INSERT ON games
+            WHEN NEW.completed = 1 AND NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO user_stats (
+                    user_id, games_played, timed_games, total_time, best_time, correct_predictions
+                ) VALUES (
+                    NEW.user_id, 1, NEW.user_time IS NOT NULL, COALESCE(NEW.user_time, 0),
+                    NEW.user_time, COALESCE(NEW.is_correct, 0)
+                )
+                ON CONFLICT (user_id) DO UPDATE SET
+                    games_played = games_played + 1,
+                    timed_games = timed_games + excluded.timed_games,
+                    total_time = total_time + excluded.total_time,
+                    best_time = CASE
+                        WHEN best_time IS NULL OR excluded.best_time < best_time
+                        THEN COALESCE(excluded.best_time, best_time)
+                        ELSE best_time
+                    END,
+                    correct_predictions = correct_predictions + excluded.correct_predictions;
+
+                INSERT INTO best_times (user_id, disks, pegs, best_time, game_id)
+                SELECT NEW.user_id, NEW.disks, NEW.pegs, NEW.user_time, NEW.id
+                WHERE NEW.user_time IS NOT NULL
+                ON CONFLICT (user_id, disks, pegs) DO UPDATE SET
+                    best_time = excluded.best_time,
+                    game_id = excluded.game_id
+                WHERE excluded.best_time < best_times.best_time;
+            END
+        ''')
+        self.conn.commit()
+
+        # Backfill summaries for games recorded before the tables existed
+        if 'user_stats' not in existing or 'best_times' not in existing:
+            self.rebuild_summaries()
+
+    def rebuild_summaries(self):
+        """Recompute the summary tables from the full games table (for backfills)"""
+        with self.transaction():
+            self.conn.execute("DELETE FROM user_stats")
+            self.conn.execute("DELETE FROM best_times")
+            self.conn.execute('''
+                INSERT INTO user_stats (
+                    user_id, games_played, timed_games, total_time, best_time, correct_predictions
+                )
+                SELECT user_id, COUNT(*), COUNT(user_time), COALESCE(SUM(user_time), 0),
+                       MIN(user_time), COALESCE(SUM(is_correct), 0)
+                FROM games
+                WHERE completed = 1 AND user_id IS NOT NULL
+                GROUP BY user_id
+            ''')
+            # SQLite takes the bare id column from the row holding MIN(user_time)
+            self.conn.execute('''
+                INSERT INTO best_times (user_id, disks, pegs, best_time, game_id)
+                SELECT user_id, disks, pegs, MIN(user_time), id
+                FROM games
+                WHERE completed = 1 AND user_id IS NOT NULL AND user_time IS NOT NULL
+                GROUP BY user_id, disks, pegs
+            ''')
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements in one transaction, rolling back on error.
+
+        Inside an open transaction this is a savepoint instead: an error undoes
+        only the enclosed statements, and only the outermost level commits.
+        """
+        with self.write_lock:
+            if self.conn.in_transaction:
+                yield from self._savepoint()
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.rollback()
+                self.pending_user_ids.clear()
+                raise
+            else:
+                self.conn.commit()
+                for username, user_id in self.pending_user_ids.items():
+                    self.cache_user_id(username, user_id)
+                self.pending_user_ids.clear()
+
+    def _savepoint(self):
+        """Body of a nested transaction(); the caller holds write_lock"""
+        pending = dict(self.pending_user_ids)
+        self.conn.execute("SAVEPOINT nested_transaction")
+        try:
+            yield self.conn
+        except Exception:
+            self.conn.execute("ROLLBACK TO nested_transaction")
+            self.conn.execute("RELEASE nested_transaction")
+            self.pending_user_ids = pending
+            raise
+        else:
+            self.conn.execute("RELEASE nested_transaction")
+
     def get_or_create_user(self, username):
-        cursor = self.conn.execute("SELECT id FROM users WHERE name = ?", (username,))
-        user = cursor.fetchone()
+        with self.transaction():
+            return self._get_or_create_user_id(username)
 
-        if user:
-            return user['id']
+    def _get_or_create_user_id(self, username):
+        """Resolve a user id with a single upsert; the caller owns the transaction"""
+        user_id = self.cached_user_id(username)
+        if user_id is not None:
+            return user_id
+
+        rows = self.conn.execute(self.UPSERT_USER_SQL, (username,)).fetchall()
+        if rows:
+            user_id = rows[0]['id']
         else:
-            cursor = self.conn.execute("INSERT INTO users (name) VALUES (?)", (username,))
-            self.conn.commit()
-            return cursor.lastrowid
+            user_id = self.conn.execute(self.SELECT_USER_ID_SQL, (username,)).fetchone()['id']
 
-    def save_result(self, name, disks, pegs, completed, times, user_time, user_moves, is_correct, efficiency_note="", actual_moves="", min_moves=None):
-        try:
-            user_id = self.get_or_create_user(name)
-            cursor = self.conn.execute('''
-                INSERT INTO games (
-                    user_id, disks, pegs, completed,
-                    user_time, user_moves, actual_moves,
-                    is_correct, efficiency_note, min_moves
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id, disks, pegs, completed,
-                user_time, user_moves, actual_moves,
-                is_correct, efficiency_note, min_moves
+        # Only cached once the transaction commits; a rollback may undo the insert
+        self.pending_user_ids[username] = user_id
+        return user_id
+
+    def cached_user_id(self, username):
+        """
+        Return the cached id of a user, or None when it is not cached.
+
+        The whole cache is dropped whenever another connection or process has
+        committed since it was filled (PRAGMA data_version changed), so a user
+        deleted or recreated elsewhere is never resolved to a stale id.
+        """
+        with self.write_lock:
+            user_id = self.pending_user_ids.get(username)
+            if user_id is not None:
+                return user_id
+
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self.user_cache_version:
+                self.user_ids.clear()
+                self.user_cache_version = data_version
+                return None
+
+            user_id = self.user_ids.get(username)
+            if user_id is not None:
+                self.user_ids.move_to_end(username)
+            return user_id
+
+    def cache_user_id(self, username, user_id):
+        """Remember a committed user id, evicting the least recently used entry"""
+        with self.write_lock:
+            if self.user_cache_version is None:
+                self.user_cache_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            self.user_ids[username] = user_id
+            self.user_ids.move_to_end(username)
+            if len(self.user_ids) > self.USER_CACHE_SIZE:
+                self.user_ids.popitem(last=False)
+
+    def lookup_user_id(self, username):
+        """Return the id of an existing user without ever creating one"""
+        user_id = self.cached_user_id(username)
+        if user_id is not None:
+            return user_id
+
+        with self.reader() as conn:
+            row = conn.execute(self.SELECT_USER_ID_SQL, (username,)).fetchone()
+        if row is None:
+            return None
+        self.cache_user_id(username, row['id'])
+        return row['id']
+
+    def _insert_results(self, results):
+        """
+        Insert game results without committing.
+
+        Args:
+            results: Iterable of dicts with the keyword arguments of save_result
+
+        Returns:
+            Number of games inserted
+        """
+        performance_rows = []
+        count = 0
+
+        for result in results:
+            user_id = self._get_or_create_user_id(result['name'])
+
+            user_moves, user_move_count = encode_moves(result['user_moves'] or "")
+            actual_moves, actual_move_count = encode_moves(result.get('actual_moves') or "")
+            events, event_count = encode_events(result['events']) if result.get('events') else (None, None)
+
+            cursor = self.conn.execute(self.INSERT_GAME_SQL, (
+                user_id, result['disks'], result['pegs'], result['completed'],
+                result['user_time'], user_moves, actual_moves,
+                result['is_correct'], result.get('efficiency_note', ""), result.get('min_moves'),
+                user_move_count, actual_move_count, events, event_count,
+                result.get('start_position'), result.get('goal_position')
             ))
 
             game_id = cursor.lastrowid
+            performance_rows.extend(
+                (game_id, algo, time_value)
+                for algo, time_value in result['times'].items()
+                if time_value is not None
+            )
+            count += 1
 
-            for algo, time_value in times.items():
-                if time_value is not None:
-                    self.conn.execute('''
-                        INSERT INTO algorithm_performance (game_id, algorithm_name, execution_time)
-                        VALUES (?, ?, ?)
-                    ''', (game_id, algo, time_value))
+        self.conn.executemany(self.INSERT_PERFORMANCE_SQL, performance_rows)
 
-            self.conn.commit()
+        return count
+
+    def save_result(self, name, disks, pegs, completed, times, user_time, user_moves, is_correct, efficiency_note="", actual_moves="", min_moves=None):
+        try:
+            with self.transaction():
+                self._insert_results([{
+                    'name': name, 'disks': disks, 'pegs': pegs, 'completed': completed,
+                    'times': times, 'user_time': user_time, 'user_moves': user_moves,
+                    'is_correct': is_correct, 'efficiency_note': efficiency_note,
+                    'actual_moves': actual_moves, 'min_moves': min_moves
+                }])
+            self.invalidate_stats()
             return True
 
         except Exception as e:
             print(f"Database error: {e}")
             return False
 
+    def save_results(self, results, batch_size=5000):
+        """
+        Bulk-import game results, committing one transaction per batch.
+
+        Args:
+            results: Iterable of dicts with the keyword arguments of save_result
+            batch_size: Number of games written per transaction
+
+        Returns:
+            Number of games saved; a failing batch is rolled back and stops the import
+        """
+        saved = 0
+        batch = []
+        try:
+            for result in results:
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    saved += self.write_results(batch)
+                    batch = []
+            if batch:
+                saved += self.write_results(batch)
+        except Exception as e:
+            print(f"Database error: {e}")
+        return saved
+
+    def write_results(self, results):
+        """Write a batch of results in one transaction; raises on failure"""
+        with self.transaction():
+            count = self._insert_results(results)
+        self.invalidate_stats()
+        return count
+
     def get_top_scores(self, limit=10):
         try:
-            cursor = self.conn.execute('''
-                SELECT u.name, g.user_time, g.disks, g.pegs
-                FROM games g
-                JOIN users u ON g.user_id = u.id
-                WHERE g.completed = 1
-                ORDER BY g.user_time ASC
-                LIMIT ?
-            ''', (limit,))
+            with self.reader() as conn:
+                cursor = conn.execute(self.TOP_SCORES_SQL, (limit,))
 
-            return cursor.fetchall()
+                return cursor.fetchall()
         except Exception as e:
             print(f"Error getting top scores: {e}")
             return []
 
-    def get_algorithm_stats(self):
+    def get_leaderboard_page(self, after=None, limit=20, disks=None, pegs=None, user=None):
+        """
+        Page through completed games from fastest to slowest.
+
+        Uses keyset pagination on (user_time, id), so every page costs the same
+        no matter how deep into the table it is. No filter, a player, or disks
+        and pegs together seek through an index; disks or pegs alone filter the
+        rows of the unfiltered walk.
+
+        Args:
+            after: Cursor returned with the previous page, or None for the first page
+            limit: Rows per page
+            disks, pegs, user: Optional filters (user is the player name)
+
+        Returns:
+            Tuple of (rows, next cursor or None on the last page)
+        """
+        sql, params = self.leaderboard_page_query(after, limit, disks, pegs, user)
+        return self._fetch_page(sql, params, limit, ('user_time', 'id'))
+
+    def get_history_page(self, before=None, limit=20, disks=None, pegs=None, user=None):
+        """
+        Page through all recorded games, newest first.
+
+        Uses keyset pagination on (created_at, id).
+
+        Args:
+            before: Cursor returned with the previous page, or None for the first page
+            limit: Rows per page
+            disks, pegs, user: Optional filters (user is the player name)
+
+        Returns:
+            Tuple of (rows, next cursor or None on the last page)
+        """
+        sql, params = self.history_page_query(before, limit, disks, pegs, user)
+        return self._fetch_page(sql, params, limit, ('created_at', 'id'))
+
+    def leaderboard_page_query(self, after=None, limit=20, disks=None, pegs=None, user=None):
+        """Build the SQL and parameters for one leaderboard page"""
+        conditions = ["g.completed = 1", "g.user_time IS NOT NULL"]
+        params = []
+        if after is not None:
+            conditions.append("(g.user_time, g.id) > (?, ?)")
+            params.extend(after)
+        return self._games_page_query(conditions, params, "g.user_time ASC, g.id ASC",
+                                      limit, disks, pegs, user)
+
+    def history_page_query(self, before=None, limit=20, disks=None, pegs=None, user=None):
+        """Build the SQL and parameters for one history page"""
+        conditions = []
+        params = []
+        if before is not None:
+            conditions.append("(g.created_at, g.id) < (?, ?)")
+            params.extend(before)
+        return self._games_page_query(conditions, params, "g.created_at DESC, g.id DESC",
+                                      limit, disks, pegs, user)
+
+    def _games_page_query(self, conditions, params, order_by, limit, disks, pegs, user):
+        if disks is not None:
+            conditions.append("g.disks = ?")
+            params.append(disks)
+        if pegs is not None:
+            conditions.append("g.pegs = ?")
+            params.append(pegs)
+        if user is not None:
+            conditions.append("u.name = ?")
+            params.append(user)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f'''
+            SELECT g.id, u.name, g.user_time, g.disks, g.pegs, g.completed,
+                   g.min_moves, g.actual_move_count, g.created_at
+            FROM games g
+            JOIN users u ON g.user_id = u.id
+            {where}
+            ORDER BY {order_by}
+            LIMIT ?
+        '''
+        # One extra row tells whether another page follows
+        return sql, params + [limit + 1]
+
+    def _fetch_page(self, sql, params, limit, key_columns):
+        if limit <= 0:
+            # SQLite reads a negative LIMIT as no limit at all
+            return [], None
         try:
-            stats = {}
-            algorithms = ['recursive', 'iterative', 'frame_stewart']
+            with self.reader() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except Exception as e:
+            print(f"Error getting games page: {e}")
+            return [], None
+
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, tuple(rows[-1][column] for column in key_columns)
+
+    def get_game_moves(self, game_id):
+        """
+        Return the stored move sequences of a game.
+
+        Returns:
+            Dict with 'user_moves' and 'actual_moves' as lazily decoded MoveSequence
+            objects, or None when the game does not exist
+        """
+        try:
+            with self.reader() as conn:
+                row = conn.execute('''
+                    SELECT user_moves, user_move_count, actual_moves, actual_move_count
+                    FROM games WHERE id = ?
+                ''', (game_id,)).fetchone()
+            if row is None:
+                return None
+            return {
+                'user_moves': MoveSequence(row['user_moves'] or b"", row['user_move_count']),
+                'actual_moves': MoveSequence(row['actual_moves'] or b"", row['actual_move_count'])
+            }
+        except Exception as e:
+            print(f"Error getting game moves: {e}")
+            return None
 
-            for algo in algorithms:
-                cursor = self.conn.execute('''
-                    SELECT AVG(execution_time) as avg_time
-                    FROM algorithm_performance
-                    WHERE algorithm_name = ?
-                ''', (algo,))
+    def get_game_replay(self, game_id):
+        """
+        Return what is needed to replay a game.
 
-                result = cursor.fetchone()
-                if result and result['avg_time'] is not None:
-                    stats[algo] = result['avg_time']
+        Games recorded before event logs existed fall back to their move
+        sequence, with every move at time 0.
+
+        Returns:
+            Dict with disks, pegs, name, user_time, events (list of
+            (kind, source, target, seconds) tuples) and start_position (None for
+            the classic start), or None when the game does not exist
+        """
+        try:
+            with self.reader() as conn:
+                row = conn.execute('''
+                    SELECT g.disks, g.pegs, g.user_time, g.events, g.actual_moves, g.actual_move_count,
+                           g.start_position, u.name
+                    FROM games g
+                    LEFT JOIN users u ON g.user_id = u.id
+                    WHERE g.id = ?
+                ''', (game_id,)).fetchone()
+            if row is None:
+                return None
+
+            if row['events'] is not None:
+                events = decode_events(row['events'])
+            else:
+                moves = MoveSequence(row['actual_moves'] or b"", row['actual_move_count'])
+                events = [(EVENT_MOVE, source, target, 0.0) for source, target in moves]
+            return {
+                'disks': row['disks'], 'pegs': row['pegs'], 'name': row['name'],
+                'user_time': row['user_time'], 'events': events,
+                'start_position': row['start_position']
+            }
+        except Exception as e:
+            print(f"Error getting game replay: {e}")
+            return None
+
+    def get_algorithm_stats(self):
+        """Return the mean execution time of every algorithm over all games"""
+        stats = {}
+        for group in self.get_algorithm_stats_grouped():
+            total, count = stats.get(group['algorithm'], (0.0, 0))
+            stats[group['algorithm']] = (total + group['mean'] * group['count'], count + group['count'])
+        return {algo: total / count for algo, (total, count) in stats.items()}
+
+    def get_algorithm_stats_grouped(self, algorithm=None):
+        """
+        Aggregate execution times per (algorithm, disks, pegs) in a single query.
+
+        Results are cached until this object saves a result or another connection
+        commits to the database.
+
+        Args:
+            algorithm: Restrict the statistics to one algorithm name
+
+        Returns:
+            List of dicts with algorithm, disks, pegs, count, mean, min, max and
+            approximate p50/p90/p99, sorted by algorithm, pegs and disks
+        """
+        try:
+            with self.write_lock:
+                data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if self.stats_cache is None or self.stats_cache[0] != data_version:
+                # One query covers every algorithm; filtering the cached groups is cheap
+                self.stats_cache = (data_version, self.query_algorithm_stats())
 
-            return stats
+            groups = self.stats_cache[1]
+            if algorithm is not None:
+                groups = [group for group in groups if group['algorithm'] == algorithm]
+            return groups
 
         except Exception as e:
             print(f"Error getting algorithm stats: {e}")
-            return {}
+            return []
+
+    def query_algorithm_stats(self):
+        """Run the grouped statistics query and fold histogram buckets into groups"""
+        buckets = {}
+        with self.reader() as conn:
+            for row in conn.execute(self.ALGORITHM_STATS_SQL):
+                key = (row['algorithm_name'], row['disks'], row['pegs'])
+                buckets.setdefault(key, []).append(
+                    (row['bucket'], row['count'], row['min_time'], row['max_time'], row['total_time'])
+                )
+
+        groups = []
+        for (algo, disks, pegs), rows in sorted(buckets.items(), key=lambda item: (item[0][0], item[0][2], item[0][1])):
+            rows.sort(key=lambda r: (r[0] is not None, r[0] or 0))
+            count = sum(r[1] for r in rows)
+            group = {
+                'algorithm': algo,
+                'disks': disks,
+                'pegs': pegs,
+                'count': count,
+                'mean': sum(r[4] for r in rows) / count,
+                'min': min(r[2] for r in rows),
+                'max': max(r[3] for r in rows),
+            }
+            histogram = [r[:4] for r in rows]
+            for percentile in STATS_PERCENTILES:
+                group[f'p{percentile}'] = approximate_percentile(histogram, count, percentile)
+            groups.append(group)
+        return groups
+
+    def invalidate_stats(self):
+        """Drop cached statistics after this process writes new results"""
+        self.stats_cache = None
 
     def get_user_stats(self, username):
         try:
-            user_id = self.get_or_create_user(username)
-
-            cursor = self.conn.execute('''
-                SELECT 
-                    COUNT(*) as games_played,
-                    AVG(user_time) as avg_time,
-                    MIN(user_time) as best_time,
-                    SUM(is_correct) as correct_predictions
-                FROM games
-                WHERE user_id = ? AND completed = 1
-            ''', (user_id,))
+            # Unknown users get the all-empty row; nothing is ever inserted here
+            user_id = self.lookup_user_id(username)
+            with self.reader() as conn:
+                cursor = conn.execute(self.USER_STATS_SQL, (user_id,))
 
-            return cursor.fetchone()
+                return cursor.fetchone()
 
         except Exception as e:
             print(f"Error getting user stats: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_user_peg_stats(self, username):
+        """
+        Return a player's completed-game statistics for each peg count played.
+
+        Returns:
+            List of rows with pegs, games_played, avg_time, best_time and
+            correct_predictions, ordered by peg count
+        """
+        try:
+            user_id = self.lookup_user_id(username)
+            with self.reader() as conn:
+                return conn.execute(self.USER_PEG_STATS_SQL, (user_id,)).fetchall()
+
+        except Exception as e:
+            print(f"Error getting user peg stats: {e}")
+            return []
+
+
+class ResultWriter:
+    """
+    Write-behind queue for game results.
+
+    submit() returns immediately; a dedicated thread groups queued results into
+    one transaction per batch. Batches hit by a transient error are retried
+    with backoff and kept in order until they are written. A batch that fails
+    for any other reason is written one result at a time, and results that
+    still fail are set aside in dead_letters so later results are not held up.
+    close() flushes whatever is left.
+    """
+
+    # A locked or busy database may succeed on retry; anything else (a bad move
+    # string, a constraint) fails the same way every time
+    TRANSIENT_ERRORS = (sqlite3.OperationalError,)
+
+    def __init__(self, db, batch_size=500, max_wait=0.05, retry_delay=0.1, max_retry_delay=5.0):
+        """
+        Args:
+            db: Database to write to
+            batch_size: Maximum results per transaction
+            max_wait: Seconds to wait for more results before committing a batch
+            retry_delay: First delay after a failed commit, doubled up to max_retry_delay
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.queue = queue.Queue()
+        self.pending = []  # Batch currently being written or retried
+        self.dead_letters = []  # (result, error message) for results that cannot be written
+        self.stopping = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.submitted = 0
+        self.committed = 0
+        self.commits = 0
+        self.failures = 0
+        self.last_error = None
+        self.commit_latency_total = 0.0
+        self.commit_latency_max = 0.0
+        self.commit_latency_last = 0.0
+
+    def start(self):
+        """Start the writer thread"""
+        self.thread = threading.Thread(target=self.run, name="result-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, result):
+        """Queue one result (a dict with the keyword arguments of save_result)"""
+        with self.lock:
+            self.submitted += 1
+        self.queue.put(result)
+
+    def depth(self):
+        """Number of results accepted but neither committed nor dead-lettered yet"""
+        with self.lock:
+            return self.submitted - self.committed - len(self.dead_letters)
+
+    def metrics(self):
+        """Return queue depth, throughput and commit latency figures"""
+        return {
+            'queue_depth': self.depth(),
+            'submitted': self.submitted,
+            'committed': self.committed,
+            'commits': self.commits,
+            'failures': self.failures,
+            'dead_letters': len(self.dead_letters),
+            'last_error': self.last_error,
+            'commit_latency_last_ms': self.commit_latency_last * 1000,
+            'commit_latency_avg_ms': self.commit_latency_total / self.commits * 1000 if self.commits else 0.0,
+            'commit_latency_max_ms': self.commit_latency_max * 1000
+        }
+
+    def run(self):
+        delay = self.retry_delay
+        while not (self.stopping.is_set() and self.queue.empty() and not self.pending):
+            if not self.pending:
+                self.collect_batch()
+                if not self.pending:
+                    continue
+
+            if self.write_pending():
+                delay = self.retry_delay
+            elif self.stopping.is_set():
+                # Give up retrying on shutdown; close() reports what is left
+                return
+            else:
+                self.stopping.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+    def collect_batch(self):
+        """Block for the first result, then gather more for up to max_wait seconds"""
+        try:
+            self.pending.append(self.queue.get(timeout=0.1))
+        except queue.Empty:
+            return
+        deadline = time.monotonic() + self.max_wait
+        while len(self.pending) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self.stopping.is_set():
+                    self.pending.append(self.queue.get_nowait())
+                else:
+                    self.pending.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+    def write_pending(self):
+        """
+        Commit the pending batch, falling back to one result at a time if it
+        fails for a reason other than a transient error.
+
+        Returns:
+            True if nothing is left pending, False if a transient error left
+            results pending for the next attempt
+        """
+        if len(self.pending) > 1:
+            error = self.write(self.pending)
+            if error is None:
+                self.pending = []
+                return True
+            if isinstance(error, self.TRANSIENT_ERRORS):
+                print(f"Database error: {error} ({len(self.pending)} results will be retried)")
+                return False
+
+        while self.pending:
+            error = self.write(self.pending[:1])
+            if isinstance(error, self.TRANSIENT_ERRORS):
+                print(f"Database error: {error} ({len(self.pending)} results will be retried)")
+                return False
+            result = self.pending.pop(0)
+            if error is not None:
+                print(f"Database error: {error} (result set aside)")
+                with self.lock:
+                    self.dead_letters.append((result, str(error)))
+        return True
+
+    def write(self, results):
+        """Commit results in one transaction; return the error, or None on success"""
+        started = time.perf_counter()
+        try:
+            self.db.write_results(results)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            return e
+
+        latency = time.perf_counter() - started
+        with self.lock:
+            self.commits += 1
+            self.committed += len(results)
+        self.commit_latency_last = latency
+        self.commit_latency_total += latency
+        self.commit_latency_max = max(self.commit_latency_max, latency)
+        return None
+
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is committed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.depth():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout=10):
+        """
+        Flush and stop the writer thread.
+
+        Returns:
+            List of results that could not be written (empty on success):
+            dead letters first, then those still pending or queued
+        """
+        self.flush(timeout)
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+        unwritten = [result for result, _ in self.dead_letters] + self.pending
+        while True:
+            try:
+                unwritten.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if unwritten:
+            print(f"Database error: {len(unwritten)} results could not be saved: {self.last_error}")
+        return unwritten
+
+
+def save_unwritten(results, path=UNSAVED_FILE):
+    """
+    Append results that could not be written to a JSON lines file.
+
+    Args:
+        results: Result dicts, as returned by ResultWriter.close()
+        path: File to append to
+
+    Returns:
+        The path written to
+    """
+    with open(path, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    return path
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tower of Hanoi database maintenance")
+    parser.add_argument("command", choices=["rebuild-summaries"],
+                        help="rebuild-summaries: recompute leaderboard and user stats from all games")
+    parser.add_argument("--path", default=DB_FILE, help="database file")
+    args = parser.parse_args(argv)
+
+    db = Database(args.path)
+    if args.command == "rebuild-summaries":
+        db.rebuild_summaries()
+        print("Summary tables rebuilt")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
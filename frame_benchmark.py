@@ -0,0 +1,115 @@
+"""
+Frame-time benchmark for the game canvas.
+Draws positions with more and more disks on a HanoiCanvas, well past the game's
+own 20-disk limit, so every level of detail is drawn: detailed, one rectangle
+per disk, and rasterized stacks. Each frame is timed from draw() until Tk has
+redrawn the canvas. A random legal move is made between frames, as in a
+replay, so the raster tier's strip cache has to redraw the stacks that changed.
+
+Usage:
+    python main.py --benchmark-frames [--report frame_report.json]
+"""
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from game_engine import peg_names, pegs_from_positions
+from hanoi_algorithms import position_moves
+from startup_benchmark import write_report
+
+DISK_COUNTS = (10, 15, 20, 60, 120, 250, 500, 1000)
+FRAMES = 30
+
+# One frame at 60 Hz
+FRAME_BUDGET_MS = 16
+
+
+def benchmark_states(num_disks, num_pegs, frames, rng):
+    """
+    Yield the peg dicts of a random position and of the positions after each
+    of frames - 1 random legal moves.
+    """
+    names = peg_names(num_pegs)
+    positions = [rng.randrange(num_pegs) for _ in range(num_disks)]
+    for frame in range(frames):
+        if frame:
+            disk, _, target = rng.choice(list(position_moves(positions, num_pegs)))
+            positions[disk] = target
+        yield pegs_from_positions(positions, names)
+
+
+def measure_frames(hanoi_canvas, num_disks, num_pegs=3, frames=FRAMES, seed=0):
+    """
+    Draw frames positions of num_disks disks and time each one.
+
+    Returns:
+        Dict with the disk count, level of detail, canvas items per frame and
+        the frame times in ms
+    """
+    times = []
+    for state in benchmark_states(num_disks, num_pegs, frames, random.Random(seed)):
+        start = time.perf_counter()
+        hanoi_canvas.draw(state)
+        hanoi_canvas.canvas.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "disks": num_disks,
+        "detail_level": hanoi_canvas.detail_level,
+        "items": len(hanoi_canvas.canvas.find_all()),
+        "frame_ms": times
+    }
+
+
+def build_report(results, budget_ms=FRAME_BUDGET_MS):
+    """
+    Summarize measure_frames() results.
+
+    The first frame of each size also builds every raster strip, so it is
+    reported on its own and left out of the mean and the budget check.
+    """
+    sizes = []
+    for result in results:
+        first, *rest = result["frame_ms"]
+        rest = rest or [first]
+        sizes.append({
+            "disks": result["disks"],
+            "detail_level": result["detail_level"],
+            "items": result["items"],
+            "first_ms": round(first, 3),
+            "mean_ms": round(sum(rest) / len(rest), 3),
+            "max_ms": round(max(rest), 3),
+            "within_budget": max(rest) <= budget_ms
+        })
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "budget_ms": budget_ms,
+        "sizes": sizes
+    }
+
+
+def run(report_path="frame_report.json", disk_counts=DISK_COUNTS, frames=FRAMES):
+    """Run the benchmark in a window of the game's size and write the report"""
+    import tkinter as tk
+    from ui import HanoiCanvas
+
+    root = tk.Tk()
+    root.geometry("950x700")
+    hanoi_canvas = HanoiCanvas(root, lambda peg_name: None, background_rng=random.Random(0))
+    root.update()
+    try:
+        results = [measure_frames(hanoi_canvas, num_disks, frames=frames) for num_disks in disk_counts]
+    finally:
+        root.destroy()
+
+    report = build_report(results)
+    write_report(report, report_path)
+
+    print("disks\tdetail\titems\tfirst_ms\tmean_ms\tmax_ms")
+    for size in report["sizes"]:
+        flag = "" if size["within_budget"] else f"\tover {report['budget_ms']} ms"
+        print(f"{size['disks']}\t{size['detail_level']}\t{size['items']}\t{size['first_ms']}\t"
+              f"{size['mean_ms']}\t{size['max_ms']}{flag}")
+    print(f"Report written to {report_path}")
+    return report
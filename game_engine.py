@@ -0,0 +1,587 @@
+"""
+Game rules for the Tower of Hanoi, independent of any user interface.
+GameEngine holds the peg state, applies and validates moves, decides win or
+loss against the minimum number of moves and builds the result record that is
+saved to the database. Views (the Tk window, bots, load tests) subscribe to its
+events instead of duplicating the rules.
+"""
+import random
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from hanoi_algorithms import (recursive_hanoi, iterative_hanoi, frame_stewart, cyclic_hanoi_moves,
+                              adjacent_hanoi_moves, variant_min_moves, solve_position, position_distance,
+                              default_group_size, stored_group_size, PDB_DIRECTORY)
+from move_codec import format_moves, EVENT_MOVE, EVENT_HINT
+
+# Events passed to listeners as listener(event, data)
+MOVE = "move"
+INVALID_MOVE = "invalid_move"
+WON = "won"
+LOST = "lost"
+
+
+# Disk counts a new game is drawn from when none is pinned
+MIN_RANDOM_DISKS = 5
+MAX_RANDOM_DISKS = 10
+
+# Starting layouts: all disks on A; disks spread at random, gathered on the last
+# peg; or two interleaved towers on the first and last peg that swap places
+LAYOUTS = ("classic", "spread", "swap")
+
+
+class SessionRandom:
+    """
+    Reproducible random streams for one session, all derived from a single seed.
+
+    Each subsystem (game setup, background, effects) draws from its own stream, so
+    how often one of them draws never changes what another one gets.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: Integer seed; a fresh one is picked (and kept in self.seed) when None
+        """
+        self.seed = random.SystemRandom().getrandbits(32) if seed is None else int(seed)
+        self.streams = {}
+
+    def stream(self, name):
+        """Return the random.Random for a subsystem, created on first use"""
+        rng = self.streams.get(name)
+        if rng is None:
+            # String seeds are hashed with SHA-512, so streams are stable across runs
+            rng = self.streams[name] = random.Random(f"{self.seed}:{name}")
+        return rng
+
+    def disk_count(self):
+        """Draw the disk count of the next game"""
+        return self.stream("setup").randint(MIN_RANDOM_DISKS, MAX_RANDOM_DISKS)
+
+
+def peg_names(num_pegs):
+    """Return the peg letters of a game, "A" first"""
+    return [chr(65 + i) for i in range(num_pegs)]
+
+
+def pegs_from_positions(positions, names):
+    """
+    Build the peg dict of a position.
+
+    Args:
+        positions: Peg index of each disk, smallest first
+        names: Peg names
+
+    Returns:
+        Dict of peg name -> list of disks, bottom first
+    """
+    pegs = {name: [] for name in names}
+    for disk in range(len(positions), 0, -1):
+        pegs[names[positions[disk - 1]]].append(disk)
+    return pegs
+
+
+def format_position(positions):
+    """Write a position as peg letters, smallest disk first (e.g. "AAD")"""
+    return "".join(chr(65 + peg) for peg in positions)
+
+
+def parse_position(text):
+    """Inverse of format_position"""
+    return tuple(ord(letter) - 65 for letter in text)
+
+
+def max_search_disks(num_pegs, layout="swap"):
+    """
+    Most disks for which a non-classic layout is solved without a noticeable pause.
+
+    Layouts that gather every disk on one peg ("spread") can search with the
+    larger database files in PDB_DIRECTORY, once pdb_tool has built them.
+    """
+    if num_pegs == 3:
+        return 20
+    # Each disk past the pattern databases multiplies the search; with six or more
+    # pegs the databases are smaller and the branching wider, so allow one fewer
+    limit = default_group_size(num_pegs) + (2 if num_pegs <= 5 else 1)
+    if layout == "spread":
+        # Random 4-peg positions one disk past a stored database solve in well
+        # under a second; two disks past take seconds
+        limit = max(limit, stored_group_size(PDB_DIRECTORY, num_pegs, 20) + 1)
+    return limit
+
+
+def layout_positions(layout, num_disks, num_pegs, rng):
+    """
+    Return the start and goal of a layout.
+
+    Args:
+        layout: One of LAYOUTS
+        num_disks: Number of disks
+        num_pegs: Number of pegs
+        rng: random.Random for the "spread" layout
+
+    Returns:
+        (start, goal) tuples of peg indexes, smallest disk first, or (None, None)
+        for the classic layout
+    """
+    last = num_pegs - 1
+    if layout == "classic":
+        return None, None
+    if layout == "spread":
+        start = [rng.randrange(num_pegs) for _ in range(num_disks)]
+        if all(peg == last for peg in start):
+            start[-1] = 0
+        return tuple(start), (last,) * num_disks
+    if layout == "swap":
+        start = tuple(0 if disk % 2 else last for disk in range(num_disks))
+        return start, tuple(last - peg for peg in start)
+    raise ValueError(f"Unknown layout '{layout}'")
+
+
+@lru_cache(maxsize=64)
+def position_solution(start, goal, num_pegs):
+    """Return the shortest solution between two positions as (source, target) peg names"""
+    names = peg_names(num_pegs)
+    moves = solve_position(start, goal, num_pegs, directory=PDB_DIRECTORY)
+    return tuple((names[source], names[target]) for source, target in moves)
+
+
+@lru_cache(maxsize=64)
+def position_min_moves(start, goal, num_pegs):
+    """
+    Return the length of the shortest solution between two positions.
+
+    Three pegs use the closed form, so no move list is built (20 disks would
+    be a million moves). With more pegs the search dominates and its solution
+    is at most a few hundred moves, so it is solved once and kept for hints.
+    """
+    if num_pegs == 3:
+        return position_distance(start, goal, num_pegs)
+    return len(position_solution(start, goal, num_pegs))
+
+
+@lru_cache(maxsize=64)
+def solution_moves(num_disks, num_pegs, rules="classic"):
+    """
+    Return the reference solution moving every disk from the first peg to the last.
+
+    Cached per configuration, since every game of the same size shares it.
+
+    Args:
+        num_disks: Number of disks
+        num_pegs: Number of pegs
+        rules: "classic", "cyclic" or "adjacent" (see hanoi_algorithms.RULES)
+
+    Returns:
+        Tuple of (source, target) moves
+    """
+    names = peg_names(num_pegs)
+    if rules != "classic":
+        variant_min_moves(num_disks, num_pegs, rules)  # rejects unknown rules and peg counts
+        if rules == "cyclic":
+            return tuple(cyclic_hanoi_moves(num_disks, names, names[0], names[-1]))
+        return tuple(adjacent_hanoi_moves(num_disks, names[0], names[-1], names[1]))
+    if num_pegs == 3:
+        return tuple(recursive_hanoi(num_disks, names[0], names[-1], names[1]))
+    return tuple(frame_stewart(num_disks, names, names[0], names[-1]))
+
+
+def time_algorithms(num_disks, num_pegs, clock=time.perf_counter):
+    """
+    Time the solvers on a configuration.
+
+    Returns:
+        Tuple of ({algorithm: seconds or None}, efficiency note)
+    """
+    names = peg_names(num_pegs)
+    times = {}
+
+    start = clock()
+    recursive_moves = recursive_hanoi(num_disks, names[0], names[-1], names[1])
+    times['recursive'] = clock() - start
+
+    start = clock()
+    iterative_hanoi(num_disks, names[0], names[-1], names[1])
+    times['iterative'] = clock() - start
+
+    if num_pegs >= 4:
+        start = clock()
+        frame_stewart_moves = frame_stewart(num_disks, names, names[0], names[-1])
+        times['frame_stewart'] = clock() - start
+        if len(recursive_moves) > len(frame_stewart_moves):
+            efficiency_note = f"{num_pegs}-peg solution is more efficient ({len(frame_stewart_moves)} vs {len(recursive_moves)})"
+        else:
+            efficiency_note = f"3-peg solution matches {num_pegs}-peg efficiency ({len(recursive_moves)} moves)"
+    else:
+        times['frame_stewart'] = None
+        efficiency_note = "3-peg solution used"
+
+    return times, efficiency_note
+
+
+class GameEngine:
+    """State and rules of one game: by default all disks start on peg A and must end on the last peg"""
+
+    def __init__(self, num_disks, num_pegs=3, clock=time.monotonic, keep_moves=True, rules="classic",
+                 start=None, goal=None):
+        """
+        Args:
+            num_disks: Number of disks
+            num_pegs: Number of pegs
+            clock: Time source for the game duration, replaceable in tests
+            keep_moves: Record the moves played and the event log; turn off to check
+                very long sequences in constant memory (moves and events are then None)
+            rules: "classic"; "cyclic" (disks only move to the next peg, C wrapping
+                to A) or "adjacent" (no moves between A and C), both on 3 pegs
+            start: Starting peg index of each disk, smallest first (see layout_positions);
+                all on peg A when None
+            goal: Goal peg index of each disk, smallest first; all on the last peg when None
+        """
+        self.num_disks = num_disks
+        self.num_pegs = num_pegs
+        self.clock = clock
+        self.rules = rules
+
+        names = peg_names(num_pegs)
+        self.peg_index = {name: i for i, name in enumerate(names)}
+        self.source = names[0]
+        self.target = names[-1]
+        self.start_position = tuple(start) if start is not None else (0,) * num_disks
+        self.goal_position = tuple(goal) if goal is not None else (num_pegs - 1,) * num_disks
+        self.is_classic_layout = start is None and goal is None
+        if not self.is_classic_layout:
+            if rules != "classic":
+                raise ValueError("Custom layouts use the classic rules")
+            if len(self.start_position) != num_disks or len(self.goal_position) != num_disks:
+                raise ValueError("Start and goal need a peg for every disk")
+            if not all(0 <= peg < num_pegs for peg in self.start_position + self.goal_position):
+                raise ValueError(f"Peg indexes must be between 0 and {num_pegs - 1}")
+        self.pegs = pegs_from_positions(self.start_position, names)
+        self.goal_pegs = pegs_from_positions(self.goal_position, names)
+
+        if self.is_classic_layout:
+            self.min_moves = variant_min_moves(num_disks, num_pegs, rules)
+        else:
+            self.min_moves = position_min_moves(self.start_position, self.goal_position, num_pegs)
+        self.moves = [] if keep_moves else None
+        # (kind, source, target, seconds since start) for every move and hint, for replays
+        self.events = [] if keep_moves else None
+        self.move_count = 0
+        self.hint_index = 0
+        self.last_error = None
+        self.state = "playing"
+        self.started_at = clock()
+        self.finished_at = None
+        self.listeners = []
+
+    def start(self):
+        """Restart the game clock, e.g. once the player has finished setting up"""
+        self.started_at = self.clock()
+
+    @property
+    def is_active(self):
+        return self.state == "playing"
+
+    def subscribe(self, listener):
+        """Call listener(event, data) for every move, invalid move, win and loss"""
+        self.listeners.append(listener)
+        return listener
+
+    def emit(self, event, data):
+        for listener in self.listeners:
+            listener(event, data)
+
+    def check_move(self, source, target):
+        """
+        Check a move against the rules.
+
+        Returns:
+            None if the move is legal, otherwise the reason it is not
+        """
+        if source not in self.pegs or target not in self.pegs:
+            return f"unknown peg '{source}' or '{target}'"
+        if source == target:
+            return "same source and target"
+        if not self.pegs[source]:
+            return "source peg is empty"
+        if self.pegs[target] and self.pegs[source][-1] > self.pegs[target][-1]:
+            return "larger disk on smaller disk"
+        if self.rules != "classic":
+            step = self.peg_index[target] - self.peg_index[source]
+            if self.rules == "cyclic" and step % self.num_pegs != 1:
+                return "cyclic rules only allow moves to the next peg"
+            if self.rules == "adjacent" and abs(step) != 1:
+                return "adjacent rules only allow moves to a neighbouring peg"
+        return None
+
+    def apply_move(self, source, target):
+        """
+        Move the top disk from source to target if the rules allow it.
+
+        Returns:
+            True if the disk was moved, False if the move was rejected
+            (the reason is kept in last_error)
+        """
+        if not self.is_active:
+            self.last_error = "game is over"
+            return False
+
+        error = self.check_move(source, target)
+        if error is not None:
+            self.last_error = error
+            if self.listeners:
+                self.emit(INVALID_MOVE, {'source': source, 'target': target, 'reason': error})
+            return False
+
+        disk = self.pegs[source].pop()
+        self.pegs[target].append(disk)
+        self.move_count += 1
+        if self.moves is not None:
+            self.moves.append((source, target))
+            self.events.append((EVENT_MOVE, source, target, self.clock() - self.started_at))
+        self.last_error = None
+        if self.listeners:
+            self.emit(MOVE, {'source': source, 'target': target, 'disk': disk})
+
+        if self.check_win():
+            self.finished_at = self.clock()
+            # Solving it in more than the minimum number of moves loses the game
+            self.state = "won" if self.move_count <= self.min_moves else "lost"
+            if self.listeners:
+                self.emit(WON if self.state == "won" else LOST, {'moves': self.move_count})
+        return True
+
+    def play(self, moves):
+        """
+        Apply moves in order, stopping at the first rejected one.
+
+        Returns:
+            Number of moves applied
+        """
+        applied = 0
+        for source, target in moves:
+            if not self.apply_move(source, target):
+                break
+            applied += 1
+        return applied
+
+    def check_win(self):
+        if self.is_classic_layout:
+            return len(self.pegs[self.target]) == self.num_disks
+        return self.pegs == self.goal_pegs
+
+    def reference_solution(self):
+        """Return the shortest solution from the start as a tuple of (source, target) moves"""
+        if self.is_classic_layout:
+            return solution_moves(self.num_disks, self.num_pegs, self.rules)
+        return position_solution(self.start_position, self.goal_position, self.num_pegs)
+
+    def elapsed(self):
+        """Seconds since the game started, frozen once it is over"""
+        end = self.finished_at if self.finished_at is not None else self.clock()
+        return end - self.started_at
+
+    def next_hint(self):
+        """Return the next move of the reference solution, or None when there are no more"""
+        solution = self.reference_solution()
+        if self.hint_index >= len(solution):
+            return None
+        move = solution[self.hint_index]
+        self.hint_index += 1
+        if self.events is not None:
+            self.events.append((EVENT_HINT, None, None, self.clock() - self.started_at))
+        return move
+
+    def validate_sequence(self, sequence):
+        """
+        Check the format of a "A->C,A->B" move sequence typed by the player.
+
+        Returns:
+            True if it is well formed, otherwise an error message
+        """
+        if not sequence:
+            return True
+        for move in sequence.split(','):
+            move = move.strip()
+            if not move:
+                return "Move sequence contains empty moves"
+            parts = move.split('->')
+            if len(parts) != 2:
+                return f"Invalid move format: {move}. Use format 'A->B'"
+            source, target = parts[0].strip(), parts[1].strip()
+            if source not in self.pegs or target not in self.pegs:
+                return f"Invalid peg '{source}' or '{target}'"
+            if source == target:
+                return f"Invalid move {move}: same source and target"
+        return True
+
+    @staticmethod
+    def parse_sequence(sequence):
+        """Split a "A->C,A->B" sequence into (source, target) tuples"""
+        if not sequence:
+            return []
+        return [tuple(part.strip() for part in move.split('->')) for move in sequence.split(',')]
+
+    def is_optimal_sequence(self, moves):
+        """Return True if moves are exactly the reference minimum solution"""
+        return len(moves) == self.min_moves and tuple(moves) == self.reference_solution()
+
+    def result_record(self, name, predicted_sequence="", times=None, efficiency_note=""):
+        """
+        Build the record saved for this game (the keyword arguments of Database.save_result).
+
+        Args:
+            name: Player name
+            predicted_sequence: Move sequence the player entered before playing
+            times: Algorithm timings from time_algorithms
+            efficiency_note: Note from time_algorithms
+        """
+        try:
+            predicted = self.parse_sequence(predicted_sequence)
+        except Exception:
+            predicted = []
+        return {
+            'name': name, 'disks': self.num_disks, 'pegs': self.num_pegs,
+            'completed': self.state != "playing", 'times': dict(times or {}),
+            'user_time': int(self.elapsed()),
+            'user_moves': format_moves(predicted),
+            'is_correct': bool(predicted) and self.is_optimal_sequence(predicted),
+            'efficiency_note': efficiency_note,
+            'actual_moves': format_moves(self.moves or ()),
+            'min_moves': self.min_moves,
+            'events': list(self.events or ()),
+            'start_position': None if self.is_classic_layout else format_position(self.start_position),
+            'goal_position': None if self.is_classic_layout else format_position(self.goal_position)
+        }
+
+
+def verify_moves(moves, num_disks, num_pegs=3, rules="classic"):
+    """
+    Check a move sequence against the rules without keeping it in memory.
+
+    Args:
+        moves: Iterable of (source, target) tuples; a ValueError raised while
+            iterating (e.g. a malformed move in a file) counts as an illegal move
+        num_disks: Number of disks, all starting on peg A
+        num_pegs: Number of pegs; the last one is the goal
+        rules: Rule variant, see GameEngine
+
+    Returns:
+        Dict with disks, pegs, rules, moves (number applied), min_moves, valid, solved,
+        optimal, error_index (0-based index of the first illegal move or None)
+        and error
+    """
+    engine = GameEngine(num_disks, num_pegs, keep_moves=False, rules=rules)
+    error = None
+    iterator = iter(moves)
+    while True:
+        try:
+            source, target = next(iterator)
+        except StopIteration:
+            break
+        except ValueError as e:
+            error = str(e)
+            break
+        if not engine.apply_move(source, target):
+            error = engine.last_error
+            break
+
+    solved = error is None and engine.check_win()
+    return {
+        'disks': num_disks,
+        'pegs': num_pegs,
+        'rules': rules,
+        'moves': engine.move_count,
+        'min_moves': engine.min_moves,
+        'valid': error is None,
+        'solved': solved,
+        'optimal': solved and engine.move_count == engine.min_moves,
+        'error_index': None if error is None else engine.move_count,
+        'error': error
+    }
+
+
+class GameReplay:
+    """
+    A recorded game that can be positioned at any move.
+
+    Every SNAPSHOT_INTERVAL moves the peg of each disk is stored as one byte
+    per disk, so seeking rebuilds the pegs from the nearest snapshot and
+    replays fewer than SNAPSHOT_INTERVAL moves, however long the game is.
+    """
+
+    SNAPSHOT_INTERVAL = 32
+
+    def __init__(self, num_disks, num_pegs, events, snapshot_interval=SNAPSHOT_INTERVAL, start=None):
+        """
+        Args:
+            num_disks: Number of disks
+            num_pegs: Number of pegs
+            events: Event log as recorded by GameEngine (or decoded from the database)
+            snapshot_interval: Moves between two stored snapshots
+            start: Starting peg index of each disk, smallest first; all on peg A when None
+        """
+        self.num_disks = num_disks
+        self.names = peg_names(num_pegs)
+        self.snapshot_interval = snapshot_interval
+
+        self.moves = []
+        self.times = []
+        self.hint_times = []
+        for kind, source, target, offset in events:
+            if kind == EVENT_MOVE:
+                self.moves.append((source, target))
+                self.times.append(offset)
+            else:
+                self.hint_times.append(offset)
+
+        self.snapshots = []
+        # Peg index of each disk, smallest first
+        positions = bytearray(start) if start is not None else bytearray(num_disks)
+        pegs = pegs_from_positions(positions, self.names)
+        index = {name: i for i, name in enumerate(self.names)}
+        for i, (source, target) in enumerate(self.moves):
+            if i % snapshot_interval == 0:
+                self.snapshots.append(bytes(positions))
+            if not pegs.get(source) or target not in pegs or (pegs[target] and pegs[target][-1] < pegs[source][-1]):
+                raise ValueError(f"Illegal move #{i + 1} in replay: {source}->{target}")
+            disk = pegs[source].pop()
+            pegs[target].append(disk)
+            positions[disk - 1] = index[target]
+        if len(self.moves) % snapshot_interval == 0:
+            self.snapshots.append(bytes(positions))
+
+    def __len__(self):
+        return len(self.moves)
+
+    @property
+    def duration(self):
+        return self.times[-1] if self.times else 0.0
+
+    def state_at(self, move_index):
+        """
+        Return the pegs after the first move_index moves.
+
+        Returns:
+            Dict of peg name -> list of disks, bottom first
+        """
+        move_index = max(0, min(move_index, len(self.moves)))
+        base = move_index // self.snapshot_interval
+        positions = self.snapshots[base]
+
+        pegs = pegs_from_positions(positions, self.names)
+        for source, target in self.moves[base * self.snapshot_interval:move_index]:
+            pegs[target].append(pegs[source].pop())
+        return pegs
+
+    def time_at(self, move_index):
+        """Seconds into the game when move_index moves had been played"""
+        return self.times[move_index - 1] if move_index > 0 else 0.0
+
+    def index_at(self, seconds):
+        """Number of moves played by a given time into the game"""
+        return bisect_right(self.times, seconds)
+
+    def hints_before(self, move_index):
+        """Number of hints used before move_index moves had been played"""
+        return bisect_right(self.hint_times, self.time_at(move_index))
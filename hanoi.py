@@ -0,0 +1,213 @@
+"""
+Command-line solver and verifier for the Tower of Hanoi.
+Uses the same solvers and rules as the game without opening a window. Moves
+are streamed in both directions, so even n=30 (over a billion moves) runs in
+constant memory.
+
+Usage:
+    python -m hanoi solve --disks 20 [--pegs 3] [--rules classic] [--algo recursive] [--format text|binary] [-o FILE]
+    python -m hanoi verify FILE --disks 20 [--pegs 3] [--rules classic] [--json]
+    python -m hanoi count --disks 1-30 [--pegs 3 4] [--rules classic]
+    python -m hanoi bench --disks 1-25 [--rules classic cyclic adjacent] [--max-moves 2000000]
+
+Rules: "classic", "cyclic" (disks only move one peg clockwise, C wrapping to A)
+or "adjacent" (never directly between A and C); the variants use 3 pegs.
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+from hanoi_algorithms import (recursive_hanoi_moves, iterative_hanoi_moves, frame_stewart_moves,
+                              cyclic_hanoi_moves, adjacent_hanoi_moves, variant_min_moves, RULES)
+from game_engine import peg_names, verify_moves
+from move_codec import write_moves, read_moves, write_text_moves, read_text_moves, is_binary_header
+
+
+def solver_moves(algorithm, num_disks, num_pegs):
+    """
+    Return a generator of the moves of a solver, from peg A to the last peg.
+
+    Args:
+        algorithm: "recursive", "iterative", "frame_stewart", "cyclic" or "adjacent"
+        num_disks: Number of disks
+        num_pegs: Number of pegs
+    """
+    names = peg_names(num_pegs)
+    if algorithm == "recursive":
+        return recursive_hanoi_moves(num_disks, names[0], names[-1], names[1])
+    if algorithm == "iterative":
+        return iterative_hanoi_moves(num_disks, names[0], names[-1], names[1])
+    if algorithm == "frame_stewart":
+        if num_pegs < 4:
+            raise ValueError("frame_stewart needs at least 4 pegs")
+        return frame_stewart_moves(num_disks, names, names[0], names[-1])
+    if algorithm in ("cyclic", "adjacent"):
+        if num_pegs != 3:
+            raise ValueError(f"{algorithm} needs exactly 3 pegs")
+        if algorithm == "cyclic":
+            return cyclic_hanoi_moves(num_disks, names, names[0], names[-1])
+        return adjacent_hanoi_moves(num_disks, names[0], names[-1], names[1])
+    raise ValueError(f"Unknown algorithm '{algorithm}'")
+
+
+def default_algorithm(rules, num_pegs):
+    """Return the optimal solver for a rule variant"""
+    if rules != "classic":
+        return rules
+    return "recursive" if num_pegs == 3 else "frame_stewart"
+
+
+def parse_range(text):
+    """Parse "N" or "A-B" into a range of disk counts"""
+    first, _, last = text.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+def solve(args):
+    algorithm = args.algo or default_algorithm(args.rules, args.pegs)
+    moves = solver_moves(algorithm, args.disks, args.pegs)
+
+    if args.format == "binary":
+        if args.output == "-":
+            count = write_moves(moves, sys.stdout.buffer, args.pegs, compress=args.compress)
+            sys.stdout.buffer.flush()
+        else:
+            with open(args.output, "wb") as f:
+                count = write_moves(moves, f, args.pegs, compress=args.compress)
+    else:
+        if args.output == "-":
+            count = write_text_moves(moves, sys.stdout)
+            sys.stdout.flush()
+        else:
+            with open(args.output, "w") as f:
+                count = write_text_moves(moves, f)
+
+    print(f"{count} moves written ({algorithm}, {args.disks} disks, {args.pegs} pegs)", file=sys.stderr)
+    return 0
+
+
+def open_moves(path):
+    """Open a text or binary move file and return (file, move iterator)"""
+    f = open(path, "rb")
+    first = f.peek(1)[:1]
+    if first and is_binary_header(first[0]):
+        return f, read_moves(f)
+    f.close()
+    f = open(path, "r")
+    return f, read_text_moves(f)
+
+
+def verify(args):
+    f, moves = open_moves(args.file)
+    with f:
+        report = verify_moves(moves, args.disks, args.pegs, args.rules)
+
+    if args.json:
+        print(json.dumps(report))
+    elif report['valid']:
+        status = "optimal" if report['optimal'] else ("solved" if report['solved'] else "not solved")
+        print(f"{args.file}: {status}, {report['moves']} moves (minimum {report['min_moves']})")
+    else:
+        print(f"{args.file}: illegal move #{report['error_index'] + 1}: {report['error']}")
+    return 0 if report['solved'] else 1
+
+
+def count(args):
+    for num_pegs in args.pegs:
+        for num_disks in parse_range(args.disks):
+            print(f"{num_disks}\t{num_pegs}\t{variant_min_moves(num_disks, num_pegs, args.rules)}")
+    return 0
+
+
+def bench(args):
+    """
+    Time the minimum-move functions and streaming solvers of each rule variant.
+
+    Solutions longer than --max-moves are streamed only that far and the full
+    time is extrapolated from the rate, since e.g. adjacent n=25 has 8.5e11 moves.
+    """
+    print("rules\tdisks\tmin_moves\tcount_us\tstreamed\tseconds\tmoves_per_s\tfull_seconds")
+    for rules in args.rules:
+        for num_disks in parse_range(args.disks):
+            start = time.perf_counter()
+            min_moves = variant_min_moves(num_disks, 3, rules)
+            count_us = (time.perf_counter() - start) * 1e6
+
+            moves = solver_moves(default_algorithm(rules, 3), num_disks, 3)
+            start = time.perf_counter()
+            streamed = sum(1 for _ in islice(moves, args.max_moves))
+            seconds = time.perf_counter() - start
+            rate = streamed / seconds if seconds else 0
+            full = min_moves / rate if rate else 0
+            print(f"{rules}\t{num_disks}\t{min_moves}\t{count_us:.1f}\t{streamed}\t{seconds:.3f}\t"
+                  f"{rate:.0f}\t{full:.3g}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m hanoi", description="Tower of Hanoi solver and verifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = commands.add_parser("solve", help="stream a solution to stdout or a file")
+    solve_parser.add_argument("--disks", type=int, required=True)
+    solve_parser.add_argument("--pegs", type=int, default=3)
+    solve_parser.add_argument("--rules", choices=RULES, default="classic")
+    solve_parser.add_argument("--algo", choices=["recursive", "iterative", "frame_stewart", "cyclic", "adjacent"],
+                              help="default: the optimal solver for the rules and peg count")
+    solve_parser.add_argument("--format", choices=["text", "binary"], default="text",
+                              help="one 'A->C' per line, or the packed binary move format")
+    solve_parser.add_argument("--compress", action="store_true", help="zlib-compress binary output")
+    solve_parser.add_argument("-o", "--output", default="-", help="output file (default stdout)")
+    solve_parser.set_defaults(handler=solve)
+
+    verify_parser = commands.add_parser("verify", help="check a move file against the rules")
+    verify_parser.add_argument("file", help="text (comma or newline separated) or binary move file")
+    verify_parser.add_argument("--disks", type=int, required=True)
+    verify_parser.add_argument("--pegs", type=int, default=3)
+    verify_parser.add_argument("--rules", choices=RULES, default="classic")
+    verify_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    verify_parser.set_defaults(handler=verify)
+
+    count_parser = commands.add_parser("count", help="print minimum move counts")
+    count_parser.add_argument("--disks", default="1-10", help="disk count or range, e.g. 8 or 1-30")
+    count_parser.add_argument("--pegs", type=int, nargs="+", default=[3, 4])
+    count_parser.add_argument("--rules", choices=RULES, default="classic")
+    count_parser.set_defaults(handler=count)
+
+    bench_parser = commands.add_parser("bench", help="time the solvers of each rule variant")
+    bench_parser.add_argument("--disks", default="1-25", help="disk count or range")
+    bench_parser.add_argument("--rules", choices=RULES, nargs="+", default=list(RULES))
+    bench_parser.add_argument("--max-moves", type=int, default=2_000_000,
+                              help="moves streamed per configuration before extrapolating")
+    bench_parser.set_defaults(handler=bench)
+    return parser
+
+
+def check_solve_args(parser, args):
+    """Reject a rule variant combined with a peg count or solver that does not follow it"""
+    if args.command != "solve" or args.rules == "classic":
+        return
+    if args.pegs != 3:
+        parser.error(f"--rules {args.rules} needs --pegs 3")
+    if args.algo is not None and args.algo != args.rules:
+        parser.error(f"--algo {args.algo} does not follow --rules {args.rules}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_solve_args(parser, args)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # Output piped into e.g. head; nothing left to report
+        sys.stderr.close()
+        return 0
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
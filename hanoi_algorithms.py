@@ -1,8 +1,19 @@
 """
 Tower of Hanoi Algorithm Implementations
 This module provides different algorithms for solving the Tower of Hanoi puzzle
-with both 3-peg and 4-peg variants.
+with 3 pegs and, through Frame-Stewart, with 4 to MAX_PEGS pegs.
 """
+import heapq
+import itertools
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+
+# Peg counts supported by calculate_min_moves and the Frame-Stewart solvers
+MIN_PEGS = 3
+MAX_PEGS = 10
 
 def recursive_hanoi(n, source, target, auxiliary):
     """
@@ -107,13 +118,14 @@ def move_between(pegs, a, b, moves):
 
 def frame_stewart(n, pegs, source, target):
     """
-    Frame-Stewart algorithm for the 4-peg Tower of Hanoi.
+    Frame-Stewart algorithm for the Tower of Hanoi on 4 or more pegs.
     
     This algorithm is more efficient than the standard algorithm for 4+ pegs.
-    The Frame-Stewart algorithm divides the problem into two parts:
-    1. Move k disks from source to intermediate peg
-    2. Move n-k disks from source to target using standard algorithm
-    3. Move k disks from intermediate to target
+    The Frame-Stewart algorithm divides the problem into three parts:
+    1. Move k disks from source to an intermediate peg, using all pegs
+    2. Move n-k disks from source to target without that intermediate peg
+    3. Move k disks from intermediate to target, using all pegs
+    k is chosen by best_split, so the solution has calculate_min_moves moves.
     
     Args:
         n: Number of disks
@@ -131,16 +143,10 @@ def frame_stewart(n, pegs, source, target):
         
     # Find intermediate pegs (not source or target)
     intermediate_pegs = [p for p in pegs if p != source and p != target]
-    
-    # For 4 pegs, the optimal k is approximately sqrt(n)
-    if len(pegs) == 4:
-        # Simple heuristic for optimal k value
-        import math
-        k = int(math.sqrt(n))
-    else:
-        # For more pegs, we'll use a more complex formula
-        # but this is sufficient for our purposes
-        k = n // 2
+    if len(pegs) == 3:
+        return recursive_hanoi(n, source, target, intermediate_pegs[0])
+
+    k = best_split(n, len(pegs))
     
     moves = []
     
@@ -148,21 +154,110 @@ def frame_stewart(n, pegs, source, target):
     moves.extend(frame_stewart(k, pegs, source, intermediate_pegs[0]))
     
     # Step 2: Move n-k disks from source to target using remaining pegs
-    remaining_pegs = [source, target] + intermediate_pegs[1:]
-    moves.extend(recursive_hanoi(n - k, source, target, remaining_pegs[2]))
+    remaining_pegs = [p for p in pegs if p != intermediate_pegs[0]]
+    moves.extend(frame_stewart(n - k, remaining_pegs, source, target))
     
     # Step 3: Move k disks from intermediate to target
     moves.extend(frame_stewart(k, pegs, intermediate_pegs[0], target))
     
     return moves
 
+def recursive_hanoi_moves(n, source, target, auxiliary):
+    """
+    Stream the 3-peg solution produced by recursive_hanoi without building a list.
+
+    Move m (counting from 1) takes the disk given by the lowest set bit of m, and
+    its pegs follow from m directly, so each move costs O(1) time and the
+    generator needs no recursion or stack however large n is.
+
+    Args:
+        n: Number of disks
+        source: Source peg name
+        target: Target peg name
+        auxiliary: Auxiliary peg name
+
+    Yields:
+        (source, target) move tuples, in the same order as recursive_hanoi
+    """
+    # The smallest disk cycles source -> target -> auxiliary for odd n,
+    # and source -> auxiliary -> target for even n
+    cycle = (source, auxiliary, target) if n % 2 else (source, target, auxiliary)
+    for m in range(1, 2 ** n):
+        yield cycle[(m & (m - 1)) % 3], cycle[((m | (m - 1)) + 1) % 3]
+
+def iterative_hanoi_moves(n, source, target, auxiliary):
+    """
+    Stream the moves of iterative_hanoi, keeping only the peg contents in memory.
+
+    Args:
+        n: Number of disks
+        source: Source peg name
+        target: Target peg name
+        auxiliary: Auxiliary peg name
+
+    Yields:
+        (source, target) move tuples, in the same order as iterative_hanoi
+    """
+    pegs = {
+        source: list(reversed(range(1, n + 1))),
+        auxiliary: [],
+        target: []
+    }
+
+    if n % 2 == 0:
+        target, auxiliary = auxiliary, target
+
+    pairs = ((source, target), (source, auxiliary), (auxiliary, target))
+    for i in range(2 ** n - 1):
+        a, b = pairs[i % 3]
+        if not pegs[b] or (pegs[a] and pegs[a][-1] < pegs[b][-1]):
+            pegs[b].append(pegs[a].pop())
+            yield a, b
+        else:
+            pegs[a].append(pegs[b].pop())
+            yield b, a
+
+def frame_stewart_moves(n, pegs, source, target):
+    """
+    Stream the moves of frame_stewart without building a list.
+
+    Args:
+        n: Number of disks
+        pegs: List of peg names
+        source: Source peg name
+        target: Target peg name
+
+    Yields:
+        (source, target) move tuples, in the same order as frame_stewart
+    """
+    if n == 0:
+        return
+    if n == 1:
+        yield source, target
+        return
+
+    intermediate_pegs = [p for p in pegs if p != source and p != target]
+    if len(pegs) == 3:
+        yield from recursive_hanoi_moves(n, source, target, intermediate_pegs[0])
+        return
+
+    k = best_split(n, len(pegs))
+
+    yield from frame_stewart_moves(k, pegs, source, intermediate_pegs[0])
+
+    remaining_pegs = [p for p in pegs if p != intermediate_pegs[0]]
+    yield from frame_stewart_moves(n - k, remaining_pegs, source, target)
+
+    yield from frame_stewart_moves(k, pegs, intermediate_pegs[0], target)
+
+@lru_cache(maxsize=None)
 def calculate_min_moves(n, pegs):
     """
     Calculate the minimum number of moves required.
     
     Args:
         n: Number of disks
-        pegs: Number of pegs
+        pegs: Number of pegs, MIN_PEGS to MAX_PEGS
         
     Returns:
         Minimum number of moves
@@ -170,18 +265,737 @@ def calculate_min_moves(n, pegs):
     if pegs == 3:
         # Standard formula for 3 pegs: 2^n - 1
         return 2 ** n - 1
-    elif pegs == 4:
-        # Approximate for 4 pegs
+    elif MIN_PEGS < pegs <= MAX_PEGS:
         if n <= 1:
             return n
         
-        # Use dynamic programming to find optimal solution
-        # This is a simple implementation of Frame-Stewart algorithm
-        min_moves = float('inf')
-        for k in range(1, n):
-            moves = (2 * calculate_min_moves(k, pegs) + 
-                    calculate_min_moves(n - k, 3))
-            min_moves = min(min_moves, moves)
-        return min_moves
+        # Frame-Stewart recurrence; the cache makes this O(n^2) per peg count
+        # instead of exponential (e.g. for n=64 on 10 pegs)
+        k = best_split(n, pegs)
+        return 2 * calculate_min_moves(k, pegs) + calculate_min_moves(n - k, pegs - 1)
     else:
-        raise ValueError("Only 3 or 4 pegs are supported")
\ No newline at end of file
+        raise ValueError(f"Only {MIN_PEGS} to {MAX_PEGS} pegs are supported")
+
+@lru_cache(maxsize=None)
+def best_split(n, pegs):
+    """
+    Return the number of disks k that Frame-Stewart parks on an intermediate peg.
+
+    Args:
+        n: Number of disks, at least 2
+        pegs: Number of pegs, at least 4
+
+    Returns:
+        The k in 1..n-1 minimising 2 * moves(k, pegs) + moves(n - k, pegs - 1)
+    """
+    return min(range(1, n),
+               key=lambda k: 2 * calculate_min_moves(k, pegs) + calculate_min_moves(n - k, pegs - 1))
+
+# Rule variants on three pegs: "classic" allows any move, "cyclic" only moves a
+# disk one step clockwise and "adjacent" never moves a disk directly between the end pegs
+RULES = ("classic", "cyclic", "adjacent")
+
+def cyclic_hanoi_moves(n, pegs, source, target):
+    """
+    Stream the optimal solution of cyclic Hanoi, where disks only move clockwise.
+
+    Moving a tower one step clockwise (Q) or two steps (R) decomposes as
+        Q(n) = R(n-1), move n, R(n-1)
+        R(n) = R(n-1), move n, Q(n-1), move n, R(n-1)
+    The recursion is unrolled onto an explicit stack, so every move costs O(1)
+    amortised instead of passing through n nested generators.
+
+    Args:
+        n: Number of disks
+        pegs: The three peg names in clockwise order
+        source: Source peg name
+        target: Target peg name
+
+    Yields:
+        (source, target) move tuples
+    """
+    start = pegs.index(source)
+    steps = (pegs.index(target) - start) % 3
+    if n == 0 or steps == 0:
+        return
+
+    # Tasks are (disks, peg index, steps clockwise); steps == 0 marks a single
+    # move of the disk on top of that peg to the next peg clockwise
+    stack = [(n, start, steps)]
+    while stack:
+        disks, peg, steps = stack.pop()
+        if steps == 0:
+            yield pegs[peg], pegs[(peg + 1) % 3]
+        elif disks == 0:
+            continue
+        elif steps == 1:
+            # Pushed in reverse order of execution
+            stack += [(disks - 1, (peg + 2) % 3, 2), (0, peg, 0), (disks - 1, peg, 2)]
+        else:
+            stack += [(disks - 1, peg, 2), (0, (peg + 1) % 3, 0), (disks - 1, (peg + 2) % 3, 1),
+                      (0, peg, 0), (disks - 1, peg, 2)]
+
+def adjacent_hanoi_moves(n, source, target, middle):
+    """
+    Stream the optimal solution of adjacent-move Hanoi from one end peg to the other.
+
+    The solution passes through all 3^n arrangements in ternary Gray code order:
+    move m (counting from 1) takes the disk given by the lowest non-zero base-3
+    digit of m, and every disk shuttles end to end, reversing at each end. Each
+    move costs O(1) amortised time and no recursion.
+
+    Args:
+        n: Number of disks
+        source: Source end peg
+        target: Target end peg
+        middle: The peg between them
+
+    Yields:
+        (source, target) move tuples
+    """
+    names = (source, middle, target)
+    position = [0] * n   # Peg index of each disk, smallest first
+    direction = [1] * n
+    for m in range(1, 3 ** n):
+        disk = 0
+        while m % 3 == 0:
+            m //= 3
+            disk += 1
+        here = position[disk]
+        there = here + direction[disk]
+        if there in (0, 2):
+            direction[disk] = -direction[disk]
+        position[disk] = there
+        yield names[here], names[there]
+
+@lru_cache(maxsize=None)
+def cyclic_min_moves(n, steps=2):
+    """
+    Minimum moves of cyclic Hanoi.
+
+    Args:
+        n: Number of disks
+        steps: How far clockwise the tower moves, 1 (Q) or 2 (R)
+
+    Returns:
+        Minimum number of moves
+    """
+    if n == 0:
+        return 0
+    if steps == 1:
+        return 2 * cyclic_min_moves(n - 1, 2) + 1
+    return 2 * cyclic_min_moves(n - 1, 2) + cyclic_min_moves(n - 1, 1) + 2
+
+def adjacent_min_moves(n):
+    """Minimum moves of adjacent-move Hanoi between the end pegs: 3^n - 1"""
+    return 3 ** n - 1
+
+def variant_min_moves(n, pegs, rules="classic"):
+    """
+    Minimum moves from the first peg to the last under a rule variant.
+
+    Args:
+        n: Number of disks
+        pegs: Number of pegs
+        rules: One of RULES; the variants are defined on 3 pegs only
+
+    Returns:
+        Minimum number of moves
+    """
+    if rules == "classic":
+        return calculate_min_moves(n, pegs)
+    if rules not in RULES:
+        raise ValueError(f"Unknown rules '{rules}'")
+    if pegs != 3:
+        raise ValueError(f"{rules} rules need exactly 3 pegs")
+    return cyclic_min_moves(n) if rules == "cyclic" else adjacent_min_moves(n)
+
+# --- Search over arbitrary positions ---------------------------------------
+#
+# A position gives the peg index of every disk, smallest disk first; since disks
+# on a peg are always stacked by size, that is the whole state. Positions are
+# packed into one integer in base `pegs`, so states hash and compare cheaply.
+
+# Largest pattern database built in memory, in states (pegs ** disks in the group)
+PDB_MAX_STATES = 1 << 16
+
+# Transposition table entries kept by the search before the oldest are dropped
+TRANSPOSITION_TABLE_SIZE = 1 << 20
+
+def pack_state(positions, pegs):
+    """Pack a position (peg index per disk, smallest first) into an integer"""
+    state = 0
+    for peg in reversed(positions):
+        state = state * pegs + peg
+    return state
+
+def unpack_state(state, num_disks, pegs):
+    """Inverse of pack_state"""
+    positions = []
+    for _ in range(num_disks):
+        state, peg = divmod(state, pegs)
+        positions.append(peg)
+    return positions
+
+def position_moves(positions, pegs):
+    """
+    Yield the legal moves of a position as (disk, from peg, to peg).
+
+    The top of a peg is its smallest disk, and a disk may go onto any peg
+    whose top is larger, or which is empty.
+    """
+    tops = [None] * pegs
+    for disk, peg in enumerate(positions):
+        if tops[peg] is None:
+            tops[peg] = disk
+    for source, disk in enumerate(tops):
+        if disk is None:
+            continue
+        for target in range(pegs):
+            if target != source and (tops[target] is None or tops[target] > disk):
+                yield disk, source, target
+
+class PatternDatabase:
+    """
+    Exact distances to a goal pattern for a group of disks moved on their own.
+
+    Ignoring every other disk can only make the group's job easier, and every
+    move moves one disk, so the distances of disjoint groups add up to an
+    admissible heuristic for the whole puzzle.
+    """
+
+    def __init__(self, pegs, goal):
+        """
+        Args:
+            pegs: Number of pegs
+            goal: Goal peg index of each disk in the group, smallest first
+        """
+        self.pegs = pegs
+        self.goal = tuple(goal)
+        self.size = pegs ** len(goal)
+        self.distances = self.build()
+
+    def build(self):
+        """Breadth-first search outward from the goal; moves are reversible"""
+        unknown = 0xFFFF
+        distances = array('H', [unknown]) * self.size
+        start = pack_state(self.goal, self.pegs)
+        distances[start] = 0
+        frontier = [start]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for state in frontier:
+                positions = unpack_state(state, len(self.goal), self.pegs)
+                for disk, source, target in position_moves(positions, self.pegs):
+                    moved = state + (target - source) * self.pegs ** disk
+                    if distances[moved] == unknown:
+                        distances[moved] = depth
+                        next_frontier.append(moved)
+            frontier = next_frontier
+        return distances
+
+    def distance(self, index):
+        """Moves the group needs from a packed group position"""
+        return self.distances[index]
+
+    def step(self, distance, index):
+        """Distance of index; the distance of the position one move away is not needed"""
+        return self.distances[index]
+
+def default_group_size(pegs):
+    """Largest group of disks whose pattern database has at most PDB_MAX_STATES states"""
+    size = 1
+    while pegs ** (size + 1) <= PDB_MAX_STATES:
+        size += 1
+    return size
+
+@lru_cache(maxsize=32)
+def pattern_database(pegs, goal):
+    """Return the PatternDatabase for a goal pattern, built once per process"""
+    return PatternDatabase(pegs, goal)
+
+class TranspositionTable:
+    """Bounded map of packed state -> shortest known distance; the oldest entries go first"""
+
+    def __init__(self, max_entries=TRANSPOSITION_TABLE_SIZE):
+        self.max_entries = max_entries
+        # Not a plain dict: finding its oldest key skips every deleted slot before
+        # it, which makes a full table's evictions cost O(table size) each
+        self.entries = OrderedDict()
+
+    def improve(self, state, depth):
+        """
+        Record reaching state at depth.
+
+        Returns:
+            False if it was already reached at least as shallow, so the branch can be cut
+        """
+        seen = self.entries.get(state)
+        if seen is not None and seen <= depth:
+            return False
+        if seen is None and len(self.entries) >= self.max_entries:
+            self.entries.popitem(last=False)
+        self.entries[state] = depth
+        return True
+
+    def get(self, state):
+        return self.entries.get(state)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class PositionSolver:
+    """
+    Optimal solver from any position to any goal position on any number of pegs.
+
+    A* over packed states, guided by disjoint additive pattern databases: groups
+    of group_size disks from the largest down and, if they do not divide evenly,
+    from the smallest up, the heuristic being the larger of the two partitions'
+    sums. A goal with every disk on one peg uses the database files found in
+    directory (see pdb_tool), which are memory-mapped and can cover far larger
+    groups than the databases built in memory.
+
+    Each queued position carries its groups' exact distances, packed
+    DISTANCE_BITS apiece, which only the groups of the moved disk update. A
+    bounded transposition table filters the many transpositions of the
+    puzzle; each queued position links back to the one it was reached from,
+    so dropping old table entries only costs time, never the path, and
+    positions no queued path passes through are freed.
+    """
+
+    DISTANCE_BITS = 32
+
+    def __init__(self, goal, pegs, group_size=None, max_table_entries=TRANSPOSITION_TABLE_SIZE,
+                 directory=None, max_expanded=None):
+        """
+        Args:
+            goal: Goal peg index of each disk, smallest first
+            pegs: Number of pegs
+            group_size: Disks per pattern database; by default the largest database
+                file in directory usable for the goal, else the largest group whose
+                database has at most PDB_MAX_STATES states
+            max_table_entries: Transposition table bound
+            directory: Directory of database files written by pdb_tool, used when
+                the goal gathers every disk on one peg
+            max_expanded: Give up after expanding this many positions (None: never)
+        """
+        self.goal = tuple(goal)
+        self.pegs = pegs
+        self.num_disks = len(self.goal)
+        if any(not 0 <= peg < pegs for peg in self.goal):
+            raise ValueError(f"Peg indexes must be between 0 and {pegs - 1}")
+        self.max_expanded = max_expanded
+        self.table = TranspositionTable(max_table_entries)
+        self.expanded = 0
+
+        # The database files store "all disks on the last peg"; a goal on any
+        # other single peg swaps that peg with the last one during the search
+        self.rename = list(range(pegs))
+        if self.num_disks and len(set(self.goal)) == 1:
+            self.rename[self.goal[0]], self.rename[-1] = pegs - 1, self.goal[0]
+        else:
+            directory = None
+        goal = [self.rename[peg] for peg in self.goal]
+        self.goal_state = pack_state(goal, pegs)
+        self.group_size = min(group_size or stored_group_size(directory, pegs, self.num_disks)
+                              or default_group_size(pegs), self.num_disks) or 1
+
+        partitions = [self.partition(from_largest=True)]
+        if self.num_disks % self.group_size:
+            partitions.append(self.partition(from_largest=False))
+        # All groups side by side as (scale, states, database); a partition is a
+        # slice of them, and a group's pattern index is a digit range of the state
+        self.groups = []
+        self.slices = []
+        for bounds in partitions:
+            first = len(self.groups)
+            for low, high in bounds:
+                if directory is not None and os.path.exists(pattern_database_path(directory, pegs, high - low)):
+                    database = nibble_pattern_database(pegs, high - low, directory)
+                else:
+                    database = pattern_database(pegs, tuple(goal[low:high]))
+                self.groups.append((pegs ** low, pegs ** (high - low), database))
+            self.slices.append((first, len(self.groups)))
+        # Bit offsets of each partition's groups in a packed distance
+        self.slice_shifts = [[index * self.DISTANCE_BITS for index in range(first, last)]
+                             for first, last in self.slices]
+        # Groups each disk belongs to, one per partition
+        self.disk_groups = [[] for _ in range(self.num_disks)]
+        for bounds, (first, _) in zip(partitions, self.slices):
+            for index, (low, high) in enumerate(bounds, start=first):
+                for disk in range(low, high):
+                    self.disk_groups[disk].append(index)
+
+    def partition(self, from_largest):
+        """Split the disks into consecutive groups, as [low, high) disk ranges"""
+        bounds = []
+        if from_largest:
+            end = self.num_disks
+            while end > 0:
+                bounds.append((max(0, end - self.group_size), end))
+                end = bounds[-1][0]
+        else:
+            start = 0
+            while start < self.num_disks:
+                bounds.append((start, min(self.num_disks, start + self.group_size)))
+                start = bounds[-1][1]
+        return bounds
+
+    def heuristic(self, packed):
+        """Admissible estimate from packed group distances"""
+        mask = (1 << self.DISTANCE_BITS) - 1
+        return max(sum((packed >> shift) & mask for shift in shifts) for shifts in self.slice_shifts)
+
+    def solve(self, start):
+        """
+        Find a shortest move sequence from start to the goal.
+
+        Args:
+            start: Peg index of each disk, smallest first
+
+        Returns:
+            List of (disk, from peg index, to peg index) moves, or None if
+            max_expanded positions were expanded without reaching the goal
+        """
+        result = self.search(start)
+        if result is None:
+            return None
+        rename = self.rename
+        return [(disk, rename[source], rename[target]) for disk, source, target in self.path(result[1])]
+
+    def distance(self, start):
+        """Length of a shortest move sequence from start to the goal, without building it"""
+        result = self.search(start)
+        return None if result is None else result[0]
+
+    def search(self, start):
+        """
+        A* from start.
+
+        Returns:
+            (moves to the goal, node chain of the last move), or None if
+            max_expanded positions were expanded first
+        """
+        if len(start) != self.num_disks:
+            raise ValueError("Start and goal must have the same number of disks")
+        if any(not 0 <= peg < self.pegs for peg in start):
+            raise ValueError(f"Peg indexes must be between 0 and {self.pegs - 1}")
+        pegs = self.pegs
+        bits = self.DISTANCE_BITS
+        mask = (1 << bits) - 1
+        root = pack_state([self.rename[peg] for peg in start], pegs)
+        packed = sum(database.distance(root // scale % states) << (index * bits)
+                     for index, (scale, states, database) in enumerate(self.groups))
+        goal = self.goal_state
+        table = self.table
+        table.clear()
+        table.improve(root, 0)
+        # Entries are (f, -depth, tiebreak, state, packed distances, node); preferring
+        # deeper entries among equal f heads straight for the goal once the heuristic
+        # is exact. A node is (disk, from, to, parent node), or None at the start.
+        counter = itertools.count()
+        frontier = [(self.heuristic(packed), 0, next(counter), root, packed, None)]
+        self.expanded = 0
+        while frontier:
+            _, depth, _, state, packed, node = heapq.heappop(frontier)
+            depth = -depth
+            if state == goal:
+                return depth, node
+            seen = table.get(state)
+            if seen is not None and seen < depth:
+                continue  # Reached more cheaply since this entry was queued
+            if self.max_expanded is not None and self.expanded >= self.max_expanded:
+                return None
+            self.expanded += 1
+            for disk, source, target in position_moves(unpack_state(state, self.num_disks, pegs), pegs):
+                moved = state + (target - source) * pegs ** disk
+                if not table.improve(moved, depth + 1):
+                    continue
+                child = packed
+                for index in self.disk_groups[disk]:
+                    scale, states, database = self.groups[index]
+                    shift = index * bits
+                    old = (packed >> shift) & mask
+                    child += (database.step(old, moved // scale % states) - old) << shift
+                heapq.heappush(frontier, (depth + 1 + self.heuristic(child), -depth - 1, next(counter),
+                                          moved, child, (disk, source, target, node)))
+        raise ValueError("Goal position is not reachable")
+
+    @staticmethod
+    def path(node):
+        """Unwind a node chain into a list of moves"""
+        moves = []
+        while node is not None:
+            moves.append(node[:3])
+            node = node[3]
+        moves.reverse()
+        return moves
+
+def gather_moves(positions, disks, target):
+    """
+    Stream the shortest 3-peg moves bringing disks 0..disks-1 onto one peg.
+
+    Working down from the largest, a disk already on the target stays; any
+    other disk needs the smaller ones out of the way on the third peg first.
+
+    Args:
+        positions: Peg index of each disk, smallest first; updated as moves are made
+        disks: How many of the smallest disks to gather
+        target: Peg index to gather them on
+
+    Yields:
+        (disk, from peg index, to peg index) moves
+    """
+    for disk in reversed(range(disks)):
+        source = positions[disk]
+        if source != target:
+            yield from gather_moves(positions, disk, 3 - source - target)
+            positions[disk] = target
+            yield disk, source, target
+
+def gather_length(positions, disks, target):
+    """Number of moves gather_moves makes, in O(disks) without making them"""
+    length = 0
+    for disk in reversed(range(disks)):
+        if positions[disk] != target:
+            length += 2 ** disk
+            target = 3 - positions[disk] - target
+    return length
+
+def three_peg_plan(start, goal):
+    """
+    Return (largest disk that differs, moves if it moves once, moves if it
+    moves twice) for three_peg_moves, or None if start is the goal.
+    """
+    disk = len(start) - 1
+    while disk >= 0 and start[disk] == goal[disk]:
+        disk -= 1
+    if disk < 0:
+        return None
+    a, b = start[disk], goal[disk]
+    c = 3 - a - b
+    once_length = gather_length(start, disk, c) + 1 + gather_length(goal, disk, c)
+    twice_length = gather_length(start, disk, b) + 2 + (2 ** disk - 1) + gather_length(goal, disk, a)
+    return disk, once_length, twice_length
+
+def three_peg_moves(start, goal):
+    """
+    Return a shortest 3-peg move sequence between any two positions.
+
+    Disks that are already where the goal wants them, from the largest down,
+    never move. The largest disk d that differs goes from peg a to peg b either
+    once, with the smaller disks parked on the third peg, or twice (a to the
+    third peg, then to b) with the smaller disks parked on b and then a; the
+    cheaper of the two is optimal.
+
+    Args:
+        start: Peg index of each disk, smallest first
+        goal: Goal peg index of each disk, smallest first
+
+    Returns:
+        List of (disk, from peg index, to peg index) moves
+    """
+    plan = three_peg_plan(start, goal)
+    if plan is None:
+        return []
+    disk, once_length, twice_length = plan
+    a, b = start[disk], goal[disk]
+    c = 3 - a - b
+
+    def gather(positions, target):
+        return list(gather_moves(list(positions), disk, target))
+
+    def scatter(target):
+        """Moves from the smaller disks all on target to their goal pegs"""
+        return [(d, to, frm) for d, frm, to in reversed(gather(goal, target))]
+
+    if once_length <= twice_length:
+        return gather(start, c) + [(disk, a, b)] + scatter(c)
+    tower = gather([b] * disk, a)
+    return gather(start, b) + [(disk, a, c)] + tower + [(disk, c, b)] + scatter(a)
+
+def position_distance(start, goal, pegs, **options):
+    """
+    Return the length of a shortest move sequence between two positions.
+
+    Three pegs take O(disks) via three_peg_plan; more pegs still search, but
+    the move list is never built.
+    """
+    if pegs == 3:
+        plan = three_peg_plan(list(start), list(goal))
+        return 0 if plan is None else min(plan[1:])
+    return PositionSolver(goal, pegs, **options).distance(start)
+
+def solve_position(start, goal, pegs, **options):
+    """
+    Return a shortest move sequence between two positions.
+
+    Three pegs are solved directly by three_peg_moves, more pegs by search.
+
+    Args:
+        start: Peg index of each disk, smallest first
+        goal: Goal peg index of each disk, smallest first
+        pegs: Number of pegs
+        options: Passed to PositionSolver
+
+    Returns:
+        List of (from peg index, to peg index) moves
+    """
+    if pegs == 3:
+        moves = three_peg_moves(list(start), list(goal))
+    else:
+        moves = PositionSolver(goal, pegs, **options).solve(start)
+    return [(move[1], move[2]) for move in moves]
+
+# --- Pattern databases on disk ---------------------------------------------
+#
+# A file holds the distances of every position of k disks to "all k disks on
+# the last peg", one 4-bit nibble per position (two per byte, even positions in
+# the low half), after an 8-byte header. Renaming pegs maps any single-peg goal
+# onto the last peg, and only the sizes of a group's disks relative to each
+# other matter, so one file serves every group of k disks for that peg count.
+#
+# A nibble keeps the distance mod 16. A move changes a group's distance by at
+# most one, so the exact distance follows from the parent's; the first one is
+# found by walking downhill to the goal.
+
+PDB_FILE_MAGIC = b"HPDB"
+PDB_FILE_VERSION = 1
+PDB_HEADER_SIZE = 8
+
+# Where pdb_tool writes database files and the game looks for them
+PDB_DIRECTORY = "pdb"
+
+def pattern_database_path(directory, pegs, disks):
+    """Path of the database file for groups of `disks` disks on `pegs` pegs"""
+    return os.path.join(directory, f"hanoi-{pegs}p-{disks}d.pdb")
+
+class NibblePatternDatabase:
+    """
+    Distances mod 16 from every position of a group of disks to all of them on the last peg.
+
+    Built by breadth-first search in memory, or memory-mapped from a file
+    written by save(), so several processes share one copy of a large database.
+    """
+
+    def __init__(self, pegs, disks, data, offset=0, mapping=None):
+        """
+        Args:
+            pegs: Number of pegs
+            disks: Disks in the group
+            data: Nibble array (bytes-like or mmap)
+            offset: Byte offset of the nibbles in data
+            mapping: Open mmap to close with the database, if any
+        """
+        self.pegs = pegs
+        self.disks = disks
+        self.states = pegs ** disks
+        self.goal = self.states - 1  # Every digit is the last peg
+        self.data = data
+        self.offset = offset
+        self.mapping = mapping
+
+    @classmethod
+    def build(cls, pegs, disks):
+        """Breadth-first search outward from the goal; moves are reversible"""
+        states = pegs ** disks
+        data = bytearray((states + 1) // 2)
+        seen = bytearray(states)
+        powers = [pegs ** disk for disk in range(disks)]
+        goal = states - 1
+        seen[goal] = 1
+        frontier = [goal]
+        depth = 0
+        while frontier:
+            depth += 1
+            nibble = depth % 16
+            next_frontier = []
+            for state in frontier:
+                # Top disk of each peg, smallest first
+                tops = [None] * pegs
+                rest = state
+                for disk in range(disks):
+                    rest, peg = divmod(rest, pegs)
+                    if tops[peg] is None:
+                        tops[peg] = disk
+                for source, disk in enumerate(tops):
+                    if disk is None:
+                        continue
+                    for target in range(pegs):
+                        if target != source and (tops[target] is None or tops[target] > disk):
+                            moved = state + (target - source) * powers[disk]
+                            if not seen[moved]:
+                                seen[moved] = 1
+                                data[moved >> 1] |= nibble << ((moved & 1) << 2)
+                                next_frontier.append(moved)
+            frontier = next_frontier
+        return cls(pegs, disks, data)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a database file written by save()"""
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = mapping[:PDB_HEADER_SIZE]
+        if len(header) < PDB_HEADER_SIZE or header[:4] != PDB_FILE_MAGIC or header[4] != PDB_FILE_VERSION:
+            mapping.close()
+            raise ValueError(f"{path} is not a pattern database file")
+        database = cls(header[5], header[6], mapping, PDB_HEADER_SIZE, mapping)
+        if len(mapping) != PDB_HEADER_SIZE + (database.states + 1) // 2:
+            mapping.close()
+            raise ValueError(f"{path} is truncated")
+        return database
+
+    def save(self, path):
+        """Write the database in the format open() maps"""
+        with open(path, "wb") as f:
+            f.write(PDB_FILE_MAGIC + bytes([PDB_FILE_VERSION, self.pegs, self.disks, 0]))
+            f.write(self.data[self.offset:self.offset + (self.states + 1) // 2])
+
+    def close(self):
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+
+    def nibble(self, index):
+        """Distance mod 16 of a packed group position"""
+        return (self.data[self.offset + (index >> 1)] >> ((index & 1) << 2)) & 15
+
+    def step(self, distance, index):
+        """Exact distance of index, given the exact distance of a position one move away"""
+        return distance + (self.nibble(index) - distance + 1) % 16 - 1
+
+    def distance(self, index):
+        """Exact distance of a packed group position, by walking downhill to the goal"""
+        distance = 0
+        while index != self.goal:
+            below = (self.nibble(index) - 1) % 16
+            positions = unpack_state(index, self.disks, self.pegs)
+            for disk, source, target in position_moves(positions, self.pegs):
+                moved = index + (target - source) * self.pegs ** disk
+                if self.nibble(moved) == below:
+                    index = moved
+                    break
+            distance += 1
+        return distance
+
+@lru_cache(maxsize=16)
+def nibble_pattern_database(pegs, disks, directory=None):
+    """Map the database file from directory if there is one, else build it in memory"""
+    if directory is not None:
+        path = pattern_database_path(directory, pegs, disks)
+        if os.path.exists(path):
+            return NibblePatternDatabase.open(path)
+    return NibblePatternDatabase.build(pegs, disks)
+
+def stored_group_size(directory, pegs, num_disks):
+    """Largest group size with a database file in directory, at most num_disks (0 if none)"""
+    for disks in reversed(range(1, num_disks + 1)):
+        if directory is not None and os.path.exists(pattern_database_path(directory, pegs, disks)):
+            return disks
+    return 0
@@ -1,16 +1,26 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox, ttk
+import argparse
+import sys
 import threading
-import time
-import random
-import pygame
-from hanoi_algorithms import recursive_hanoi, iterative_hanoi, frame_stewart
-from ui import HanoiCanvas, CustomDialog, ModernDialog
-from database import Database
+from hanoi_algorithms import MIN_PEGS, MAX_PEGS
+from game_engine import (GameEngine, GameReplay, SessionRandom, time_algorithms, layout_positions,
+                         parse_position, max_search_disks, LAYOUTS, MOVE, WON, LOST)
+from ui import HanoiCanvas, CustomDialog, ModernDialog, AlgorithmComparisonChart, PagedTreeview, ReplayViewer
+from database import Database, ResultWriter, save_unwritten
+from audio import SoundManager
 
 
 class TowerOfHanoiGame:
-    def __init__(self, root):
+    def __init__(self, root, seed=None, disks=None, pegs=None, layout="classic"):
+        """
+        Args:
+            root: Tk root window
+            seed: Session seed; the same seed replays the same sequence of games
+            disks: Disk count for every game instead of a random one
+            pegs: Peg count for every game instead of asking
+            layout: Starting layout, one of game_engine.LAYOUTS
+        """
         self.root = root
         self.root.title("\U0001F9E0 Tower Of Hanoi – Interactive Puzzle Game")
         self.root.geometry("950x700")
@@ -30,30 +40,34 @@ class TowerOfHanoiGame:
         style.configure('Header.TLabel', font=('Arial', 18, 'bold'), background='#f5f5f7', foreground='#2a66c8')
         
         self.db = Database()
+        self.result_writer = ResultWriter(self.db).start()
         self.username = ""
         self.num_pegs = 3
         self.num_disks = 0
-        self.pegs = {}
+        self.engine = None
         self.selected_peg = None
         self.user_move_count = 0
         self.user_move_sequence = ""
-        self.actual_move_sequence = []
-        self.actual_move_counter = 0
-        self.solution_path = []
-        self.current_hint_index = 0
         self.canvas = None
-        self.start_time = None
         self.timer_label = None
         self.timer_running = False
         self.is_game_active = False
         self.algorithm_times = {}
         self.auto_play_sequence = None
-        self.min_moves = 0
-        self.animation_in_progress = False
 
-        pygame.mixer.init()
+        self.session_random = SessionRandom(seed)
+        self.pinned_disks = disks
+        self.pinned_pegs = pegs
+        self.layout = layout
+        print(f"Session seed: {self.session_random.seed}", file=sys.stderr)
+
+        self.sound = SoundManager()
         self.setup_ui()
 
+        # Load audio in the background once the first frame has been drawn
+        self.root.after_idle(self.sound.start_async)
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+
     def setup_ui(self):
         # Create a header frame
         header_frame = ttk.Frame(self.root, padding="10")
@@ -84,7 +98,9 @@ class TowerOfHanoiGame:
         canvas_frame = tk.Frame(main_frame, bg="white", relief=tk.RIDGE, bd=2)
         canvas_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
-        self.canvas = HanoiCanvas(canvas_frame, self.handle_peg_click)
+        self.canvas = HanoiCanvas(canvas_frame, self.handle_peg_click,
+                                  background_rng=self.session_random.stream("background"),
+                                  effects_rng=self.session_random.stream("effects"))
 
         # Control buttons frame
         control_frame = ttk.Frame(main_frame)
@@ -134,12 +150,20 @@ class TowerOfHanoiGame:
                                padx=15, pady=5)
         compare_btn.pack(side=tk.LEFT, padx=5)
 
+        replay_btn = tk.Button(btn_frame2, text="🎬 Replay", 
+                               command=self.show_replay, 
+                               bg="#607D8B", fg="white",
+                               font=("Arial", 11), 
+                               relief=tk.RAISED,
+                               padx=15, pady=5)
+        replay_btn.pack(side=tk.LEFT, padx=5)
+
         # Quit button in a separate frame
         quit_frame = ttk.Frame(control_frame)
         quit_frame.pack(side=tk.RIGHT)
         
         quit_btn = tk.Button(quit_frame, text="❌ Quit", 
-                            command=self.root.quit, 
+                            command=self.quit, 
                             bg="#F44336", fg="white",
                             font=("Arial", 11), 
                             relief=tk.RAISED,
@@ -160,10 +184,9 @@ class TowerOfHanoiGame:
         try:
             self.stop_timer()
             self.is_game_active = False
-            self.actual_move_sequence = []
-            self.actual_move_counter = 0
-            self.solution_path = []
-            self.current_hint_index = 0
+            if self.engine is not None:
+                self.engine.listeners.clear()
+            self.engine = None
             self.auto_play_sequence = None
 
             if not self.username:
@@ -171,34 +194,34 @@ class TowerOfHanoiGame:
                 if not self.username:
                     return
 
-            peg_choice = self.get_valid_peg_count()
+            peg_choice = self.pinned_pegs or self.get_valid_peg_count()
             if not peg_choice:
                 return
 
             self.num_pegs = peg_choice
-            self.num_disks = random.randint(5, 10)
+            self.num_disks = self.pinned_disks or self.session_random.disk_count()
+            if self.layout != "classic":
+                # Other layouts are solved by search, which is only quick for so many disks
+                self.num_disks = min(self.num_disks, max_search_disks(self.num_pegs, self.layout))
+            start, goal = layout_positions(self.layout, self.num_disks, self.num_pegs,
+                                           self.session_random.stream("setup"))
 
-            self.pegs = {}
-            for i in range(self.num_pegs):
-                peg_label = chr(65 + i)
-                self.pegs[peg_label] = list(reversed(range(1, self.num_disks + 1))) if peg_label == 'A' else []
+            self.engine = engine = GameEngine(self.num_disks, self.num_pegs, start=start, goal=goal)
+            engine.subscribe(self.on_game_event)
+            self.canvas.draw(engine.pegs)
 
-            self.canvas.draw(self.pegs)
-            self.min_moves = self.get_min_moves(self.num_disks, self.num_pegs)
+            # Updated styling for the game information display
+            self.info_label.config(text=f"Game with {self.num_disks} disks on {self.num_pegs} pegs • Min moves: {engine.min_moves} • Seed: {self.session_random.seed}")
 
-            if self.num_pegs == 3:
-                self.solution_path = recursive_hanoi(self.num_disks, 'A', chr(65 + self.num_pegs - 1), 'B')
+            if engine.is_classic_layout:
+                objective = f"Move all {self.num_disks} disks from Peg A to Peg {engine.target}."
             else:
-                pegs_list = [chr(65 + i) for i in range(4)]
-                self.solution_path = frame_stewart(self.num_disks, pegs_list, 'A', 'D')
+                objective = f"Rearrange the disks into this position:\n{self.describe_pegs(engine.goal_pegs)}"
 
-            # Updated styling for the game information display
-            self.info_label.config(text=f"Game with {self.num_disks} disks on {self.num_pegs} pegs • Min moves: {self.min_moves}")
-            
             # Custom dialog box with enhanced styling
             messagebox.showinfo("Game Started", 
-                               f"Move all {self.num_disks} disks from Peg A to Peg {chr(65 + self.num_pegs - 1)}.\n\n"
-                               f"Minimum moves needed: {self.min_moves}\n\n"
+                               f"{objective}\n\n"
+                               f"Minimum moves needed: {engine.min_moves}\n\n"
                                f"Rules:\n"
                                f"1. Move only one disk at a time\n"
                                f"2. A larger disk cannot be placed on a smaller disk")
@@ -207,9 +230,10 @@ class TowerOfHanoiGame:
             
             # Check if the user provided a sequence and if it's valid
             if self.user_move_sequence and self.validate_move_sequence(self.user_move_sequence) is True:
-                self.auto_play_sequence = [tuple(move.strip().split('->')) for move in self.user_move_sequence.split(',')]
+                self.auto_play_sequence = engine.parse_sequence(self.user_move_sequence)
             
-            self.start_time = time.time()
+            # The clock starts once the predictions have been entered
+            engine.start()
             self.timer_running = True
             self.is_game_active = True
             self.update_timer()
@@ -221,6 +245,11 @@ class TowerOfHanoiGame:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    @staticmethod
+    def describe_pegs(pegs):
+        """One line per peg listing its disks bottom to top, e.g. C: 5 3 1"""
+        return "\n".join(f"{name}: {' '.join(map(str, disks)) or '-'}" for name, disks in pegs.items())
+
     def auto_play_next_move(self):
         """Process the next move in the auto-play sequence instantly (no animation)"""
         if not self.auto_play_sequence or not self.is_game_active:
@@ -228,77 +257,40 @@ class TowerOfHanoiGame:
 
         source, target = self.auto_play_sequence.pop(0)
 
-        if not self.pegs[source]:
-            messagebox.showwarning("Invalid Move", f"Invalid move: {source}->{target}, source peg is empty")
+        # Moves, wins and losses are drawn by on_game_event
+        engine = self.engine
+        if not engine.apply_move(source, target):
+            messagebox.showwarning("Invalid Move", f"Invalid move: {source}->{target}, {engine.last_error}")
             self.selected_peg = None
             self.auto_play_sequence = None
             return
 
-        if self.pegs[target] and self.pegs[source][-1] > self.pegs[target][-1]:
-            messagebox.showwarning("Invalid Move", f"Invalid move: {source}->{target}, larger disk on smaller disk")
-            self.selected_peg = None
-            self.auto_play_sequence = None
-            return
-
-        # Directly move the disk (no animation)
-        disk = self.pegs[source].pop()
-        self.pegs[target].append(disk)
-
-        self.actual_move_sequence.append(f"{source}->{target}")
-        self.actual_move_counter += 1
-
-        self.canvas.draw(self.pegs)
-        self.play_sound("sounds/move.wav")
-
-        if self.check_win():
-            if self.actual_move_counter <= self.min_moves:
-                self.game_won()
-            else:
-                self.show_loss_message()
-            return
-
-        if self.auto_play_sequence:
+        # A loss may already have started a new game from its dialog
+        if self.auto_play_sequence and engine is self.engine and engine.is_active:
             self.root.after(500, self.auto_play_next_move)
 
-
-    def finish_auto_play_move(self, disk, target):
-        """Complete the auto-play move after animation"""
-        self.pegs[target].append(disk)
-        self.actual_move_sequence.append(f"{self.selected_peg}->{target}")
-        self.actual_move_counter += 1
-        self.canvas.unhighlight_peg(self.selected_peg)
-        self.selected_peg = None
-        self.canvas.draw(self.pegs)
-        self.play_sound("sounds/move.wav")
-        self.animation_in_progress = False
-        
-        # Check if the game is won
-        if self.check_win():
-            if self.actual_move_counter <= self.min_moves:
-                self.game_won()
-            else:
-                self.show_loss_message()
-            return
-            
-        # Continue with next move after a delay
-        if self.auto_play_sequence:
-            self.root.after(500, self.auto_play_next_move)
+    def on_game_event(self, event, data):
+        """Reflect engine events in the window"""
+        if event == MOVE:
+            self.canvas.draw(self.engine.pegs)
+            self.play_sound("move")
+        elif event == WON:
+            self.game_won()
+        elif event == LOST:
+            self.show_loss_message()
 
     def show_hint(self):
         if not self.is_game_active:
             messagebox.showinfo("Hint", "Start a game first to get hints!")
             return
             
-        if self.current_hint_index < len(self.solution_path):
-            move = self.solution_path[self.current_hint_index]
-            
+        move = self.engine.next_hint()
+        if move is not None:
             # Show hint with improved styling
             hint_dialog = ModernDialog(self.root, 
                                       title="Hint",
                                       message=f"Try this move: {move[0]} → {move[1]}",
                                       icon="💡")
-            
-            self.current_hint_index += 1
         else:
             messagebox.showinfo("Hint", "No more hints available!")
 
@@ -308,7 +300,7 @@ class TowerOfHanoiGame:
         
         # Enhanced loss message
         result = messagebox.showwarning("Game Over", 
-                                       f"You used {self.actual_move_counter} moves, but the minimum is {self.min_moves}.\n\nWould you like to try again?",
+                                       f"You used {self.engine.move_count} moves, but the minimum is {self.engine.min_moves}.\n\nWould you like to try again?",
                                        type=messagebox.YESNO)
         
         if result == 'yes':
@@ -320,51 +312,19 @@ class TowerOfHanoiGame:
             return
 
         if self.selected_peg is None:
-            if self.pegs[peg_name]:
+            if self.engine.pegs[peg_name]:
                 self.selected_peg = peg_name
                 self.canvas.highlight_peg(peg_name)
             else:
-                self.play_sound("sounds/error.wav")
+                self.play_sound("error")
         else:
             if self.selected_peg != peg_name:
-                if not self.pegs[peg_name] or self.pegs[self.selected_peg][-1] < self.pegs[peg_name][-1]:
-                    disk = self.pegs[self.selected_peg].pop()
-                    self.pegs[peg_name].append(disk)
-                    self.actual_move_sequence.append(f"{self.selected_peg}->{peg_name}")
-                    self.actual_move_counter += 1
-                    self.canvas.draw(self.pegs)
-                    self.play_sound("sounds/move.wav")
-                    if self.check_win():
-                        if self.actual_move_counter <= self.min_moves:
-                            self.game_won()
-                        else:
-                            self.show_loss_message()
-                else:
+                if not self.engine.apply_move(self.selected_peg, peg_name):
                     messagebox.showwarning("Invalid Move", "Cannot place larger disk on smaller disk.")
-                    self.play_sound("sounds/error.wav")
+                    self.play_sound("error")
             self.canvas.unhighlight_peg(self.selected_peg)
             self.selected_peg = None
 
-
-    def finish_manual_move(self, disk, target_peg, source_peg):
-        """Complete manual move after animation"""
-        self.pegs[target_peg].append(disk)
-        self.actual_move_sequence.append(f"{source_peg}->{target_peg}")
-        self.actual_move_counter += 1
-        self.canvas.draw(self.pegs)
-        self.play_sound("sounds/move.wav")
-        
-        # Check win condition
-        if self.check_win():
-            if self.actual_move_counter <= self.min_moves:
-                self.game_won()
-            else:
-                self.show_loss_message()
-        
-        self.canvas.unhighlight_peg(self.selected_peg)
-        self.selected_peg = None
-        self.animation_in_progress = False
-
     def get_valid_username(self):
         """Get valid username with improved dialog"""
         dialog = ModernDialog(self.root, 
@@ -391,7 +351,7 @@ class TowerOfHanoiGame:
         """Get valid peg count with improved dialog"""
         dialog = ModernDialog(self.root, 
                             title="Game Setup",
-                            message="Enter number of pegs (3 or 4):",
+                            message=f"Enter number of pegs ({MIN_PEGS} to {MAX_PEGS}):",
                             icon="🔢",
                             is_input=True,
                             input_type="number")
@@ -401,8 +361,8 @@ class TowerOfHanoiGame:
             
         try:
             peg_choice = int(dialog.result)
-            if peg_choice not in [3, 4]:
-                messagebox.showerror("Invalid Input", "Only 3 or 4 pegs allowed.")
+            if not MIN_PEGS <= peg_choice <= MAX_PEGS:
+                messagebox.showerror("Invalid Input", f"Only {MIN_PEGS} to {MAX_PEGS} pegs allowed.")
                 return self.get_valid_peg_count()
             return peg_choice
         except ValueError:
@@ -440,38 +400,13 @@ class TowerOfHanoiGame:
         self.user_move_sequence = dialog.result if dialog.result else ""
 
     def validate_move_sequence(self, sequence):
-        if not sequence:
-            return True
-        moves = sequence.split(',')
-        for move in moves:
-            move = move.strip()
-            if not move:
-                return "Move sequence contains empty moves"
-            parts = move.split('->')
-            if len(parts) != 2:
-                return f"Invalid move format: {move}. Use format 'A->B'"
-            source, target = parts[0].strip(), parts[1].strip()
-            if source not in self.pegs or target not in self.pegs:
-                return f"Invalid peg '{source}' or '{target}'"
-            if source == target:
-                return f"Invalid move {move}: same source and target"
-        return True
-
-    def get_min_moves(self, n, pegs):
-        if pegs == 3:
-            return 2 ** n - 1
-        else:
-            return min([2 * self.get_min_moves(k, pegs) + 2 ** (n - k) - 1 for k in range(1, n)]) if n > 1 else 1
-
-    def check_win(self):
-        target_peg = chr(65 + self.num_pegs - 1)
-        return len(self.pegs[target_peg]) == self.num_disks
+        return self.engine.validate_sequence(sequence)
 
     def game_won(self):
         self.stop_timer()
         self.is_game_active = False
-        self.play_sound("sounds/win.wav")
-        elapsed_time = int(time.time() - self.start_time)
+        self.play_sound("win")
+        elapsed_time = int(self.engine.elapsed())
         
         # Show victory animation
         self.canvas.show_victory_animation()
@@ -482,97 +417,64 @@ class TowerOfHanoiGame:
                                f"Your sequence of moves successfully solved the puzzle!\n\n"
                                f"⏱️ Time: {elapsed_time} seconds\n"
                                f"🔢 Predicted moves: {self.user_move_count}\n"
-                               f"🎮 Actual moves: {self.actual_move_counter}\n"
-                               f"✅ Minimum moves: {self.min_moves}")
+                               f"🎮 Actual moves: {self.engine.move_count}\n"
+                               f"✅ Minimum moves: {self.engine.min_moves}")
         else:
             messagebox.showinfo("🎉 Congratulations! 🎉", 
                                f"You solved the puzzle!\n\n"
                                f"⏱️ Time: {elapsed_time} seconds\n"
-                               f"✅ Minimum moves: {self.min_moves}\n"
-                               f"🎮 Your moves: {self.actual_move_counter}")
+                               f"✅ Minimum moves: {self.engine.min_moves}\n"
+                               f"🎮 Your moves: {self.engine.move_count}")
         
-        threading.Thread(target=self.run_algorithms, args=(elapsed_time,)).start()
+        threading.Thread(target=self.run_algorithms, args=(self.engine,)).start()
 
-    def validate_user_solution(self):
-        if not self.user_move_sequence:
-            return False, []
-        if self.num_pegs == 3:
-            correct_moves = recursive_hanoi(self.num_disks, 'A', chr(65 + self.num_pegs - 1), 'B')
-        else:
-            pegs_list = [chr(65 + i) for i in range(4)]
-            correct_moves = frame_stewart(self.num_disks, pegs_list, 'A', 'D')
-        try:
-            user_sequence = [tuple(move.strip().split("->")) for move in self.user_move_sequence.split(",")]
-        except Exception:
-            return False, []
-        is_correct = (len(user_sequence) == self.min_moves) and all(u == c for u, c in zip(user_sequence, correct_moves))
-        return is_correct, user_sequence
+    def run_algorithms(self, engine):
+        self.algorithm_times, efficiency_note = time_algorithms(engine.num_disks, engine.num_pegs)
 
-    def run_algorithms(self, elapsed_time):
-        self.algorithm_times = {}
-        start = time.time()
-        recursive_moves = recursive_hanoi(self.num_disks, 'A', chr(65 + self.num_pegs - 1), 'B')
-        self.algorithm_times['recursive'] = time.time() - start
-
-        start = time.time()
-        iterative_moves = iterative_hanoi(self.num_disks, 'A', chr(65 + self.num_pegs - 1), 'B')
-        self.algorithm_times['iterative'] = time.time() - start
-
-        if self.num_pegs == 4:
-            start = time.time()
-            pegs_list = [chr(65 + i) for i in range(4)]
-            frame_stewart_moves = frame_stewart(self.num_disks, pegs_list, 'A', 'D')
-            self.algorithm_times['frame_stewart'] = time.time() - start
-            if len(recursive_moves) > len(frame_stewart_moves):
-                efficiency_note = f"4-peg solution is more efficient ({len(frame_stewart_moves)} vs {len(recursive_moves)})"
-            else:
-                efficiency_note = f"3-peg solution matches 4-peg efficiency ({len(recursive_moves)} moves)"
-        else:
-            self.algorithm_times['frame_stewart'] = None
-            efficiency_note = "3-peg solution used"
-
-        is_correct, parsed_moves = self.validate_user_solution()
-        user_moves_str = ','.join([f"{a}->{b}" for a, b in parsed_moves]) if parsed_moves else ""
-        actual_moves_str = ','.join(self.actual_move_sequence)
-
-        # Save result with min_moves included
-        self.db.save_result(
-            self.username, self.num_disks, self.num_pegs,
-            True, self.algorithm_times, elapsed_time,
-            user_moves_str, is_correct,
-            efficiency_note,
-            actual_moves=actual_moves_str,
-            min_moves=self.min_moves
-        )
+        # Queue the result; the writer thread commits it without holding up the chart
+        self.result_writer.submit(engine.result_record(
+            self.username, self.user_move_sequence, self.algorithm_times, efficiency_note
+        ))
 
         self.show_algorithm_comparison()
 
+    def quit(self):
+        """Flush pending results and audio, then leave the main loop"""
+        unwritten = self.result_writer.close()
+        if unwritten:
+            try:
+                path = save_unwritten(unwritten)
+            except OSError as e:
+                print(f"Error saving unwritten results: {e}")
+            else:
+                messagebox.showwarning("Results Not Saved",
+                                       f"{len(unwritten)} game results could not be saved to the database "
+                                       f"({self.result_writer.last_error}).\nThey were kept in {path}.")
+        self.sound.stop()
+        self.root.quit()
+
     def update_timer(self):
-        if self.timer_running and self.start_time:
-            elapsed = int(time.time() - self.start_time)
+        if self.timer_running and self.engine is not None:
+            elapsed = int(self.engine.elapsed())
             self.timer_label.config(text=f"⏱️ Time: {elapsed}s")
             self.root.after(1000, self.update_timer)
 
     def stop_timer(self):
         self.timer_running = False
 
-    def play_sound(self, filename):
-        try:
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
-        except Exception as e:
-            print(f"Error playing sound: {e}")
+    def play_sound(self, name):
+        self.sound.play(name)
 
     def show_leaderboard(self):
-        top_scores = self.db.get_top_scores()
-        if not top_scores:
+        first_page, _ = self.db.get_leaderboard_page(limit=1)
+        if not first_page:
             messagebox.showinfo("Leaderboard", "No scores recorded yet!")
             return
             
         # Create a custom leaderboard window
         leaderboard_window = tk.Toplevel(self.root)
         leaderboard_window.title("🏆 Leaderboard 🏆")
-        leaderboard_window.geometry("500x400")
+        leaderboard_window.geometry("620x480")
         leaderboard_window.configure(bg="#f0f0f0")
         
         # Create a header
@@ -582,38 +484,78 @@ class TowerOfHanoiGame:
         header_label = tk.Label(header_frame, text="🏆 TOWER OF HANOI LEADERBOARD 🏆", 
                                font=("Arial", 16, "bold"), bg="#4285f4", fg="white")
         header_label.pack()
-        
-        # Create the leaderboard table
-        table_frame = tk.Frame(leaderboard_window, bg="white", padx=15, pady=15)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
-        # Table header
-        header_bg = "#e0e0e0"
-        tk.Label(table_frame, text="Rank", font=("Arial", 12, "bold"), bg=header_bg, width=5).grid(row=0, column=0, sticky="ew", padx=5, pady=5)
-        tk.Label(table_frame, text="Player", font=("Arial", 12, "bold"), bg=header_bg, width=15).grid(row=0, column=1, sticky="ew", padx=5, pady=5)
-        tk.Label(table_frame, text="Time", font=("Arial", 12, "bold"), bg=header_bg, width=8).grid(row=0, column=2, sticky="ew", padx=5, pady=5)
-        tk.Label(table_frame, text="Disks", font=("Arial", 12, "bold"), bg=header_bg, width=5).grid(row=0, column=3, sticky="ew", padx=5, pady=5)
-        tk.Label(table_frame, text="Pegs", font=("Arial", 12, "bold"), bg=header_bg, width=5).grid(row=0, column=4, sticky="ew", padx=5, pady=5)
-        
-        # Table data
-        for idx, (username, time_taken, disks, pegs) in enumerate(top_scores, start=1):
-            # Alternating row colors
-            row_bg = "#f9f9f9" if idx % 2 == 0 else "white"
-            
-            # Add medal emoji for top 3
-            rank_text = f"{idx}"
-            if idx == 1:
-                rank_text = "🥇"
-            elif idx == 2:
-                rank_text = "🥈"
-            elif idx == 3:
-                rank_text = "🥉"
-                
-            tk.Label(table_frame, text=rank_text, font=("Arial", 12), bg=row_bg).grid(row=idx, column=0, sticky="ew", padx=5, pady=5)
-            tk.Label(table_frame, text=username, font=("Arial", 12), bg=row_bg).grid(row=idx, column=1, sticky="w", padx=5, pady=5)
-            tk.Label(table_frame, text=f"{time_taken}s", font=("Arial", 12), bg=row_bg).grid(row=idx, column=2, sticky="ew", padx=5, pady=5)
-            tk.Label(table_frame, text=str(disks), font=("Arial", 12), bg=row_bg).grid(row=idx, column=3, sticky="ew", padx=5, pady=5)
-            tk.Label(table_frame, text=str(pegs), font=("Arial", 12), bg=row_bg).grid(row=idx, column=4, sticky="ew", padx=5, pady=5)
+
+        # Filters: view (fastest times or game history), disks, pegs and player
+        filter_frame = tk.Frame(leaderboard_window, bg="#f0f0f0", padx=20, pady=10)
+        filter_frame.pack(fill=tk.X)
+
+        view_var = tk.StringVar(value="leaderboard")
+        disks_var = tk.StringVar()
+        pegs_var = tk.StringVar()
+        user_var = tk.StringVar()
+
+        for text, value in (("Fastest", "leaderboard"), ("History", "history")):
+            tk.Radiobutton(filter_frame, text=text, variable=view_var, value=value,
+                           bg="#f0f0f0", font=("Arial", 10)).pack(side=tk.LEFT)
+        for label, var, width in (("Disks", disks_var, 4), ("Pegs", pegs_var, 4), ("Player", user_var, 12)):
+            tk.Label(filter_frame, text=label, bg="#f0f0f0", font=("Arial", 10)).pack(side=tk.LEFT, padx=(10, 2))
+            tk.Entry(filter_frame, textvariable=var, width=width).pack(side=tk.LEFT)
+
+        def filters():
+            def number(var):
+                value = var.get().strip()
+                return int(value) if value.isdigit() else None
+            return dict(disks=number(disks_var), pegs=number(pegs_var),
+                        user=user_var.get().strip() or None)
+
+        def fetch_page(cursor, limit):
+            if view_var.get() == "history":
+                return self.db.get_history_page(before=cursor, limit=limit, **filters())
+            return self.db.get_leaderboard_page(after=cursor, limit=limit, **filters())
+
+        def format_row(row, position):
+            if view_var.get() == "history":
+                rank_text = row['created_at']
+                time_text = f"{row['user_time']}s" if row['completed'] else "gave up"
+            else:
+                # Add medal emoji for top 3
+                rank_text = {1: "🥇", 2: "🥈", 3: "🥉"}.get(position, str(position))
+                time_text = f"{row['user_time']}s"
+            return (rank_text, row['name'], time_text, row['disks'], row['pegs'])
+
+        # A filtered player's record, kept per peg count since times on
+        # different peg counts are not comparable
+        player_stats_label = tk.Label(leaderboard_window, text="", bg="#f0f0f0", fg="#555",
+                                      font=("Arial", 10), justify=tk.LEFT, anchor="w")
+        player_stats_label.pack(fill=tk.X, padx=20)
+
+        def apply_filters():
+            user = filters()['user']
+            lines = []
+            if user:
+                for row in self.db.get_user_peg_stats(user):
+                    average = "-" if row['avg_time'] is None else f"{row['avg_time']:.1f}s"
+                    best = "-" if row['best_time'] is None else f"{row['best_time']}s"
+                    lines.append(f"{row['pegs']} pegs: {row['games_played']} games, average {average}, "
+                                 f"best {best}, {row['correct_predictions']} correct predictions")
+                lines = lines or [f"{user} has no completed games"]
+            player_stats_label.config(text="\n".join(lines))
+            table.reset()
+
+        # The table only ever holds the rows of the visible page
+        table = PagedTreeview(
+            leaderboard_window,
+            [("rank", "Rank / Played", 140), ("player", "Player", 150), ("time", "Time", 80),
+             ("disks", "Disks", 60), ("pegs", "Pegs", 60)],
+            fetch_page, format_row,
+            on_activate=lambda row: self.show_saved_replay(row['id'])
+        )
+        table.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
+
+        view_var.trace_add("write", lambda *args: table.reset())
+        tk.Button(filter_frame, text="Apply", command=apply_filters,
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=(10, 0))
+        table.reset()
         
         # Close button
         btn_frame = tk.Frame(leaderboard_window, bg="#f0f0f0", pady=10)
@@ -623,99 +565,80 @@ class TowerOfHanoiGame:
                              bg="#f44336", fg="white", font=("Arial", 11), padx=15, pady=5)
         close_btn.pack()
 
+    def show_replay(self):
+        """Replay the current or last game from its recorded events"""
+        if self.engine is None or not self.engine.events:
+            messagebox.showinfo("Replay", "Play a game first, or double-click a game in the leaderboard!")
+            return
+        replay = GameReplay(self.engine.num_disks, self.engine.num_pegs, self.engine.events,
+                            start=self.engine.start_position)
+        ReplayViewer(self.root, replay, title=f"Replay: {self.username}")
+
+    def show_saved_replay(self, game_id):
+        """Replay a game stored in the database"""
+        saved = self.db.get_game_replay(game_id)
+        if not saved or not saved['events']:
+            messagebox.showinfo("Replay", "No moves were recorded for this game.")
+            return
+        start = parse_position(saved['start_position']) if saved['start_position'] else None
+        try:
+            replay = GameReplay(saved['disks'], saved['pegs'], saved['events'], start=start)
+        except ValueError as e:
+            messagebox.showerror("Replay", f"This game cannot be replayed: {e}")
+            return
+        ReplayViewer(self.root, replay, title=f"Replay: {saved['name']}")
+
     def show_algorithm_comparison(self):
         if not self.algorithm_times:
             messagebox.showinfo("Algorithm Comparison", "No algorithm data available yet!")
             return
-        
-            # Create a custom algorithm comparison window
-        comparison_window = tk.Toplevel(self.root)
-        comparison_window.title("📊 Algorithm Performance Comparison")
-        comparison_window.geometry("650x500")
-        comparison_window.configure(bg="#f5f5f7")
-    
-        # Create a header
-        header_frame = tk.Frame(comparison_window, bg="#4285f4", padx=10, pady=10)
-        header_frame.pack(fill=tk.X)
-    
-        header_label = tk.Label(header_frame, text="⏱️ ALGORITHM PERFORMANCE ANALYSIS ⏱️", 
-                           font=("Arial", 16, "bold"), bg="#4285f4", fg="white")
-        header_label.pack()
-    
-        # Create the comparison content frame
-        content_frame = tk.Frame(comparison_window, bg="white", padx=20, pady=20)
-        content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-    
-        # Add test info
-        info_text = f"Test configuration: {self.num_disks} disks on {self.num_pegs} pegs"
-        tk.Label(content_frame, text=info_text, font=("Arial", 12, "bold"), 
-            bg="white").pack(pady=(0, 15))
-    
-        # Results frame
-        results_frame = tk.Frame(content_frame, bg="white")
-        results_frame.pack(fill=tk.X, pady=10)
-    
-        # Algorithm results with visual indicators
-        algorithms = [
-        ("Recursive Algorithm", self.algorithm_times['recursive'], "#4CAF50"),
-        ("Iterative Algorithm", self.algorithm_times['iterative'], "#2196F3")
-    ]
-    
-        if self.algorithm_times['frame_stewart'] is not None:
-            algorithms.append(("Frame-Stewart Algorithm", self.algorithm_times['frame_stewart'], "#9C27B0"))
-    
-        # Find the fastest algorithm
-        fastest_time = min([time for _, time, _ in algorithms if time is not None])
-    
-        for algo_name, time, color in algorithms:
-            algo_frame = tk.Frame(results_frame, bg="white", pady=10)
-            algo_frame.pack(fill=tk.X)
-        
-        # Add a visual speed indicator
-        indicator_width = int(400 * (fastest_time / time)) if time > 0 else 400
-        indicator = tk.Frame(algo_frame, bg=color, width=indicator_width, height=15)
-        indicator.pack(side=tk.LEFT, padx=10)
-        
-        # Add time text
-        time_text = f"{algo_name}: {time:.6f} seconds"
-        if time == fastest_time:
-            time_text += " (Fastest! ⚡)"
-        
-        tk.Label(algo_frame, text=time_text, font=("Arial", 11), 
-                bg="white", anchor="w").pack(side=tk.LEFT, padx=5)
-    
-        # Add average stats if available
-        stats = self.db.get_algorithm_stats()
-        if stats:
-            separator = ttk.Separator(content_frame, orient='horizontal')
-            separator.pack(fill=tk.X, pady=15)
-        
-            tk.Label(content_frame, text="Average Performance (All Games)", 
-                font=("Arial", 12, "bold"), bg="white").pack(pady=(5, 10))
-            
-            for alg, avg_time in stats.items():
-                stat_text = f"{alg}: {avg_time:.6f} seconds"
-                tk.Label(content_frame, text=stat_text, font=("Arial", 11), 
-                    bg="white").pack(anchor="w", pady=2)
-    
-        # User performance frame
-        user_frame = tk.Frame(content_frame, bg="#f9f9f9", padx=15, pady=15)
-        user_frame.pack(fill=tk.X, pady=(20, 10))
-    
-        user_label = tk.Label(user_frame, text=f"Your performance: {self.actual_move_counter} moves in {int(time.time() - self.start_time) if self.start_time else 0} seconds", 
-                         font=("Arial", 11, "bold"), bg="#f9f9f9")
-        user_label.pack(anchor="w")
-    
-        # Close button
-        btn_frame = tk.Frame(comparison_window, bg="#f5f5f7", pady=10)
-        btn_frame.pack(fill=tk.X)
-    
-        close_btn = tk.Button(btn_frame, text="Close", command=comparison_window.destroy,
-                         bg="#f44336", fg="white", font=("Arial", 11), padx=15, pady=5)
-        close_btn.pack()
 
+        # This game's timings next to the recorded averages for each disk count on these pegs
+        series = {alg: {"This game": t} for alg, t in self.algorithm_times.items() if t is not None}
+        for group in self.db.get_algorithm_stats_grouped():
+            if group['pegs'] == self.num_pegs:
+                series.setdefault(group['algorithm'], {})[f"{group['disks']} disks (avg)"] = group['mean']
+
+        elapsed = int(self.engine.elapsed()) if self.engine else 0
+        AlgorithmComparisonChart(
+            self.root, series,
+            subtitle=f"Test configuration: {self.num_disks} disks on {self.num_pegs} pegs",
+            footer=f"Your performance: {self.engine.move_count if self.engine else 0} moves in {elapsed} seconds"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tower of Hanoi interactive puzzle game")
+    parser.add_argument("--benchmark-startup", action="store_true",
+                        help="measure import and window construction time, then exit")
+    parser.add_argument("--benchmark-frames", action="store_true",
+                        help="time canvas frames from 10 to 1,000 disks, then exit")
+    parser.add_argument("--report",
+                        help="benchmark report path (.jsonl appends); default "
+                             "startup_report.json or frame_report.json")
+    parser.add_argument("--seed", type=int,
+                        help="session seed, to reproduce the disk counts and visuals of a session")
+    parser.add_argument("--disks", type=int, help="play every game with this many disks")
+    parser.add_argument("--pegs", type=int, choices=range(MIN_PEGS, MAX_PEGS + 1), help="play every game on this many pegs")
+    parser.add_argument("--layout", choices=LAYOUTS, default="classic",
+                        help="starting position: all on A, spread at random, or two towers to swap")
+    args = parser.parse_args(argv)
+    if args.disks is not None and not 1 <= args.disks <= 20:
+        parser.error("--disks must be between 1 and 20")
+
+    if args.benchmark_startup:
+        import startup_benchmark
+        startup_benchmark.run(args.report or "startup_report.json")
+        return
+    if args.benchmark_frames:
+        import frame_benchmark
+        frame_benchmark.run(args.report or "frame_report.json")
+        return
 
-if __name__ == "__main__":
     root = tk.Tk()
-    app = TowerOfHanoiGame(root)
-    root.mainloop()
\ No newline at end of file
+    app = TowerOfHanoiGame(root, seed=args.seed, disks=args.disks, pegs=args.pegs, layout=args.layout)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,406 @@
+"""
+Compact binary encoding for Tower of Hanoi move sequences.
+A move between pegs "A".."P" is stored as two peg indexes packed into 4 bits
+(up to 4 pegs) or 8 bits (up to 16 pegs) instead of a 5-6 byte "A->C," string.
+
+Blob layout:
+    byte 0: bits per peg index (2 or 4), plus FLAG_ZLIB when the payload is compressed
+    rest:   moves packed most significant bits first; a trailing padding slot
+            decodes as a same-peg move, which is never a legal move, and ends the sequence
+
+The same layout is used for move files (write_moves/read_moves), which are
+produced and consumed in chunks so sequences of billions of moves never have to
+fit in memory.
+"""
+import itertools
+import zlib
+
+FLAG_ZLIB = 0x80
+BITS_MASK = 0x0F
+
+# Only compress sequences long enough for zlib's header to pay off
+COMPRESS_MIN_BYTES = 64
+
+MAX_PEGS = 16
+
+# Event logs: a move code always has different source and target nibbles,
+# so the same-peg code 0x00 is free to mark a hint
+EVENT_MOVE = "move"
+EVENT_HINT = "hint"
+EVENT_HINT_CODE = 0x00
+EVENTS_VERSION = 1
+
+# Bytes handled per read/write when streaming move files
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def peg_index(peg):
+    """Return the 0-based index of a peg letter"""
+    if len(peg) != 1 or not 0 <= ord(peg) - 65 < MAX_PEGS:
+        raise ValueError(f"Invalid peg '{peg}'")
+    return ord(peg) - 65
+
+
+def parse_moves(moves):
+    """
+    Normalise a move sequence to a list of (source, target) peg letters.
+
+    Args:
+        moves: Comma separated "A->C" string, or an iterable of (source, target) tuples
+
+    Returns:
+        List of (source, target) tuples
+    """
+    if isinstance(moves, str):
+        if not moves.strip():
+            return []
+        return [parse_move(move) for move in moves.split(',')]
+    return [tuple(move) for move in moves]
+
+
+def bits_for_moves(moves):
+    """Return the number of bits needed per peg index for the given moves"""
+    highest = max((max(peg_index(a), peg_index(b)) for a, b in moves), default=0)
+    return bits_for_pegs(highest + 1)
+
+
+def bits_for_pegs(num_pegs):
+    """Return the number of bits per peg index for a game with num_pegs pegs"""
+    if num_pegs > MAX_PEGS:
+        raise ValueError(f"At most {MAX_PEGS} pegs can be encoded")
+    return 2 if num_pegs <= 4 else 4
+
+
+def iter_packed(moves, bits_per_peg, chunk_size=STREAM_CHUNK_BYTES):
+    """Pack (source, target) moves into byte chunks, padding the last byte with zeros"""
+    move_bits = 2 * bits_per_peg
+    packed = bytearray()
+    acc = 0
+    filled = 0
+    for source, target in moves:
+        acc = (acc << move_bits) | (peg_index(source) << bits_per_peg) | peg_index(target)
+        filled += move_bits
+        if filled == 8:
+            packed.append(acc)
+            acc = 0
+            filled = 0
+            if len(packed) >= chunk_size:
+                yield bytes(packed)
+                packed.clear()
+    if filled:
+        packed.append(acc << (8 - filled))
+    if packed:
+        yield bytes(packed)
+
+
+def pack_moves(moves, bits_per_peg):
+    """Pack (source, target) moves into bytes, padding the last byte with zeros"""
+    return b"".join(iter_packed(moves, bits_per_peg))
+
+
+def unpack_moves(payload, bits_per_peg):
+    """Yield (source, target) moves from packed bytes, stopping at the padding"""
+    move_bits = 2 * bits_per_peg
+    per_byte = 8 // move_bits
+    peg_mask = (1 << bits_per_peg) - 1
+    move_mask = (1 << move_bits) - 1
+    for byte in payload:
+        for slot in range(per_byte - 1, -1, -1):
+            move = (byte >> (slot * move_bits)) & move_mask
+            source, target = move >> bits_per_peg, move & peg_mask
+            if source == target:
+                return
+            yield chr(65 + source), chr(65 + target)
+
+
+def encode_moves(moves, compress=True):
+    """
+    Encode a move sequence as a compact blob.
+
+    Args:
+        moves: Comma separated "A->C" string or iterable of (source, target) tuples
+        compress: Try zlib on long sequences and keep it when it is smaller
+
+    Returns:
+        Tuple of (blob, number of moves)
+    """
+    moves = parse_moves(moves)
+    for source, target in moves:
+        if source == target:
+            raise ValueError(f"Invalid move {source}->{target}: same source and target")
+
+    bits_per_peg = bits_for_moves(moves)
+    header = bits_per_peg
+    payload = pack_moves(moves, bits_per_peg)
+
+    if compress and len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            header |= FLAG_ZLIB
+            payload = compressed
+
+    return bytes([header]) + payload, len(moves)
+
+
+def decode_moves(blob):
+    """Yield the (source, target) moves stored in a blob"""
+    if not blob:
+        return iter(())
+    header = blob[0]
+    payload = blob[1:]
+    if header & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return unpack_moves(payload, header & BITS_MASK)
+
+
+def write_varint(out, value):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(payload, position):
+    """Read an unsigned LEB128 varint; returns (value, next position)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = payload[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def encode_events(events, compress=True):
+    """
+    Encode a game's event log as a compact blob.
+
+    Each event is one code byte, (source index << 4) | target index for a move
+    or EVENT_HINT_CODE for a hint, followed by the milliseconds since the
+    previous event as a varint; a typical move takes 2-3 bytes.
+
+    Args:
+        events: Iterable of (kind, source, target, seconds since the game started)
+            where kind is EVENT_MOVE or EVENT_HINT (hints have no source/target)
+        compress: Try zlib on long logs and keep it when it is smaller
+
+    Returns:
+        Tuple of (blob, number of events)
+    """
+    payload = bytearray()
+    previous_ms = 0
+    count = 0
+    for kind, source, target, offset in events:
+        if kind == EVENT_MOVE:
+            if source == target:
+                raise ValueError(f"Invalid move {source}->{target}: same source and target")
+            payload.append((peg_index(source) << 4) | peg_index(target))
+        elif kind == EVENT_HINT:
+            payload.append(EVENT_HINT_CODE)
+        else:
+            raise ValueError(f"Unknown event kind '{kind}'")
+        # Deltas never go negative, so rounding errors cannot accumulate
+        delta = max(0, round(offset * 1000) - previous_ms)
+        previous_ms += delta
+        write_varint(payload, delta)
+        count += 1
+
+    header = EVENTS_VERSION
+    payload = bytes(payload)
+    if compress and len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            header |= FLAG_ZLIB
+            payload = compressed
+    return bytes([header]) + payload, count
+
+
+def decode_events(blob):
+    """Return the (kind, source, target, seconds since start) events stored in a blob"""
+    if not blob:
+        return []
+    header = blob[0]
+    payload = blob[1:]
+    if header & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    if header & BITS_MASK != EVENTS_VERSION:
+        raise ValueError(f"Unsupported event log version {header & BITS_MASK}")
+
+    events = []
+    position = 0
+    elapsed_ms = 0
+    while position < len(payload):
+        code = payload[position]
+        delta, position = read_varint(payload, position + 1)
+        elapsed_ms += delta
+        if code == EVENT_HINT_CODE:
+            events.append((EVENT_HINT, None, None, elapsed_ms / 1000))
+        else:
+            events.append((EVENT_MOVE, chr(65 + (code >> 4)), chr(65 + (code & 0x0F)), elapsed_ms / 1000))
+    return events
+
+
+def format_moves(moves):
+    """Return moves as the comma separated "A->C" text used in the game"""
+    return ','.join(f"{a}->{b}" for a, b in moves)
+
+
+def is_binary_header(first_byte):
+    """Tell a binary move file from a text one by its first byte"""
+    return first_byte & ~FLAG_ZLIB in (2, 4)
+
+
+def write_moves(moves, stream, num_pegs, compress=False):
+    """
+    Write moves to a binary file object in the blob layout, chunk by chunk.
+
+    Args:
+        moves: Iterable of (source, target) tuples; consumed lazily
+        stream: Binary file object
+        num_pegs: Number of pegs in the game, which fixes the bits per peg up front
+        compress: Compress the payload with a streaming zlib compressor
+
+    Returns:
+        Number of moves written
+    """
+    bits_per_peg = bits_for_pegs(num_pegs)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for source, target in moves:
+            if source == target:
+                raise ValueError(f"Invalid move {source}->{target}: same source and target")
+            count += 1
+            yield source, target
+
+    stream.write(bytes([bits_per_peg | (FLAG_ZLIB if compress else 0)]))
+    compressor = zlib.compressobj(6) if compress else None
+    for chunk in iter_packed(counted(), bits_per_peg):
+        stream.write(compressor.compress(chunk) if compressor else chunk)
+    if compressor:
+        stream.write(compressor.flush())
+    return count
+
+
+def read_moves(stream, chunk_size=STREAM_CHUNK_BYTES):
+    """Yield the (source, target) moves of a binary move file, reading it in chunks"""
+    header = stream.read(1)
+    if not header:
+        return
+    header = header[0]
+    if not is_binary_header(header):
+        raise ValueError(f"Not a binary move file (header byte {header:#04x})")
+
+    decompressor = zlib.decompressobj() if header & FLAG_ZLIB else None
+
+    def chunks():
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield decompressor.decompress(chunk) if decompressor else chunk
+        if decompressor:
+            yield decompressor.flush()
+
+    yield from unpack_moves(itertools.chain.from_iterable(chunks()), header & BITS_MASK)
+
+
+def write_text_moves(moves, stream, chunk_moves=8192):
+    """
+    Write moves as text, one "A->C" per line, chunk by chunk.
+
+    Returns:
+        Number of moves written
+    """
+    count = 0
+    lines = []
+    for source, target in moves:
+        lines.append(f"{source}->{target}\n")
+        if len(lines) >= chunk_moves:
+            stream.write("".join(lines))
+            count += len(lines)
+            lines = []
+    stream.write("".join(lines))
+    return count + len(lines)
+
+
+def read_text_moves(stream, chunk_size=STREAM_CHUNK_BYTES):
+    """
+    Yield the moves of a text file, reading it in chunks.
+
+    Moves may be separated by commas (as typed in the game) or newlines.
+    """
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        tokens = (pending + chunk).replace("\n", ",").split(",")
+        pending = tokens.pop()
+        for token in tokens:
+            if token.strip():
+                yield parse_move(token)
+    if pending.strip():
+        yield parse_move(pending)
+
+
+def parse_move(text):
+    """Parse one "A->C" move into a (source, target) tuple"""
+    parts = text.split('->')
+    if len(parts) != 2:
+        raise ValueError(f"Invalid move format: {text.strip()}")
+    return parts[0].strip(), parts[1].strip()
+
+
+class MoveSequence:
+    """A stored move sequence that is only decoded when it is iterated or indexed"""
+
+    def __init__(self, value, count=None):
+        """
+        Args:
+            value: Encoded blob, or legacy comma separated text
+            count: Number of moves, when known without decoding
+        """
+        self.value = value
+        self.count = count
+        self.moves = None
+
+    def __iter__(self):
+        if self.moves is not None:
+            return iter(self.moves)
+        if isinstance(self.value, str):
+            return iter(parse_moves(self.value))
+        return decode_moves(self.value)
+
+    def __len__(self):
+        if self.count is None:
+            self.count = len(self.decoded())
+        return self.count
+
+    def __getitem__(self, index):
+        return self.decoded()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, MoveSequence):
+            return self.decoded() == other.decoded()
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def decoded(self):
+        """Decode once and keep the list for random access"""
+        if self.moves is None:
+            self.moves = list(iter(self))
+        return self.moves
+
+    def __str__(self):
+        if isinstance(self.value, str):
+            return self.value
+        return format_moves(self)
+
+    def __repr__(self):
+        return f"MoveSequence({len(self)} moves)"
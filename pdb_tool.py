@@ -0,0 +1,166 @@
+"""
+Precompute pattern databases for the position solver and time it.
+A database holds the exact distance (mod 16, one nibble per position) from
+every position of k disks to all of them on one peg, found by breadth-first
+search. Files are memory-mapped by PositionSolver, so a database built once
+serves every later search, and every process (hints in the game included),
+without rebuilding.
+
+Usage:
+    python -m pdb_tool build --pegs 4 --disks 8-12 [--dir pdb]
+    python -m pdb_tool solve AABDCCA... [--pegs 4] [--target D] [--dir pdb] [--max-expanded N]
+    python -m pdb_tool bench --pegs 4 --disks 15-20 [--samples 3] [--seed 0] [--progress F] [--dir pdb] [--max-expanded N]
+
+Positions are peg letters, smallest disk first (e.g. "AAD").
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import islice
+from hanoi_algorithms import (NibblePatternDatabase, PositionSolver, pattern_database_path,
+                              calculate_min_moves, frame_stewart_moves, MIN_PEGS, MAX_PEGS, PDB_DIRECTORY)
+from game_engine import peg_names, parse_position
+from move_codec import format_moves
+
+DEFAULT_DIRECTORY = PDB_DIRECTORY
+
+
+def parse_range(text):
+    """Parse "N" or "A-B" into a range of disk counts"""
+    first, _, last = text.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+def check_pegs(pegs):
+    if not MIN_PEGS <= pegs <= MAX_PEGS:
+        raise ValueError(f"Only {MIN_PEGS} to {MAX_PEGS} pegs are supported")
+
+
+def build(args):
+    check_pegs(args.pegs)
+    os.makedirs(args.dir, exist_ok=True)
+    print("pegs\tdisks\tstates\tbytes\tseconds")
+    for disks in parse_range(args.disks):
+        start = time.perf_counter()
+        database = NibblePatternDatabase.build(args.pegs, disks)
+        seconds = time.perf_counter() - start
+        path = pattern_database_path(args.dir, args.pegs, disks)
+        database.save(path)
+        print(f"{args.pegs}\t{disks}\t{database.states}\t{os.path.getsize(path)}\t{seconds:.1f}", flush=True)
+    return 0
+
+
+def solve(args):
+    check_pegs(args.pegs)
+    start = parse_position(args.position)
+    names = peg_names(args.pegs)
+    if args.target not in names:
+        raise ValueError(f"Target must be one of {', '.join(names)}")
+    solver = PositionSolver([names.index(args.target)] * len(start), args.pegs,
+                            directory=args.dir, max_expanded=args.max_expanded)
+    began = time.perf_counter()
+    moves = solver.solve(start)
+    seconds = time.perf_counter() - began
+    if moves is None:
+        print(f"Gave up after {solver.expanded} positions ({seconds:.1f}s)", file=sys.stderr)
+        return 1
+    print(format_moves((names[source], names[target]) for _, source, target in moves))
+    print(f"{len(moves)} moves, {solver.expanded} positions expanded, {seconds:.2f}s", file=sys.stderr)
+    return 0
+
+
+def benchmark_position(num_disks, pegs, progress, rng):
+    """
+    Return a position to solve to all disks on the last peg: uniform at
+    random if progress is None, else the position that fraction of the way
+    through the optimal classic game, as when a player asks for a hint.
+    """
+    if progress is None:
+        return [rng.randrange(pegs) for _ in range(num_disks)]
+    names = peg_names(pegs)
+    positions = [0] * num_disks
+    played = round(progress * calculate_min_moves(num_disks, pegs))
+    for source, target in islice(frame_stewart_moves(num_disks, names, names[0], names[-1]), played):
+        disk = positions.index(names.index(source))
+        positions[disk] = names.index(target)
+    return positions
+
+
+def bench(args):
+    """
+    Time optimal solves of random positions to all disks on the last peg.
+
+    The first row of each disk count also includes mapping (or building) the
+    databases; "-" marks searches that hit --max-expanded.
+    """
+    check_pegs(args.pegs)
+    rng = random.Random(args.seed)
+    print("disks\tgroup\tsample\tmoves\texpanded\tseconds\tpositions_per_s")
+    for num_disks in parse_range(args.disks):
+        began = time.perf_counter()
+        solver = PositionSolver([args.pegs - 1] * num_disks, args.pegs,
+                                directory=args.dir, max_expanded=args.max_expanded)
+        setup = time.perf_counter() - began
+        for sample in range(args.samples):
+            start = benchmark_position(num_disks, args.pegs, args.progress, rng)
+            began = time.perf_counter()
+            moves = solver.solve(start)
+            seconds = time.perf_counter() - began + (setup if sample == 0 else 0)
+            rate = solver.expanded / seconds if seconds else 0
+            length = "-" if moves is None else len(moves)
+            print(f"{num_disks}\t{solver.group_size}\t{sample}\t{length}\t{solver.expanded}\t"
+                  f"{seconds:.2f}\t{rate:.0f}", flush=True)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdb_tool", description="Tower of Hanoi pattern databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_db_parser = commands.add_parser("build", help="precompute database files")
+    build_db_parser.add_argument("--pegs", type=int, default=4)
+    build_db_parser.add_argument("--disks", required=True, help="disks per database, or a range, e.g. 10 or 8-12")
+    build_db_parser.add_argument("--dir", default=DEFAULT_DIRECTORY)
+    build_db_parser.set_defaults(handler=build)
+
+    solve_parser = commands.add_parser("solve", help="print a shortest solution from a position")
+    solve_parser.add_argument("position", help="peg letters, smallest disk first")
+    solve_parser.add_argument("--pegs", type=int, default=4)
+    solve_parser.add_argument("--target", default=None, help="peg to gather the disks on (default: the last)")
+    solve_parser.add_argument("--dir", default=DEFAULT_DIRECTORY)
+    solve_parser.add_argument("--max-expanded", type=int, default=None)
+    solve_parser.set_defaults(handler=solve)
+
+    bench_parser = commands.add_parser("bench", help="time solves of random positions")
+    bench_parser.add_argument("--pegs", type=int, default=4)
+    bench_parser.add_argument("--disks", default="15-20", help="disk count or range")
+    bench_parser.add_argument("--samples", type=int, default=3)
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.add_argument("--progress", type=float, default=None,
+                              help="start this fraction of the way through the classic game "
+                                   "(default: uniform random positions)")
+    bench_parser.add_argument("--dir", default=DEFAULT_DIRECTORY)
+    bench_parser.add_argument("--max-expanded", type=int, default=2_000_000,
+                              help="positions expanded per search before giving up")
+    bench_parser.set_defaults(handler=bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "target", "") is None:
+        args.target = peg_names(args.pegs)[-1]
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
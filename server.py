@@ -0,0 +1,399 @@
+"""
+Tournament server for timed Tower of Hanoi races.
+Hosts many concurrent sessions on one asyncio event loop: players are matched
+by configuration, each plays their own GameEngine, and finished games go to the
+database through a ResultWriter so the loop never waits on SQLite commits.
+
+Protocol: one JSON object per line in each direction. Requests may carry an
+"id" that is echoed in the reply; messages pushed by the server have none.
+
+    {"op": "hello", "name": "alice"}                  -> {"op": "welcome"}
+    {"op": "join", "disks": 5, "pegs": 3}             -> {"op": "queued"}
+                                            (pushed)  <- {"op": "start", "match", "players", "min_moves", ...}
+    {"op": "move", "source": "A", "target": "C"}      -> {"op": "moved", "moves", "state"}
+                                            (pushed)  <- {"op": "standings", "match", "standings"}
+    {"op": "leaderboard", "disks": 5, "limit": 10}    -> {"op": "leaderboard", "rows"}
+    {"op": "quit"}
+
+Errors are replied as {"ok": false, "error": "..."}.
+
+Usage:
+    python server.py serve [--port 7777 | --unix PATH] [--db hanoi_game.db | --memory]
+    python server.py load --clients 2000 [--port 7777 | --unix PATH | --spawn]
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+from database import Database, ResultWriter
+from game_engine import GameEngine, solution_moves, WON, LOST
+
+# Largest game the server accepts; bigger ones would only tie up memory
+MAX_DISKS = 20
+
+# Longest request line accepted from a client
+MAX_LINE_BYTES = 64 * 1024
+
+
+class PlayerSession:
+    """One connected client"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.name = None
+        self.match = None
+        self.engine = None
+
+    def send(self, message):
+        self.writer.write((json.dumps(message) + "\n").encode())
+
+
+class Match:
+    """Players racing on the same configuration"""
+
+    def __init__(self, match_id, disks, pegs, sessions):
+        self.match_id = match_id
+        self.disks = disks
+        self.pegs = pegs
+        self.sessions = sessions
+        self.standings = []
+
+    def broadcast(self, message):
+        for session in self.sessions:
+            if not session.writer.is_closing():
+                session.send(message)
+
+
+class HanoiServer:
+    """Matchmaking, move handling and leaderboard queries for many concurrent players"""
+
+    def __init__(self, db, result_writer, players_per_match=2, match_wait=1.0):
+        """
+        Args:
+            db: Database for leaderboard queries
+            result_writer: ResultWriter that saves finished games
+            players_per_match: Players started together in one race
+            match_wait: Seconds a player waits for opponents before racing alone
+        """
+        self.db = db
+        self.result_writer = result_writer
+        self.players_per_match = players_per_match
+        self.match_wait = match_wait
+        self.waiting = {}  # (disks, pegs) -> sessions queued for a match
+        self.wait_timers = {}
+        self.next_match_id = 1
+        self.sessions = set()
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Listen on TCP, or on a Unix socket when path is given"""
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=path, limit=MAX_LINE_BYTES,
+                                                          backlog=4096)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE_BYTES,
+                                                     backlog=4096)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        for timer in self.wait_timers.values():
+            timer.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        session = PlayerSession(writer)
+        self.sessions.add(session)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                message = {}
+                try:
+                    message = json.loads(line)
+                    reply = await self.dispatch(session, message)
+                except Exception as e:
+                    message = message if isinstance(message, dict) else {}
+                    reply = {'ok': False, 'error': str(e)}
+                if reply is None:
+                    break
+                if 'id' in message:
+                    reply['id'] = message['id']
+                session.send(reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(session)
+            writer.close()
+
+    async def dispatch(self, session, message):
+        """Handle one request and return the reply, or None to close the connection"""
+        op = message.get('op')
+        if op == 'move':
+            return self.move(session, message['source'], message['target'])
+        if op == 'hello':
+            name = str(message.get('name', "")).strip()
+            if not name or len(name) > 50:
+                raise ValueError("Name must be 1-50 characters")
+            session.name = name
+            return {'ok': True, 'op': 'welcome', 'name': name}
+        if op == 'join':
+            return self.join(session, int(message.get('disks', 5)), int(message.get('pegs', 3)))
+        if op == 'leaderboard':
+            return await self.leaderboard(message)
+        if op == 'quit':
+            return None
+        raise ValueError(f"Unknown op '{op}'")
+
+    def join(self, session, disks, pegs):
+        if session.name is None:
+            raise ValueError("Say hello first")
+        if session.engine is not None and session.engine.is_active:
+            raise ValueError("Already playing")
+        if any(session in queue for queue in self.waiting.values()):
+            raise ValueError("Already waiting for a match")
+        if not 1 <= disks <= MAX_DISKS:
+            raise ValueError(f"Disks must be between 1 and {MAX_DISKS}")
+        GameEngine(0, pegs)  # rejects unsupported peg counts before queueing
+
+        key = (disks, pegs)
+        queue = self.waiting.setdefault(key, [])
+        queue.append(session)
+        if len(queue) >= self.players_per_match:
+            self.start_match(key)
+        elif key not in self.wait_timers:
+            self.wait_timers[key] = asyncio.get_running_loop().call_later(
+                self.match_wait, self.start_match, key)
+        return {'ok': True, 'op': 'queued', 'disks': disks, 'pegs': pegs}
+
+    def start_match(self, key):
+        """Start a race with everyone waiting on a configuration"""
+        timer = self.wait_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        sessions = [s for s in self.waiting.pop(key, []) if not s.writer.is_closing()]
+        if not sessions:
+            return
+
+        disks, pegs = key
+        match = Match(self.next_match_id, disks, pegs, sessions)
+        self.next_match_id += 1
+        for session in sessions:
+            session.match = match
+            session.engine = GameEngine(disks, pegs)
+            session.engine.subscribe(lambda event, data, session=session: self.on_game_event(session, event))
+        match.broadcast({
+            'op': 'start', 'match': match.match_id, 'disks': disks, 'pegs': pegs,
+            'min_moves': sessions[0].engine.min_moves,
+            'players': [s.name for s in sessions]
+        })
+
+    def move(self, session, source, target):
+        engine = session.engine
+        if engine is None:
+            raise ValueError("Not in a game")
+        if not engine.apply_move(source, target):
+            return {'ok': False, 'op': 'moved', 'error': engine.last_error, 'moves': engine.move_count}
+        return {'ok': True, 'op': 'moved', 'moves': engine.move_count, 'state': engine.state}
+
+    def on_game_event(self, session, event):
+        """Save finished games and push the updated standings to the match"""
+        if event not in (WON, LOST):
+            return
+        engine = session.engine
+        match = session.match
+        match.standings.append({
+            'name': session.name, 'result': engine.state,
+            'moves': engine.move_count, 'time': round(engine.elapsed(), 3)
+        })
+        match.standings.sort(key=lambda s: (s['result'] != "won", s['time']))
+        match.broadcast({'op': 'standings', 'match': match.match_id, 'standings': match.standings})
+
+        record = engine.result_record(session.name, efficiency_note="tournament race")
+        record['user_time'] = max(1, record['user_time'])
+        self.result_writer.submit(record)
+
+    async def leaderboard(self, message):
+        limit = max(1, min(int(message.get('limit', 10)), 100))
+        disks = message.get('disks')
+        pegs = message.get('pegs')
+        loop = asyncio.get_running_loop()
+        # SQLite reads run on the executor so the event loop keeps serving moves
+        rows, _ = await loop.run_in_executor(
+            None, lambda: self.db.get_leaderboard_page(limit=limit, disks=disks, pegs=pegs))
+        return {'ok': True, 'op': 'leaderboard', 'rows': [
+            {'name': row['name'], 'time': row['user_time'], 'disks': row['disks'], 'pegs': row['pegs']}
+            for row in rows
+        ]}
+
+    def leave(self, session):
+        self.sessions.discard(session)
+        for queue in self.waiting.values():
+            if session in queue:
+                queue.remove(session)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def simulate_client(index, connect, disks, pegs, latencies):
+    """Play one race with the optimal solution, recording the round trip of every move"""
+    reader, writer = await connect()
+    next_id = 0
+    pushed = []
+
+    async def request(message):
+        nonlocal next_id
+        next_id += 1
+        message['id'] = next_id
+        writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+        while True:
+            reply = json.loads(await reader.readline())
+            if reply.get('id') == next_id:
+                return reply
+            pushed.append(reply)
+
+    try:
+        await request({'op': 'hello', 'name': f"bot{index}"})
+        await request({'op': 'join', 'disks': disks, 'pegs': pegs})
+        while not any(message.get('op') == 'start' for message in pushed):
+            pushed.append(json.loads(await reader.readline()))
+
+        for source, target in solution_moves(disks, pegs):
+            start = time.perf_counter()
+            reply = await request({'op': 'move', 'source': source, 'target': target})
+            latencies.append(time.perf_counter() - start)
+            if not reply.get('ok'):
+                raise RuntimeError(reply.get('error'))
+        await request({'op': 'leaderboard', 'disks': disks, 'pegs': pegs, 'limit': 5})
+        writer.write(b'{"op": "quit"}\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_load(clients, connect, disks=4, pegs=3):
+    """
+    Simulate many clients racing at once.
+
+    Returns:
+        Dict with clients, failures, moves, elapsed, moves_per_s and p50/p99 move
+        latency in milliseconds
+    """
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(simulate_client(i, connect, disks, pegs, latencies) for i in range(clients)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    failures = [r for r in results if isinstance(r, Exception)]
+    return {
+        'clients': clients,
+        'failures': len(failures),
+        'first_failure': repr(failures[0]) if failures else None,
+        'moves': len(latencies),
+        'elapsed': round(elapsed, 3),
+        'moves_per_s': round(len(latencies) / elapsed) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None
+    }
+
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit permits"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def serve(args):
+    db = Database(memory=True) if args.memory else Database(args.db)
+    writer = ResultWriter(db).start()
+    server = HanoiServer(db, writer, players_per_match=args.players, match_wait=args.wait)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Serving on {args.unix or f'{args.host}:{server.port}'}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        writer.close()
+        db.close()
+
+
+async def load(args):
+    server = writer = db = None
+    host, port, path = args.host, args.port, args.unix
+    if args.spawn:
+        db = Database(memory=True)
+        writer = ResultWriter(db).start()
+        server = HanoiServer(db, writer, players_per_match=args.players, match_wait=args.wait)
+        await server.start(host, 0, path)
+        port = server.port if not path else None
+
+    def connect():
+        if path:
+            return asyncio.open_unix_connection(path, limit=MAX_LINE_BYTES)
+        return asyncio.open_connection(host, port, limit=MAX_LINE_BYTES)
+
+    try:
+        report = await run_load(args.clients, connect, args.disks, args.pegs)
+    finally:
+        if server is not None:
+            await server.close()
+            writer.close()
+            db.close()
+    print(json.dumps(report))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tower of Hanoi race server and load generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "load"):
+        command = commands.add_parser(name)
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=7777)
+        command.add_argument("--unix", help="Unix socket path instead of TCP")
+        command.add_argument("--players", type=int, default=2, help="players per race")
+        command.add_argument("--wait", type=float, default=1.0, help="seconds to wait for opponents")
+        if name == "serve":
+            command.add_argument("--db", default="hanoi_game.db")
+            command.add_argument("--memory", action="store_true", help="keep results in memory only")
+        else:
+            command.add_argument("--clients", type=int, default=1000)
+            command.add_argument("--disks", type=int, default=4)
+            command.add_argument("--pegs", type=int, default=3)
+            command.add_argument("--spawn", action="store_true",
+                                 help="run an in-process server on an ephemeral port")
+    args = parser.parse_args(argv)
+
+    raise_file_limit()
+    try:
+        asyncio.run(serve(args) if args.command == "serve" else load(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
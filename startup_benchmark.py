@@ -0,0 +1,171 @@
+"""
+Cold-start benchmark for the Tower of Hanoi game.
+Records what launching main.py costs: a per-module import breakdown taken from
+``python -X importtime`` in a fresh interpreter, plus the construction phases of
+the game window up to the first idle event. Results are written as JSON so
+startup regressions can be tracked over time.
+
+Usage:
+    python main.py --benchmark-startup [--report startup_report.json]
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Modules whose import cost is reported individually
+TRACKED_MODULES = ["tkinter", "sqlite3", "hanoi_algorithms", "ui", "database", "audio", "pygame"]
+
+
+def parse_importtime(output):
+    """
+    Parse the stderr of ``python -X importtime``.
+
+    Returns:
+        Dict mapping module name to {"self_us", "cumulative_us", "depth"}
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            depth = (len(name) - len(name.lstrip())) // 2
+            modules[name.strip()] = {
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": depth
+            }
+        except ValueError:
+            continue
+    return modules
+
+
+def measure_imports(statement="import main"):
+    """Import the game in a fresh interpreter and return the import breakdown"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=here, capture_output=True, text=True
+    )
+    return parse_importtime(result.stderr)
+
+
+class PhaseTimer:
+    """Collects wall-clock durations of named startup phases"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def mark(self, name):
+        """Record the time elapsed since the timer was created"""
+        self.phases[name] = round((time.perf_counter() - self.started) * 1000, 3)
+
+
+def measure_window_startup():
+    """
+    Build the game window with every phase timed and exit on the first idle event.
+
+    Returns:
+        Tuple of (phase timings in ms, audio setup time in ms or None)
+    """
+    import tkinter as tk
+    import main
+
+    timer = PhaseTimer()
+    database_class = main.Database
+
+    def timed_database():
+        with timer.phase("database"):
+            return database_class()
+
+    class TimedGame(main.TowerOfHanoiGame):
+        def setup_ui(self):
+            with timer.phase("setup_ui"):
+                super().setup_ui()
+
+    main.Database = timed_database
+    try:
+        with timer.phase("tk_root"):
+            root = tk.Tk()
+        with timer.phase("game_init"):
+            game = TimedGame(root)
+    finally:
+        main.Database = database_class
+
+    def first_idle():
+        timer.mark("first_idle")
+        root.destroy()
+
+    root.after_idle(first_idle)
+    root.mainloop()
+
+    # Audio loads in the background; report its cost without delaying the window
+    audio_ms = None
+    if game.sound.ready.wait(timeout=10) and game.sound.startup_time is not None:
+        audio_ms = round(game.sound.startup_time * 1000, 3)
+    return timer.phases, audio_ms
+
+
+def build_report(imports, phases, audio_ms):
+    """
+    Assemble the report.
+
+    Args:
+        imports: Import breakdown from measure_imports()
+        phases: Window phase timings in ms
+        audio_ms: Audio setup time in ms, or None
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "import_total_ms": round(imports.get("main", {}).get("cumulative_us", 0) / 1000, 3),
+        "imports_ms": {
+            name: round(imports[name]["cumulative_us"] / 1000, 3)
+            for name in TRACKED_MODULES if name in imports
+        },
+        "phases_ms": phases,
+        "audio_setup_ms": audio_ms,
+        "modules": imports
+    }
+
+
+def write_report(report, report_path):
+    """Write a report as JSON, or append it as one line when the path ends in .jsonl"""
+    if report_path.endswith(".jsonl"):
+        with open(report_path, "a") as f:
+            f.write(json.dumps(report) + "\n")
+    else:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def run(report_path="startup_report.json"):
+    """Run the benchmark and write the report (appended when the path ends in .jsonl)"""
+    imports = measure_imports()
+    pygame_imports = measure_imports("import pygame")
+    if "pygame" in pygame_imports:
+        imports["pygame"] = pygame_imports["pygame"]
+
+    phases, audio_ms = measure_window_startup()
+    report = build_report(imports, phases, audio_ms)
+    write_report(report, report_path)
+
+    print(f"Imports: {report['import_total_ms']} ms")
+    for name, ms in report["phases_ms"].items():
+        print(f"  {name}: {ms} ms")
+    print(f"Report written to {report_path}")
+    return report
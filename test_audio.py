@@ -0,0 +1,54 @@
+import sys
+import unittest
+from unittest import mock
+from audio import SoundManager
+
+
+class FakeClock:
+    """Manually advanced clock for rate limiting tests"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSoundManager(unittest.TestCase):
+    """Test cases for the sound effect manager"""
+
+    def test_disabled_manager_is_silent(self):
+        """Test that a disabled manager never plays or loads anything"""
+        sounds = SoundManager(enabled=False)
+        self.assertFalse(sounds.start())
+        self.assertFalse(sounds.play("move"))
+        self.assertEqual(sounds.sounds, {})
+
+    def test_rate_limit_repeats(self):
+        """Test that rapid repeats of the same effect are skipped"""
+        clock = FakeClock()
+        sounds = SoundManager(enabled=False, min_interval=0.05, clock=clock)
+
+        self.assertTrue(sounds.should_play("move"))
+        clock.now += 0.01
+        self.assertFalse(sounds.should_play("move"))
+
+        # A different effect is not affected by the limit
+        self.assertTrue(sounds.should_play("win"))
+
+        clock.now += 0.05
+        self.assertTrue(sounds.should_play("move"))
+
+    def test_missing_pygame_falls_back_to_silence(self):
+        """Test that audio is disabled when pygame cannot be imported"""
+        sounds = SoundManager()
+        with mock.patch.dict(sys.modules, {"pygame": None}):
+            sounds.start_async().join(timeout=5)
+
+        self.assertTrue(sounds.ready.is_set())
+        self.assertFalse(sounds.enabled)
+        self.assertIsNotNone(sounds.startup_time)
+        self.assertFalse(sounds.play("move"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from batch_verify import verify_submission, verify_all, read_submissions, write_report, synthetic_submissions
+
+
+class TestBatchVerify(unittest.TestCase):
+    """Test cases for bulk verification of submitted move sequences"""
+
+    def test_verify_submission(self):
+        """Test the report row for correct, slow, illegal and malformed sequences"""
+        optimal = "A->C,A->B,C->B,A->C,B->A,B->C,A->C"
+        row = verify_submission(("s1", 3, 3, optimal))
+        self.assertTrue(row['correct'])
+        self.assertEqual((row['moves'], row['min_moves'], row['error_index']), (7, 7, None))
+
+        row = verify_submission(("s2", 3, 3, "A->B,B->A," + optimal))
+        self.assertTrue(row['solved'])
+        self.assertFalse(row['correct'])
+        self.assertEqual(row['moves'], 9)
+
+        row = verify_submission(("s3", 3, 3, "A->C,A->C"))
+        self.assertEqual(row['error_index'], 1)
+        self.assertEqual(row['error'], "larger disk on smaller disk")
+
+        row = verify_submission(("s4", 3, 3, "A->C,,A->B"))
+        self.assertEqual(row['error_index'], 1)
+        self.assertEqual(row['error'], "Move sequence contains empty moves")
+
+        row = verify_submission(("s5", 3, 3, "A->D"))
+        self.assertEqual(row['error_index'], 0)
+        self.assertFalse(row['correct'])
+
+    def test_read_file_and_directory(self):
+        """Test the supported submission layouts"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "submissions.txt")
+            with open(path, "w") as f:
+                f.write("A->C\nalice\tA->B,B->C\nbob\t1\t3\tA->C\n\n")
+            self.assertEqual(list(read_submissions(path, 1, 3)), [
+                (1, 1, 3, "A->C"), ("alice", 1, 3, "A->B,B->C"), ("bob", 1, 3, "A->C")
+            ])
+
+            folder = os.path.join(temp_dir, "folder")
+            os.mkdir(folder)
+            with open(os.path.join(folder, "carol.txt"), "w") as f:
+                f.write("A->C\n")
+            self.assertEqual(list(read_submissions(folder, 1, 3)), [("carol.txt", 1, 3, "A->C")])
+
+    def test_bad_records_become_error_rows(self):
+        """Test that unreadable records and out-of-range counts are reported per row"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "submissions.jsonl")
+            with open(path, "w") as f:
+                f.write('{"id": "a", "disks": "2", "moves": "A->B,A->C,B->C"}\n'
+                        '{"id": "b", "disks": 5.5, "moves": "A->C"}\n'
+                        'not json\n'
+                        '[1, 2]\n'
+                        '{"id": "c", "disks": 60, "moves": "A->C"}\n'
+                        '{"id": "d", "moves": 7}\n'
+                        '{"id": "e", "pegs": 0, "moves": "A->C"}\n'
+                        '{"id": "f", "pegs": -2, "moves": "A->C"}\n')
+            rows = list(verify_all(read_submissions(path, 1, 3), workers=2, chunk_size=1))
+            self.assertTrue(rows[0]['correct'])
+            self.assertIn("whole number", rows[1]['error'])
+            self.assertIn("Invalid JSON", rows[2]['error'])
+            self.assertEqual(rows[3]['error'], "Expected a JSON object")
+            self.assertEqual(rows[4]['error'], "disks must be between 1 and 20")
+            self.assertEqual(rows[5]['error'], "moves must be a string")
+            self.assertEqual(rows[6]['error'], "pegs must be between 3 and 10")
+            self.assertEqual(rows[7]['error'], "pegs must be between 3 and 10")
+
+            directory = os.path.join(temp_dir, "files")
+            os.mkdir(directory)
+            with open(os.path.join(directory, "good"), "w") as f:
+                f.write("A->C")
+            with open(os.path.join(directory, "latin1"), "wb") as f:
+                f.write(b"A->C \xe9")
+            good, bad = verify_all(read_submissions(directory, 1, 3), workers=1)
+            self.assertTrue(good['correct'])
+            self.assertIn("Not UTF-8", bad['error'])
+
+            path = os.path.join(temp_dir, "submissions.txt")
+            with open(path, "w") as f:
+                f.write("bob\tfive\t3\tA->C\n")
+            row, = verify_all(read_submissions(path, 1, 3), workers=1)
+            self.assertFalse(row['correct'])
+            self.assertIn("disks must be a whole number", row['error'])
+
+        # Past the cached reference the submission is replayed; 17 disks on 4 pegs stay cheap
+        row = verify_submission(("big", 17, 4, "A->B"))
+        self.assertEqual((row['moves'], row['solved']), (1, False))
+
+    def test_pool_matches_single_process(self):
+        """Test that the process pool returns the same rows in the same order"""
+        submissions = list(synthetic_submissions(500, disks=4))
+        single = list(verify_all(submissions, workers=1))
+        pooled = list(verify_all(submissions, workers=2, chunk_size=50))
+        self.assertEqual(single, pooled)
+
+        stream = io.StringIO()
+        total, correct = write_report(pooled, stream)
+        self.assertEqual(total, 500)
+        self.assertEqual(correct, sum(row['correct'] for row in single))
+        stream.seek(0)
+        self.assertEqual(len(list(csv.DictReader(stream))), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
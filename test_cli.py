@@ -0,0 +1,116 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+import hanoi
+from move_codec import write_moves, read_moves, write_text_moves, read_text_moves
+
+
+class TestMoveFiles(unittest.TestCase):
+    """Test cases for streaming move files"""
+
+    def test_binary_round_trip(self):
+        """Test that binary move files decode to the moves written, with and without zlib"""
+        moves = list(hanoi.solver_moves("recursive", 9, 3))
+        for compress in (False, True):
+            stream = io.BytesIO()
+            self.assertEqual(write_moves(iter(moves), stream, 3, compress=compress), 511)
+            stream.seek(0)
+            self.assertEqual(list(read_moves(stream, chunk_size=7)), moves)
+
+    def test_text_round_trip(self):
+        """Test that text files split across chunks still parse, with commas or newlines"""
+        moves = list(hanoi.solver_moves("frame_stewart", 6, 5))
+        stream = io.StringIO()
+        write_text_moves(moves, stream, chunk_moves=4)
+        stream.seek(0)
+        self.assertEqual(list(read_text_moves(stream, chunk_size=5)), moves)
+        self.assertEqual(list(read_text_moves(io.StringIO("A->C, A->B,\nC->B"), chunk_size=3)),
+                         [('A', 'C'), ('A', 'B'), ('C', 'B')])
+
+
+class TestCommandLine(unittest.TestCase):
+    """Test cases for python -m hanoi"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            code = hanoi.main(list(argv))
+        return code, out.getvalue()
+
+    def test_solve_then_verify(self):
+        """Test that every solver's output verifies as solved"""
+        for algo, pegs, fmt in (("recursive", 3, "text"), ("iterative", 3, "binary"),
+                                ("frame_stewart", 4, "binary")):
+            path = os.path.join(self.temp_dir.name, f"{algo}.moves")
+            code, _ = self.run_cli("solve", "--disks", "8", "--pegs", str(pegs), "--algo", algo,
+                                   "--format", fmt, "-o", path)
+            self.assertEqual(code, 0)
+
+            code, out = self.run_cli("verify", path, "--disks", "8", "--pegs", str(pegs), "--json")
+            report = json.loads(out)
+            self.assertEqual(code, 0)
+            self.assertTrue(report['solved'])
+            if pegs == 3:
+                self.assertTrue(report['optimal'])
+
+    def test_verify_reports_first_illegal_move(self):
+        """Test that verify points at the first move breaking the rules"""
+        path = os.path.join(self.temp_dir.name, "bad.txt")
+        with open(path, "w") as f:
+            f.write("A->C,A->C,A->B")
+
+        code, out = self.run_cli("verify", path, "--disks", "3", "--json")
+        report = json.loads(out)
+        self.assertEqual(code, 1)
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['error_index'], 1)
+        self.assertEqual(report['error'], "larger disk on smaller disk")
+
+    def test_count(self):
+        """Test the minimum move table"""
+        code, out = self.run_cli("count", "--disks", "3-4", "--pegs", "3", "4")
+        self.assertEqual(code, 0)
+        self.assertEqual(out.split("\n")[:4], ["3\t3\t7", "4\t3\t15", "3\t4\t5", "4\t4\t9"])
+
+    def test_variant_rules(self):
+        """Test solving, verifying and counting under the cyclic and adjacent rules"""
+        for rules, min_moves in (("cyclic", 59), ("adjacent", 80)):
+            path = os.path.join(self.temp_dir.name, f"{rules}.moves")
+            code, _ = self.run_cli("solve", "--disks", "4", "--rules", rules, "-o", path)
+            self.assertEqual(code, 0)
+
+            code, out = self.run_cli("verify", path, "--disks", "4", "--rules", rules, "--json")
+            report = json.loads(out)
+            self.assertTrue(report['optimal'])
+            self.assertEqual(report['moves'], min_moves)
+
+            # A variant solution is legal under the classic rules, but not optimal
+            code, out = self.run_cli("verify", path, "--disks", "4", "--json")
+            self.assertFalse(json.loads(out)['optimal'])
+
+            code, out = self.run_cli("count", "--disks", "4", "--pegs", "3", "--rules", rules)
+            self.assertEqual(out.strip(), f"4\t3\t{min_moves}")
+
+        # A solver or peg count that contradicts the rules is a usage error
+        for argv in (("--rules", "cyclic", "--algo", "frame_stewart"), ("--rules", "adjacent", "--pegs", "4")):
+            with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as raised:
+                hanoi.main(["solve", "--disks", "3", *argv])
+            self.assertEqual(raised.exception.code, 2)
+
+        code, out = self.run_cli("bench", "--disks", "20", "--rules", "adjacent", "--max-moves", "1000")
+        self.assertEqual(code, 0)
+        rules, disks, min_moves, _, streamed = out.split("\n")[1].split("\t")[:5]
+        self.assertEqual((rules, disks, min_moves, streamed), ("adjacent", "20", str(3 ** 20 - 1), "1000"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,41 +1,34 @@
 import unittest
+import json
 import os
 import sqlite3
-from database import Database
+import tempfile
+import threading
+from database import Database, ResultWriter, MOVE_ENCODING_VERSION, save_unwritten
+from game_engine import GameEngine, GameReplay, parse_position
 
 class TestDatabase(unittest.TestCase):
     """Test cases for the database functionality"""
-    
+
+    @classmethod
+    def setUpClass(cls):
+        """Build the schema once in memory; every test gets a copy of it"""
+        cls.template = Database(memory=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.template.close()
+
     def setUp(self):
         """Set up test environment"""
-        # Use test database file
-        self.test_db_file = "test_hanoi_game.db"
-        
-        # Remove existing test database if it exists
-        if os.path.exists(self.test_db_file):
-            os.remove(self.test_db_file)
-            
-        # Create connection and database object
-        self.conn = sqlite3.connect(self.test_db_file)
-        self.conn.row_factory = sqlite3.Row
-        
-        # Monkey patch the database file name
-        self._original_init = Database.__init__
-        Database.__init__ = lambda self: None
-        
-        self.db = Database()
-        self.db.conn = self.conn
-        self.db.create_tables()
-        
+        # Clone the template through the backup API; nothing touches the disk
+        self.db = self.template.clone()
+        self.conn = self.db.conn
+
     def tearDown(self):
         """Clean up after tests"""
-        self.conn.close()
-        if os.path.exists(self.test_db_file):
-            os.remove(self.test_db_file)
-        
-        # Restore original init method
-        Database.__init__ = self._original_init
-        
+        self.db.close()
+
     def test_create_tables(self):
         """Test that tables are created correctly"""
         # Check users table
@@ -95,7 +88,8 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(game['disks'], disks)
         self.assertEqual(game['pegs'], pegs)
         self.assertEqual(game['user_time'], user_time)
-        self.assertEqual(game['user_moves'], user_moves)
+        self.assertEqual(game['user_move_count'], 3)
+        self.assertEqual(str(self.db.get_game_moves(game['id'])['user_moves']), user_moves)
         self.assertEqual(game['is_correct'], is_correct)
         self.assertEqual(game['efficiency_note'], efficiency_note)
         
@@ -104,6 +98,169 @@ class TestDatabase(unittest.TestCase):
         performances = cursor.fetchall()
         self.assertEqual(len(performances), 3)  # Three algorithms
         
+    def test_save_results_bulk(self):
+        """Test bulk importing many results in batched transactions"""
+        results = [{
+            'name': f"Player{i % 7}", 'disks': 3 + i % 5, 'pegs': 3,
+            'completed': True, 'times': {'recursive': 0.001, 'iterative': 0.002, 'frame_stewart': None},
+            'user_time': 10 + i, 'user_moves': "", 'is_correct': i % 2 == 0
+        } for i in range(250)]
+
+        saved = self.db.save_results(iter(results), batch_size=100)
+        self.assertEqual(saved, 250)
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 250)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 7)
+        # None timings are skipped
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM algorithm_performance").fetchone()[0], 500)
+
+    def test_save_result_rolls_back_on_error(self):
+        """Test that a failing save leaves no partial game or user behind"""
+        result = self.db.save_result(
+            "Rollback", 3, 3, True, {'recursive': 0.001}, None, "", True
+        )
+        self.assertTrue(result)
+
+        # disks is NOT NULL, so the game insert fails after the user upsert
+        result = self.db.save_result(
+            "NewUser", None, 3, True, {'recursive': 0.001}, 10, "", True
+        )
+        self.assertFalse(result)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 1)
+        self.assertIsNone(self.conn.execute("SELECT id FROM users WHERE name = 'NewUser'").fetchone())
+
+    def test_nested_transactions(self):
+        """Test that an inner transaction neither commits nor rolls back the outer one"""
+        def count(name):
+            return self.conn.execute("SELECT COUNT(*) FROM users WHERE name = ?", (name,)).fetchone()[0]
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction() as conn:
+                conn.execute("INSERT INTO users (name) VALUES ('Outer')")
+                with self.db.transaction():
+                    pass
+                raise RuntimeError("abort outer")
+        self.assertEqual(count('Outer'), 0)
+
+        # A failed inner block only undoes its own statements
+        with self.db.transaction() as conn:
+            conn.execute("INSERT INTO users (name) VALUES ('Kept')")
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    self.db.get_or_create_user("Undone")
+                    raise RuntimeError("abort inner")
+        self.assertEqual(count('Kept'), 1)
+        self.assertEqual(count('Undone'), 0)
+        self.assertIsNone(self.db.cached_user_id("Undone"))
+        self.assertFalse(self.conn.in_transaction)
+
+    def assert_no_full_scan(self, sql, params):
+        """Assert that a query's plan only searches or scans indexes"""
+        plan = [row['detail'] for row in self.conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        for detail in plan:
+            if detail.startswith("SCAN"):
+                self.assertIn("INDEX", detail, f"Full table scan in plan: {plan}")
+            self.assertNotIn("TEMP B-TREE FOR ORDER BY", detail, f"Sort over all rows in plan: {plan}")
+        return plan
+
+    def test_query_plans_use_indexes(self):
+        """Test that leaderboard and stats queries never scan a whole table"""
+        index_names = [row['name'] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")]
+        self.assertIn('idx_games_time_page', index_names)
+        self.assertIn('idx_games_user_page', index_names)
+        self.assertIn('idx_algorithm_performance_stats', index_names)
+        self.assertNotIn('idx_games_leaderboard', index_names)
+        self.assertNotIn('idx_games_user', index_names)
+
+        self.assert_no_full_scan(Database.TOP_SCORES_SQL, (10,))
+        self.assert_no_full_scan(Database.USER_STATS_SQL, (1,))
+        self.assert_no_full_scan(Database.ALGORITHM_STATS_SQL, ())
+
+    def test_moves_stored_as_packed_blobs(self):
+        """Test that move sequences are stored compactly and decode lazily"""
+        moves = ','.join(["A->C", "A->B", "C->B", "A->C", "B->A", "B->C", "A->C"] * 100)
+        self.db.save_result("Packed", 3, 3, True, {}, 10, "A->C", True, actual_moves=moves)
+
+        row = self.conn.execute(
+            "SELECT id, actual_moves, actual_move_count, length(actual_moves) AS size FROM games").fetchone()
+        self.assertIsInstance(row['actual_moves'], bytes)
+        self.assertEqual(row['actual_move_count'], 700)
+        # Half a byte per move, against five bytes as text
+        self.assertLess(row['size'], 700 // 2 + 2)
+        self.assertLess(row['size'] * 8, len(moves))
+
+        stored = self.db.get_game_moves(row['id'])['actual_moves']
+        self.assertEqual(len(stored), 700)  # known without decoding
+        self.assertIsNone(stored.moves)
+        self.assertEqual(stored[1], ('A', 'B'))
+        self.assertEqual(str(stored), moves)
+
+    def test_game_replay_round_trip(self):
+        """Test that a game's event log is stored compactly and read back for replays"""
+        events = [('move', 'A', 'C', 0.8), ('hint', None, None, 2.0), ('move', 'A', 'B', 3.25)]
+        self.db.save_results([{
+            'name': "Replay", 'disks': 3, 'pegs': 3, 'completed': True, 'times': {},
+            'user_time': 4, 'user_moves': "", 'is_correct': False,
+            'actual_moves': "A->C,A->B", 'events': events
+        }])
+        self.db.save_result("Legacy", 3, 3, True, {}, 5, "", False, actual_moves="A->B,A->C")
+
+        row = self.conn.execute("SELECT id, event_count, length(events) AS size FROM games WHERE events IS NOT NULL").fetchone()
+        self.assertEqual(row['event_count'], 3)
+        self.assertLessEqual(row['size'], 1 + 3 * 3)
+
+        saved = self.db.get_game_replay(row['id'])
+        self.assertEqual(saved['name'], "Replay")
+        self.assertEqual(saved['events'], events)
+
+        # Games saved without an event log replay their moves untimed
+        legacy_id = self.conn.execute("SELECT id FROM games WHERE events IS NULL").fetchone()['id']
+        self.assertEqual(self.db.get_game_replay(legacy_id)['events'],
+                         [('move', 'A', 'B', 0.0), ('move', 'A', 'C', 0.0)])
+        self.assertIsNone(self.db.get_game_replay(999))
+
+    def test_layout_game_replay(self):
+        """Test that games from a custom starting layout keep their start for replays"""
+        engine = GameEngine(3, 3, start=(2, 0, 2), goal=(0, 2, 0))
+        engine.play(engine.reference_solution())
+        self.db.save_results([engine.result_record("Layout")])
+
+        game_id = self.conn.execute("SELECT id FROM games").fetchone()['id']
+        saved = self.db.get_game_replay(game_id)
+        self.assertEqual(saved['start_position'], "CAC")
+        replay = GameReplay(saved['disks'], saved['pegs'], saved['events'], start=parse_position(saved['start_position']))
+        self.assertEqual(replay.state_at(len(replay)), engine.goal_pegs)
+
+    def test_text_moves_migrated_in_place(self):
+        """Test that legacy comma separated move text is converted to blobs"""
+        user_id = self.db.get_or_create_user("Legacy")
+        for _ in range(5):
+            self.conn.execute(
+                "INSERT INTO games (user_id, disks, pegs, completed, user_moves, actual_moves) VALUES (?, 2, 4, 1, ?, ?)",
+                (user_id, "A->B,A->D,B->D", "A->B,A->D,B->D")
+            )
+        self.conn.execute(
+            "INSERT INTO games (user_id, disks, pegs, completed, user_moves, actual_moves) VALUES (?, 2, 3, 1, ?, ?)",
+            (user_id, "not a move", "")
+        )
+        self.conn.commit()
+
+        converted = self.db.migrate_move_encoding(batch_size=2)
+        self.assertEqual(converted, 5)
+
+        types = [row[0] for row in self.conn.execute("SELECT typeof(user_moves) FROM games ORDER BY id")]
+        self.assertEqual(types, ['blob'] * 5 + ['text'])
+        self.assertEqual(str(self.db.get_game_moves(1)['actual_moves']), "A->B,A->D,B->D")
+        self.assertEqual(str(self.db.get_game_moves(6)['user_moves']), "not a move")
+
+        # The conversion ran when the database was opened and is not repeated
+        self.assertEqual(self.conn.execute("PRAGMA user_version").fetchone()[0], MOVE_ENCODING_VERSION)
+        self.conn.execute("UPDATE games SET user_moves = 'A->B' WHERE id = 1")
+        self.conn.commit()
+        self.db.migrate_schema()
+        self.assertEqual(self.conn.execute("SELECT typeof(user_moves) FROM games WHERE id = 1").fetchone()[0], 'text')
+
     def test_get_top_scores(self):
         """Test retrieving top scores"""
         # Add test users
@@ -132,7 +289,60 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(top_scores), 2)
         self.assertEqual(top_scores[0]['user_time'], 30)  # Fastest time first
         self.assertEqual(top_scores[1]['user_time'], 40)  # Second fastest
-        
+
+    def test_keyset_pagination(self):
+        """Test paging through the leaderboard and history with cursors"""
+        results = []
+        for i in range(25):
+            results.append(dict(name=f"Player{i % 3}", disks=3 + i % 2, pegs=3,
+                                completed=i % 5 != 0, times={},
+                                user_time=100 - i % 10, user_moves="A->C", is_correct=True))
+        self.db.save_results(results)
+
+        # Walk the whole leaderboard and check it matches a single ordered query
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = self.db.get_leaderboard_page(after=cursor, limit=6)
+            self.assertLessEqual(len(rows), 6)
+            seen.extend((row['user_time'], row['id']) for row in rows)
+            if cursor is None:
+                break
+        expected = [tuple(row) for row in self.conn.execute(
+            "SELECT user_time, id FROM games WHERE completed = 1 ORDER BY user_time, id")]
+        self.assertEqual(seen, expected)
+
+        # Filters apply to every page
+        rows, cursor = self.db.get_leaderboard_page(limit=3, disks=4, user="Player1")
+        self.assertTrue(all(row['disks'] == 4 and row['name'] == "Player1" for row in rows))
+        self.assertEqual(self.db.get_leaderboard_page(limit=-5), ([], None))
+
+        # History is newest first and stops with no cursor on the last page
+        first, cursor = self.db.get_history_page(limit=20)
+        rest, last = self.db.get_history_page(before=cursor, limit=20)
+        self.assertEqual(len(first) + len(rest), 25)
+        self.assertIsNone(last)
+        ids = [row['id'] for row in first + rest]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+        # Deep pages seek straight to the cursor, on the filter columns when filtered
+        for query, search in (
+                (self.db.leaderboard_page_query((90, 12), 20),
+                 "idx_games_time_page (completed=? AND user_time>?)"),
+                (self.db.leaderboard_page_query((90, 12), 20, disks=3, pegs=3),
+                 "idx_games_config_leaderboard (completed=? AND disks=? AND pegs=? AND user_time>?)"),
+                (self.db.leaderboard_page_query((90, 12), 20, user="Player2"),
+                 "idx_games_user_page (user_id=? AND completed=? AND user_time>?)"),
+                (self.db.history_page_query(("2020-01-01", 12), 20),
+                 "idx_games_history (created_at<?)"),
+                (self.db.history_page_query(("2020-01-01", 12), 20, disks=3, pegs=3),
+                 "idx_games_config_history (disks=? AND pegs=? AND created_at<?)"),
+                (self.db.history_page_query(("2020-01-01", 12), 20, user="Player2"),
+                 "idx_games_user_history (user_id=? AND created_at<?)")):
+            plan = self.assert_no_full_scan(*query)
+            self.assertFalse(any("TEMP B-TREE" in detail for detail in plan), plan)
+            self.assertIn(f"SEARCH g USING INDEX {search}", plan)
+
     def test_get_algorithm_stats(self):
         """Test retrieving algorithm stats"""
         # Create a test game
@@ -165,6 +375,58 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(stats['recursive'], 0.002)  # Average of 0.001 and 0.003
         self.assertEqual(stats['iterative'], 0.002)
         
+    def test_user_peg_stats(self):
+        """Test that player statistics are kept apart per peg count"""
+        results = [
+            {'name': "Pegs", 'disks': 5, 'pegs': pegs, 'completed': completed, 'times': {},
+             'user_time': user_time, 'user_moves': "", 'is_correct': pegs == 3}
+            for pegs, completed, user_time in ((3, True, 40), (3, True, 20), (7, True, 9), (10, False, 1))
+        ]
+        self.db.save_results(results)
+
+        stats = [dict(row) for row in self.db.get_user_peg_stats("Pegs")]
+        self.assertEqual(stats, [
+            {'pegs': 3, 'games_played': 2, 'avg_time': 30.0, 'best_time': 20, 'correct_predictions': 2},
+            {'pegs': 7, 'games_played': 1, 'avg_time': 9.0, 'best_time': 9, 'correct_predictions': 0}
+        ])
+        self.assertEqual(self.db.get_user_peg_stats("Nobody"), [])
+
+    def test_get_algorithm_stats_grouped(self):
+        """Test grouped algorithm statistics per disks and pegs"""
+        results = []
+        for i in range(100):
+            results.append({
+                'name': "Grouped", 'disks': 5, 'pegs': 3, 'completed': True,
+                'times': {'recursive': (i + 1) / 1000, 'iterative': 0.002},
+                'user_time': 10, 'user_moves': "", 'is_correct': True
+            })
+        results.append({
+            'name': "Grouped", 'disks': 6, 'pegs': 4, 'completed': True,
+            'times': {'frame_stewart': 0.004}, 'user_time': 10, 'user_moves': "", 'is_correct': True
+        })
+        self.db.save_results(results)
+
+        groups = self.db.get_algorithm_stats_grouped()
+        keys = [(g['algorithm'], g['disks'], g['pegs']) for g in groups]
+        self.assertEqual(keys, [('frame_stewart', 6, 4), ('iterative', 5, 3), ('recursive', 5, 3)])
+
+        recursive = groups[2]
+        self.assertEqual(recursive['count'], 100)
+        self.assertAlmostEqual(recursive['mean'], 0.0505)
+        self.assertEqual(recursive['min'], 0.001)
+        self.assertEqual(recursive['max'], 0.1)
+        # Percentiles are approximate: within one histogram bucket (~4.4%)
+        self.assertAlmostEqual(recursive['p50'], 0.0505, delta=0.0505 * 0.05)
+        self.assertAlmostEqual(recursive['p90'], 0.0901, delta=0.0901 * 0.05)
+        self.assertAlmostEqual(recursive['p99'], 0.099, delta=0.099 * 0.05)
+
+        # Cached until the next write, then refreshed
+        self.assertIs(self.db.get_algorithm_stats_grouped(), groups)
+        self.db.save_result("Grouped", 5, 3, True, {'iterative': 0.004}, 10, "", True)
+        iterative = self.db.get_algorithm_stats_grouped(algorithm='iterative')[0]
+        self.assertEqual(iterative['count'], 101)
+        self.assertEqual(iterative['max'], 0.004)
+
     def test_get_user_stats(self):
         """Test retrieving user statistics"""
         # Create test user
@@ -193,5 +455,246 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(stats['correct_predictions'], 1)  # Only one correct prediction
 
 
+    def test_summary_tables_follow_inserts(self):
+        """Test that triggers keep best times and user stats up to date"""
+        self.db.save_result("Summary", 3, 3, True, {}, 50, "", True)
+        self.db.save_result("Summary", 3, 3, True, {}, 20, "", False)
+        self.db.save_result("Summary", 4, 3, True, {}, 70, "", True)
+        self.db.save_result("Summary", 3, 3, False, {}, 5, "", True)  # not completed
+
+        best = self.conn.execute(
+            "SELECT disks, best_time FROM best_times ORDER BY disks").fetchall()
+        self.assertEqual([tuple(row) for row in best], [(3, 20), (4, 70)])
+
+        stats = self.db.get_user_stats("Summary")
+        self.assertEqual(stats['games_played'], 3)
+        self.assertEqual(stats['best_time'], 20)
+        self.assertEqual(stats['correct_predictions'], 2)
+
+        # Rebuilding from the games table gives the same summaries
+        before = [tuple(row) for row in self.conn.execute("SELECT * FROM user_stats")]
+        self.db.rebuild_summaries()
+        after = [tuple(row) for row in self.conn.execute("SELECT * FROM user_stats")]
+        self.assertEqual(before, after)
+
+    def test_get_user_stats_is_read_only(self):
+        """Test that looking up an unknown user does not create it"""
+        stats = self.db.get_user_stats("Nobody")
+        self.assertEqual(stats['games_played'], 0)
+        self.assertIsNone(stats['best_time'])
+        self.assertIsNone(self.conn.execute("SELECT id FROM users WHERE name = 'Nobody'").fetchone())
+
+    def test_user_ids_are_cached(self):
+        """Test that repeat saves and stats lookups skip the users table"""
+        user_id = self.db.get_or_create_user("Cached")
+
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        self.assertEqual(self.db.get_or_create_user("Cached"), user_id)
+        self.db.save_result("Cached", 3, 3, True, {}, 10, "", True)
+        self.db.get_user_stats("Cached")
+        self.conn.set_trace_callback(None)
+        self.assertFalse([sql for sql in statements if "FROM users" in sql or "INTO users" in sql])
+
+        # A rolled back insert never reaches the cache
+        self.db.save_result("Ghost", None, 3, True, {}, 10, "", True)
+        self.assertIsNone(self.db.cached_user_id("Ghost"))
+        self.assertIsNone(self.db.lookup_user_id("Ghost"))
+
+    def test_user_cache_is_bounded(self):
+        """Test that the least recently used names are evicted first"""
+        self.db.USER_CACHE_SIZE = 3
+        for name in ("A", "B", "C"):
+            self.db.get_or_create_user(name)
+        self.db.cached_user_id("A")
+        self.db.get_or_create_user("D")
+        self.assertEqual(list(self.db.user_ids), ["C", "A", "D"])
+
+    def test_summaries_backfilled_on_migration(self):
+        """Test that existing games are summarised when the tables are added"""
+        self.db.save_result("Backfill", 5, 4, True, {}, 33, "", True)
+        self.conn.execute("DROP TABLE user_stats")
+        self.conn.execute("DROP TABLE best_times")
+        self.conn.commit()
+
+        self.db.migrate_schema()
+
+        self.assertEqual(self.db.get_top_scores()[0]['user_time'], 33)
+        self.assertEqual(self.db.get_user_stats("Backfill")['games_played'], 1)
+
+    def test_clones_are_isolated(self):
+        """Test that template clones share the schema but not the data"""
+        self.db.save_result("CloneOnly", 3, 3, True, {}, 10, "", True)
+        other = self.template.clone()
+        try:
+            self.assertEqual(other.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 0)
+            self.assertIn('idx_games_time_page', [row['name'] for row in other.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")])
+        finally:
+            other.close()
+
+    def test_shared_cache_uri(self):
+        """Test that two Database objects can share one named in-memory database"""
+        uri = "file:hanoi_shared_test?mode=memory&cache=shared"
+        first = Database(uri)
+        second = Database(uri)
+        try:
+            first.save_result("Shared", 3, 3, True, {}, 15, "", True)
+            self.assertEqual(second.get_top_scores()[0]['name'], "Shared")
+            self.assertEqual(second.reader_count, 0)
+        finally:
+            second.close()
+            first.close()
+
+
+class FlakyDatabase:
+    """Database stand-in whose first few commits fail"""
+    def __init__(self, db, failures):
+        self.db = db
+        self.failures = failures
+
+    def write_results(self, results):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.db.write_results(results)
+
+
+class TestResultWriter(unittest.TestCase):
+    """Test cases for the write-behind result queue"""
+
+    def setUp(self):
+        self.db = Database(memory=True)
+
+    def tearDown(self):
+        self.db.close()
+
+    def make_result(self, i):
+        return {
+            'name': f"Writer{i % 3}", 'disks': 3, 'pegs': 3, 'completed': True,
+            'times': {'recursive': 0.001}, 'user_time': i, 'user_moves': "", 'is_correct': True
+        }
+
+    def test_results_are_group_committed(self):
+        """Test that queued results are batched and flushed on close"""
+        writer = ResultWriter(self.db, batch_size=50, max_wait=0.2).start()
+        for i in range(120):
+            writer.submit(self.make_result(i))
+
+        self.assertEqual(writer.close(), [])
+        metrics = writer.metrics()
+        self.assertEqual(metrics['committed'], 120)
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertLess(metrics['commits'], 120)
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 120)
+
+    def test_failed_writes_are_retried(self):
+        """Test that a failing commit is retried instead of dropping results"""
+        writer = ResultWriter(FlakyDatabase(self.db, failures=2), retry_delay=0.01).start()
+        for i in range(10):
+            writer.submit(self.make_result(i))
+
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(writer.close(), [])
+        self.assertEqual(writer.metrics()['failures'], 2)
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 10)
+
+    def test_bad_results_are_set_aside(self):
+        """Test that a result that can never be written does not hold up later ones"""
+        writer = ResultWriter(self.db, max_wait=0.2, retry_delay=0.01).start()
+        bad = dict(self.make_result(1), user_moves="A->A")
+        writer.submit(bad)
+        writer.submit(self.make_result(2))
+        writer.submit(self.make_result(3))
+
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 2)
+        self.assertEqual(writer.metrics()['dead_letters'], 1)
+        self.assertIs(writer.dead_letters[0][0], bad)
+        self.assertEqual(writer.close(), [bad])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = save_unwritten([bad], os.path.join(directory, "unsaved.jsonl"))
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line) for line in f], [bad])
+
+    def test_unwritable_results_are_returned(self):
+        """Test that results still failing at shutdown are handed back"""
+        writer = ResultWriter(FlakyDatabase(self.db, failures=10 ** 6), retry_delay=0.01).start()
+        writer.submit(self.make_result(1))
+
+        unwritten = writer.close(timeout=0.2)
+        self.assertEqual(len(unwritten), 1)
+        self.assertEqual(unwritten[0]['user_time'], 1)
+
+
+class TestDatabaseFile(unittest.TestCase):
+    """Test cases that need an on-disk database (WAL and the reader pool)"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.temp_dir.name, "test_hanoi_game.db"))
+        self.conn = self.db.conn
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_wal_and_reader_pool(self):
+        """Test WAL journaling and that pooled readers see committed writes"""
+        mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        self.assertEqual(self.db.reader_count, Database.READER_POOL_SIZE)
+
+        with self.db.reader() as reader:
+            self.assertIsNot(reader, self.conn)
+            with self.assertRaises(sqlite3.OperationalError):
+                reader.execute("INSERT INTO users (name) VALUES ('ReadOnly')")
+
+        self.db.save_result("Reader", 3, 3, True, {'recursive': 0.001}, 12, "", True)
+        self.assertEqual(self.db.get_top_scores()[0]['name'], "Reader")
+
+    def test_concurrent_writes_and_reads(self):
+        """Test that worker threads can write while others read"""
+        errors = []
+
+        def writer(i):
+            for j in range(20):
+                if not self.db.save_result(f"Thread{i}", 3, 3, True, {'recursive': 0.001}, j, "", True):
+                    errors.append((i, j))
+
+        def reader():
+            for _ in range(20):
+                self.db.get_top_scores()
+                self.db.get_algorithm_stats()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        threads += [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0], 80)
+
+    def test_user_cache_invalidated_by_other_connections(self):
+        """Test that users recreated by another process are not resolved to stale ids"""
+        old_id = self.db.get_or_create_user("Shared")
+        self.assertEqual(self.db.lookup_user_id("Shared"), old_id)
+
+        # Another process replaces the user, giving it a new id
+        other = sqlite3.connect(self.db.path)
+        other.execute("DELETE FROM users WHERE name = 'Shared'")
+        other.execute("INSERT INTO users (name) VALUES ('Shared')")
+        other.commit()
+        new_id = other.execute("SELECT id FROM users WHERE name = 'Shared'").fetchone()[0]
+        other.close()
+
+        self.assertNotEqual(old_id, new_id)
+        self.assertEqual(self.db.lookup_user_id("Shared"), new_id)
+        self.assertEqual(self.db.get_or_create_user("Shared"), new_id)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import random
+import unittest
+from frame_benchmark import benchmark_states, build_report
+from ui import stack_strip_spans
+
+
+class TestFrameBenchmark(unittest.TestCase):
+    """Test cases for the frame benchmark and the raster stack layout"""
+
+    def test_benchmark_states(self):
+        """Test that every frame holds all disks, stacked largest first, one move apart"""
+        states = list(benchmark_states(50, 3, 10, random.Random(1)))
+        self.assertEqual(len(states), 10)
+        for state in states:
+            self.assertEqual(set(state), {"A", "B", "C"})
+            self.assertEqual(sorted(d for stack in state.values() for d in stack), list(range(1, 51)))
+            for stack in state.values():
+                self.assertEqual(stack, sorted(stack, reverse=True))
+        for before, after in zip(states, states[1:]):
+            changed = [name for name in before if before[name] != after[name]]
+            self.assertEqual(len(changed), 2)
+
+    def test_strip_spans(self):
+        """Test that thick disks get one row band each and thin disks share rows"""
+        height, spans = stack_strip_spans([3, 2, 1], 100, 10, lambda size: size * 20)
+        self.assertEqual(height, 30)
+        self.assertEqual(spans, [(3, 20, 20, 81, 30), (2, 30, 10, 71, 20), (1, 40, 0, 61, 10)])
+
+        stack = list(range(1000, 0, -1))
+        height, spans = stack_strip_spans(stack, 200, 0.25, lambda size: size / 5)
+        self.assertEqual(height, 250)
+        self.assertEqual(len(spans), 250)
+        self.assertEqual([span[0] for span in spans], stack[::4])
+        for (_, _, y0, _, y1), (_, _, _, _, next_y1) in zip(spans, spans[1:]):
+            self.assertEqual(y1 - y0, 1)
+            self.assertEqual(next_y1, y0)
+        self.assertTrue(all(0 <= x0 < x1 <= 200 for _, x0, _, x1, _ in spans))
+
+        self.assertEqual(stack_strip_spans([], 100, 10, lambda size: size), (1, []))
+
+    def test_build_report(self):
+        """Test that the first frame is kept out of the mean and budget check"""
+        results = [
+            {"disks": 20, "detail_level": "detailed", "items": 90, "frame_ms": [40.0, 2.0, 4.0]},
+            {"disks": 1000, "detail_level": "raster", "items": 12, "frame_ms": [90.0, 10.0, 30.0]},
+            {"disks": 60, "detail_level": "simple", "items": 70, "frame_ms": [5.0]}
+        ]
+        report = build_report(results, budget_ms=16)
+        self.assertEqual(report["budget_ms"], 16)
+        small, large, single = report["sizes"]
+        self.assertEqual((small["first_ms"], small["mean_ms"], small["max_ms"]), (40.0, 3.0, 4.0))
+        self.assertTrue(small["within_budget"])
+        self.assertEqual(large["detail_level"], "raster")
+        self.assertEqual(large["mean_ms"], 20.0)
+        self.assertFalse(large["within_budget"])
+        self.assertEqual(single["mean_ms"], 5.0)
+        self.assertIn("timestamp", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,260 @@
+import os
+import tempfile
+import time
+import unittest
+from game_engine import GameEngine, GameReplay, SessionRandom, solution_moves, verify_moves, layout_positions, position_solution, time_algorithms, max_search_disks, MOVE, INVALID_MOVE, WON, LOST
+from hanoi_algorithms import NibblePatternDatabase, PositionSolver, nibble_pattern_database, pattern_database_path, PDB_DIRECTORY
+from move_codec import encode_events, decode_events
+
+
+class FakeClock:
+    """Manually advanced clock for game duration tests"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestGameEngine(unittest.TestCase):
+    """Test cases for the headless game rules"""
+
+    def setUp(self):
+        self.events = []
+        self.engine = GameEngine(3, 3)
+        self.engine.subscribe(lambda event, data: self.events.append((event, data)))
+
+    def test_initial_state(self):
+        """Test that every disk starts on peg A"""
+        self.assertEqual(self.engine.pegs, {'A': [3, 2, 1], 'B': [], 'C': []})
+        self.assertEqual(self.engine.target, 'C')
+        self.assertEqual(self.engine.min_moves, 7)
+        self.assertTrue(self.engine.is_active)
+
+    def test_illegal_moves_are_rejected(self):
+        """Test that rule violations leave the state untouched"""
+        self.assertTrue(self.engine.apply_move('A', 'C'))
+        self.assertFalse(self.engine.apply_move('A', 'C'))
+        self.assertEqual(self.engine.last_error, "larger disk on smaller disk")
+        self.assertFalse(self.engine.apply_move('B', 'C'))
+        self.assertEqual(self.engine.last_error, "source peg is empty")
+        self.assertFalse(self.engine.apply_move('A', 'E'))
+
+        self.assertEqual(self.engine.pegs, {'A': [3, 2], 'B': [], 'C': [1]})
+        self.assertEqual(self.engine.moves, [('A', 'C')])
+        self.assertEqual([event for event, _ in self.events], [MOVE, INVALID_MOVE, INVALID_MOVE, INVALID_MOVE])
+
+    def test_minimum_solution_wins(self):
+        """Test that solving in the minimum number of moves wins"""
+        applied = self.engine.play(solution_moves(3, 3))
+        self.assertEqual(applied, 7)
+        self.assertEqual(self.engine.state, "won")
+        self.assertEqual(self.events[-1], (WON, {'moves': 7}))
+
+        # No moves are accepted once the game is over
+        self.assertFalse(self.engine.apply_move('C', 'A'))
+
+    def test_extra_moves_lose(self):
+        """Test that solving with more than the minimum number of moves loses"""
+        self.engine.play([('A', 'B'), ('B', 'A')])
+        self.engine.play(solution_moves(3, 3))
+        self.assertEqual(self.engine.state, "lost")
+        self.assertEqual(self.events[-1], (LOST, {'moves': 9}))
+
+    def test_four_peg_game(self):
+        """Test that four peg games end on peg D"""
+        engine = GameEngine(5, 4)
+        self.assertEqual(engine.target, 'D')
+        engine.play(solution_moves(5, 4))
+        self.assertTrue(engine.check_win())
+        self.assertFalse(engine.is_active)
+
+    def test_hints_follow_the_solution(self):
+        """Test that hints walk through the reference solution"""
+        hints = [self.engine.next_hint() for _ in range(8)]
+        self.assertEqual(hints[:7], list(solution_moves(3, 3)))
+        self.assertIsNone(hints[7])
+
+    def test_validate_sequence(self):
+        """Test the checks on a typed move sequence"""
+        self.assertTrue(self.engine.validate_sequence(""))
+        self.assertTrue(self.engine.validate_sequence("A->C, A->B"))
+        self.assertIn("Invalid peg", self.engine.validate_sequence("A->D"))
+        self.assertIn("same source", self.engine.validate_sequence("A->A"))
+        self.assertIn("empty", self.engine.validate_sequence("A->C,,A->B"))
+
+    def test_result_record(self):
+        """Test the record handed to the database after a game"""
+        clock = FakeClock()
+        engine = GameEngine(3, 3, clock=clock)
+        engine.start()
+        clock.now += 12.5
+        engine.play(solution_moves(3, 3))
+        clock.now += 100
+
+        prediction = "A->C,A->B,C->B,A->C,B->A,B->C,A->C"
+        times, note = time_algorithms(3, 3)
+        record = engine.result_record("Bot", prediction, times, note)
+        self.assertEqual(record['user_time'], 12)
+        self.assertTrue(record['is_correct'])
+        self.assertTrue(record['completed'])
+        self.assertEqual(record['actual_moves'], prediction)
+        self.assertEqual(record['min_moves'], 7)
+        self.assertIsNone(record['times']['frame_stewart'])
+
+        self.assertFalse(engine.result_record("Bot", "A->C")['is_correct'])
+
+    def test_events_are_recorded(self):
+        """Test the timestamped log of moves and hints"""
+        clock = FakeClock()
+        engine = GameEngine(3, 3, clock=clock)
+        clock.now += 1.5
+        engine.apply_move('A', 'C')
+        clock.now += 0.25
+        engine.next_hint()
+        clock.now += 2
+        engine.apply_move('A', 'B')
+
+        self.assertEqual(engine.events, [
+            ('move', 'A', 'C', 1.5), ('hint', None, None, 1.75), ('move', 'A', 'B', 3.75)
+        ])
+        blob, count = encode_events(engine.events)
+        self.assertEqual(count, 3)
+        self.assertLessEqual(len(blob), 1 + 3 * 3)  # header + code byte and 2-byte delta each
+        self.assertEqual(decode_events(blob), engine.events)
+
+    def test_replay_seeks_from_snapshots(self):
+        """Test that every replay position matches playing the moves from the start"""
+        moves = list(solution_moves(6, 4))
+        events = [('move', source, target, i * 0.5) for i, (source, target) in enumerate(moves, start=1)]
+        events.insert(10, ('hint', None, None, 5.2))
+        replay = GameReplay(6, 4, events, snapshot_interval=8)
+        self.assertEqual(len(replay.snapshots), len(moves) // 8 + 1)
+
+        engine = GameEngine(6, 4)
+        for index in range(len(moves) + 1):
+            self.assertEqual(replay.state_at(index), engine.pegs, f"after {index} moves")
+            if index < len(moves):
+                engine.apply_move(*moves[index])
+
+        self.assertEqual(replay.index_at(5.2), 10)
+        self.assertEqual(replay.hints_before(10), 0)
+        self.assertEqual(replay.hints_before(11), 1)
+        self.assertEqual(replay.time_at(len(moves)), replay.duration)
+
+        with self.assertRaises(ValueError):
+            GameReplay(3, 3, [('move', 'B', 'C', 0.0)])
+
+    def test_rule_variants(self):
+        """Test that cyclic and adjacent games reject the moves their rules forbid"""
+        cyclic = GameEngine(3, 3, rules="cyclic")
+        self.assertEqual(cyclic.min_moves, 21)
+        self.assertFalse(cyclic.apply_move('A', 'C'))
+        self.assertEqual(cyclic.last_error, "cyclic rules only allow moves to the next peg")
+        self.assertEqual(cyclic.play(solution_moves(3, 3, "cyclic")), 21)
+        self.assertEqual(cyclic.state, "won")
+
+        adjacent = GameEngine(2, 3, rules="adjacent")
+        self.assertFalse(adjacent.apply_move('A', 'C'))
+        self.assertEqual([adjacent.next_hint() for _ in range(3)], [('A', 'B'), ('B', 'C'), ('A', 'B')])
+        self.assertTrue(adjacent.apply_move('A', 'B'))
+        self.assertTrue(adjacent.apply_move('B', 'C'))
+
+        self.assertFalse(verify_moves(solution_moves(3, 3), 3, 3, "adjacent")['valid'])
+        self.assertTrue(verify_moves(solution_moves(4, 3, "adjacent"), 4, 3, "adjacent")['optimal'])
+        with self.assertRaises(ValueError):
+            GameEngine(3, 4, rules="adjacent")
+
+    def test_custom_layouts(self):
+        """Test games that start and end in other positions than a single tower"""
+        start, goal = layout_positions("swap", 4, 4, None)
+        self.assertEqual((start, goal), ((3, 0, 3, 0), (0, 3, 0, 3)))
+        engine = GameEngine(4, 4, start=start, goal=goal)
+        self.assertEqual(engine.pegs, {'A': [4, 2], 'B': [], 'C': [], 'D': [3, 1]})
+        self.assertFalse(engine.check_win())
+
+        hints = [engine.next_hint() for _ in range(engine.min_moves)]
+        self.assertEqual(engine.play(hints), engine.min_moves)
+        self.assertEqual(engine.pegs, engine.goal_pegs)
+        self.assertEqual(engine.state, "won")
+        self.assertEqual(engine.result_record("Swap")['start_position'], "DADA")
+
+        replay = GameReplay(4, 4, engine.events, start=start)
+        self.assertEqual(replay.state_at(0), GameEngine(4, 4, start=start, goal=goal).pegs)
+        self.assertEqual(replay.state_at(len(replay)), engine.goal_pegs)
+
+        # The same seed spreads the disks the same way
+        first = layout_positions("spread", 6, 3, SessionRandom(7).stream("setup"))
+        self.assertEqual(first, layout_positions("spread", 6, 3, SessionRandom(7).stream("setup")))
+        self.assertEqual(first[1], (2,) * 6)
+        self.assertGreater(GameEngine(6, 3, start=first[0], goal=first[1]).min_moves, 0)
+
+        # Starting a big 3-peg layout counts its moves without building the solution
+        position_solution.cache_clear()
+        start, goal = layout_positions("swap", 20, 3, None)
+        engine = GameEngine(20, 3, start=start, goal=goal)
+        self.assertEqual(position_solution.cache_info().misses, 0)
+        self.assertGreater(engine.min_moves, 2 ** 19)
+        small = GameEngine(12, 3, start=start[:12], goal=goal[:12])
+        self.assertEqual(small.min_moves, len(small.reference_solution()))
+
+        with self.assertRaises(ValueError):
+            GameEngine(2, 3, start=(0, 3), goal=(2, 2))
+        with self.assertRaises(ValueError):
+            GameEngine(2, 3, rules="cyclic", start=(0, 1), goal=(2, 2))
+
+    def test_spread_layouts_use_stored_databases(self):
+        """Test that hints for a layout gathered on one peg search with pdb_tool's files"""
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                os.mkdir(PDB_DIRECTORY)
+                for disks in (2, 6):
+                    NibblePatternDatabase.build(4, disks).save(pattern_database_path(PDB_DIRECTORY, 4, disks))
+                start, goal = layout_positions("spread", 8, 4, SessionRandom(3).stream("setup"))
+                position_solution.cache_clear()
+                nibble_pattern_database.cache_clear()
+                engine = GameEngine(8, 4, start=start, goal=goal)
+                self.assertEqual(nibble_pattern_database.cache_info().currsize, 2)
+                self.assertEqual(engine.min_moves, len(PositionSolver(goal, 4).solve(start)))
+                engine.play(engine.reference_solution())
+                self.assertEqual(engine.state, "won")
+
+                # Only the presence of a larger file raises the disk limit, and only for "spread"
+                self.assertEqual(max_search_disks(4, "spread"), max_search_disks(4, "swap"))
+                open(pattern_database_path(PDB_DIRECTORY, 4, 12), "wb").close()
+                self.assertEqual(max_search_disks(4, "spread"), 13)
+                self.assertEqual(max_search_disks(4, "swap"), 10)
+            finally:
+                nibble_pattern_database.cache_clear()
+                position_solution.cache_clear()
+                os.chdir(cwd)
+
+    def test_session_random_is_reproducible(self):
+        """Test that a seed fixes every stream and streams do not disturb each other"""
+        first, second = SessionRandom(42), SessionRandom(42)
+        disks = [first.disk_count() for _ in range(20)]
+
+        # Drawing from another subsystem first must not change the game setup
+        second.stream("effects").random()
+        self.assertEqual([second.disk_count() for _ in range(20)], disks)
+        self.assertTrue(all(5 <= n <= 10 for n in disks))
+        self.assertNotEqual(first.stream("background").random(), first.stream("effects").random())
+        self.assertIsInstance(SessionRandom().seed, int)
+
+    def test_simulation_throughput(self):
+        """Test that bots can play thousands of games per second without a window"""
+        solution = solution_moves(4, 3)
+        games = 5000
+        start = time.perf_counter()
+        for _ in range(games):
+            engine = GameEngine(4, 3)
+            engine.play(solution)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(engine.state, "won")
+        self.assertGreater(games / elapsed, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,14 @@
 import unittest
 from hanoi_algorithms import recursive_hanoi, iterative_hanoi, frame_stewart, calculate_min_moves
+from hanoi_algorithms import recursive_hanoi_moves, iterative_hanoi_moves, frame_stewart_moves
+from hanoi_algorithms import cyclic_hanoi_moves, adjacent_hanoi_moves, cyclic_min_moves, adjacent_min_moves
+from hanoi_algorithms import variant_min_moves, solve_position, position_distance, pack_state, unpack_state, position_moves
+from hanoi_algorithms import PositionSolver, TranspositionTable, PatternDatabase
+from hanoi_algorithms import NibblePatternDatabase, pattern_database_path
+import os
+import tempfile
+import random
+from collections import deque
 import sys
 
 class TestHanoiAlgorithms(unittest.TestCase):
@@ -145,7 +154,7 @@ class TestHanoiAlgorithms(unittest.TestCase):
         # Edge case
         print("  Testing invalid peg count (expecting ValueError)")
         with self.assertRaises(ValueError):
-            calculate_min_moves(3, 5)  # Only 3 or 4 pegs supported
+            calculate_min_moves(3, 11)  # Only 3 to 10 pegs supported
         print("✓ Test passed!")
 
     def test_valid_moves(self):
@@ -184,6 +193,193 @@ class TestHanoiAlgorithms(unittest.TestCase):
         print("✓ Test passed!")
 
 
+    def test_streaming_solvers_match(self):
+        """Test that the streaming solvers yield the same moves as the list versions"""
+        for n in range(0, 11):
+            self.assertEqual(list(recursive_hanoi_moves(n, 'A', 'C', 'B')), recursive_hanoi(n, 'A', 'C', 'B'))
+            self.assertEqual(list(iterative_hanoi_moves(n, 'A', 'C', 'B')), iterative_hanoi(n, 'A', 'C', 'B'))
+            self.assertEqual(list(frame_stewart_moves(n, ['A', 'B', 'C', 'D'], 'A', 'D')),
+                             frame_stewart(n, ['A', 'B', 'C', 'D'], 'A', 'D'))
+        print("✓ Test passed!")
+
+    def test_many_pegs_are_optimal(self):
+        """Test that Frame-Stewart reaches the minimum for every supported peg count"""
+        from game_engine import verify_moves
+        for pegs in range(4, 11):
+            names = [chr(65 + i) for i in range(pegs)]
+            for n in range(0, 13):
+                moves = frame_stewart(n, names, 'A', names[-1])
+                self.assertEqual(len(moves), calculate_min_moves(n, pegs))
+                self.assertEqual(list(frame_stewart_moves(n, names, 'A', names[-1])), moves)
+            self.assertTrue(verify_moves(moves, 12, pegs)['optimal'])
+
+        # Known Frame-Stewart values; more pegs never need more moves
+        self.assertEqual([calculate_min_moves(n, 4) for n in range(1, 11)], [1, 3, 5, 9, 13, 17, 25, 33, 41, 49])
+        self.assertEqual(calculate_min_moves(10, 5), 31)
+        for n in range(1, 30):
+            counts = [calculate_min_moves(n, pegs) for pegs in range(3, 11)]
+            self.assertEqual(counts, sorted(counts, reverse=True))
+
+        # 64 disks on 10 pegs is generated instantly
+        names = [chr(65 + i) for i in range(10)]
+        self.assertEqual(len(frame_stewart(64, names, 'A', 'J')), calculate_min_moves(64, 10))
+        print("✓ Test passed!")
+
+    def test_rule_variants_are_optimal(self):
+        """Test the cyclic and adjacent solvers against a breadth-first search"""
+        allowed = {
+            'cyclic': lambda a, b: (b - a) % 3 == 1,
+            'adjacent': lambda a, b: abs(b - a) == 1
+        }
+
+        def shortest(n, rule):
+            """Length of the shortest legal solution, found by BFS over disk positions"""
+            start, goal = (0,) * n, (2,) * n
+            distance = {start: 0}
+            queue = deque([start])
+            while queue:
+                state = queue.popleft()
+                if state == goal:
+                    return distance[state]
+                tops = {}
+                for disk in reversed(range(n)):
+                    tops[state[disk]] = disk
+                for peg, disk in tops.items():
+                    for target in range(3):
+                        if target != peg and rule(peg, target) and tops.get(target, n) > disk:
+                            moved = state[:disk] + (target,) + state[disk + 1:]
+                            if moved not in distance:
+                                distance[moved] = distance[state] + 1
+                                queue.append(moved)
+
+        def play(moves, n, rule):
+            pegs = {'A': list(range(n, 0, -1)), 'B': [], 'C': []}
+            for source, target in moves:
+                self.assertTrue(rule('ABC'.index(source), 'ABC'.index(target)), (source, target))
+                self.assertTrue(not pegs[target] or pegs[target][-1] > pegs[source][-1])
+                pegs[target].append(pegs[source].pop())
+            return pegs['C'] == list(range(n, 0, -1))
+
+        for n in range(0, 7):
+            cyclic = list(cyclic_hanoi_moves(n, ['A', 'B', 'C'], 'A', 'C'))
+            adjacent = list(adjacent_hanoi_moves(n, 'A', 'C', 'B'))
+            self.assertTrue(play(cyclic, n, allowed['cyclic']))
+            self.assertTrue(play(adjacent, n, allowed['adjacent']))
+            self.assertEqual(len(cyclic), cyclic_min_moves(n))
+            self.assertEqual(len(cyclic), shortest(n, allowed['cyclic']))
+            self.assertEqual(len(adjacent), adjacent_min_moves(n))
+            self.assertEqual(len(adjacent), shortest(n, allowed['adjacent']))
+            # One step clockwise is the shorter Q sequence
+            self.assertEqual(len(list(cyclic_hanoi_moves(n, ['A', 'B', 'C'], 'A', 'B'))), cyclic_min_moves(n, 1))
+
+        self.assertEqual([cyclic_min_moves(n) for n in range(1, 7)], [2, 7, 21, 59, 163, 447])
+        self.assertEqual(variant_min_moves(25, 3, "adjacent"), 3 ** 25 - 1)
+        with self.assertRaises(ValueError):
+            variant_min_moves(3, 4, "cyclic")
+        with self.assertRaises(ValueError):
+            variant_min_moves(3, 3, "diagonal")
+        print("✓ Test passed!")
+
+    def test_position_search_is_optimal(self):
+        """Test searches between arbitrary positions against breadth-first distances"""
+        def distances(goal, pegs):
+            n = len(goal)
+            start = pack_state(goal, pegs)
+            found = {start: 0}
+            queue = deque([start])
+            while queue:
+                state = queue.popleft()
+                for disk, source, target in position_moves(unpack_state(state, n, pegs), pegs):
+                    moved = state + (target - source) * pegs ** disk
+                    if moved not in found:
+                        found[moved] = found[state] + 1
+                        queue.append(moved)
+            return found
+
+        def play(moves, start, pegs):
+            positions = list(start)
+            for source, target in moves:
+                disk = positions.index(source)
+                self.assertNotIn(target, positions[:disk])
+                positions[disk] = target
+            return positions
+
+        rng = random.Random(1)
+        for pegs, max_disks in ((3, 6), (4, 5), (5, 4)):
+            for n in range(1, max_disks + 1):
+                goal = [rng.randrange(pegs) for _ in range(n)]
+                exact = distances(goal, pegs)
+                for _ in range(10):
+                    start = [rng.randrange(pegs) for _ in range(n)]
+                    # A small group size and table force several databases and evictions
+                    moves = solve_position(start, goal, pegs, group_size=2, max_table_entries=64)
+                    self.assertEqual(play(moves, start, pegs), goal)
+                    self.assertEqual(len(moves), exact[pack_state(start, pegs)], (start, goal))
+                    self.assertEqual(position_distance(start, goal, pegs), len(moves))
+
+        # Classic games match the closed forms
+        self.assertEqual(len(solve_position([0] * 12, [2] * 12, 3)), 4095)
+        self.assertEqual(len(solve_position([0] * 9, [3] * 9, 4)), calculate_min_moves(9, 4))
+
+        table = TranspositionTable(max_entries=2)
+        self.assertTrue(table.improve(1, 5))
+        self.assertFalse(table.improve(1, 6))
+        self.assertTrue(table.improve(2, 1))
+        self.assertTrue(table.improve(3, 1))
+        self.assertEqual(len(table), 2)
+        self.assertIsNone(table.get(1))
+        with self.assertRaises(ValueError):
+            PositionSolver([3, 3], 4).solve([0, 4])
+        print("✓ Test passed!")
+
+    def test_nibble_pattern_databases(self):
+        """Test stored distances mod 16, their exact recovery and mapped-file searches"""
+        print("\nTesting nibble pattern databases...")
+        for pegs, disks in ((3, 7), (4, 6)):
+            database = NibblePatternDatabase.build(pegs, disks)
+            exact = PatternDatabase(pegs, [pegs - 1] * disks).distances
+            self.assertGreater(max(exact), 16)
+            for index in range(database.states):
+                self.assertEqual(database.nibble(index), exact[index] % 16)
+            for index in range(0, database.states, 7):
+                self.assertEqual(database.distance(index), exact[index])
+
+        with tempfile.TemporaryDirectory() as directory:
+            for disks in (2, 6):
+                NibblePatternDatabase.build(4, disks).save(pattern_database_path(directory, 4, disks))
+            mapped = NibblePatternDatabase.open(pattern_database_path(directory, 4, 6))
+            self.assertEqual((mapped.pegs, mapped.disks), (4, 6))
+            self.assertEqual(bytes(mapped.data[mapped.offset:]), bytes(database.data))
+            mapped.close()
+
+            rng = random.Random(2)
+            for _ in range(5):
+                start = [rng.randrange(4) for _ in range(8)]
+                target = rng.randrange(4)
+                solver = PositionSolver([target] * 8, 4, directory=directory, max_table_entries=1024)
+                self.assertEqual(solver.group_size, 6)
+                self.assertIsInstance(solver.groups[0][2], NibblePatternDatabase)
+                moves = solver.solve(start)
+                self.assertEqual(len(moves), len(PositionSolver([target] * 8, 4).solve(start)))
+                positions = list(start)
+                for disk, source, to in moves:
+                    self.assertEqual(positions[disk], source)
+                    self.assertNotIn(source, positions[:disk])
+                    self.assertNotIn(to, positions[:disk])
+                    positions[disk] = to
+                self.assertEqual(positions, [target] * 8)
+            self.assertIsNone(PositionSolver([3] * 8, 4, directory=directory, max_expanded=1).solve([0] * 8))
+            # Goals spread over several pegs cannot use the files
+            self.assertIsInstance(PositionSolver([3] * 7 + [0], 4, directory=directory).groups[0][2],
+                                  PatternDatabase)
+
+            path = os.path.join(directory, "bad.pdb")
+            with open(path, "wb") as f:
+                f.write(b"not a database")
+            with self.assertRaises(ValueError):
+                NibblePatternDatabase.open(path)
+        print("✓ Test passed!")
+
 def get_test_runner():
     """Return a test runner with verbose output"""
     return unittest.TextTestRunner(verbosity=2, stream=sys.stdout)
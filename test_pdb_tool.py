@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+import pdb_tool
+from game_engine import verify_moves
+from hanoi_algorithms import pattern_database_path
+from move_codec import parse_moves
+
+
+class TestPatternDatabaseTool(unittest.TestCase):
+    """Test cases for python -m pdb_tool"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            code = pdb_tool.main(list(argv))
+        return code, out.getvalue()
+
+    def test_build_solve_and_bench(self):
+        """Test building database files and solving from them"""
+        directory = self.temp_dir.name
+        code, out = self.run_cli("build", "--disks", "2-5", "--dir", directory)
+        self.assertEqual(code, 0)
+        self.assertEqual(out.split("\n")[4].split("\t")[:4], ["4", "5", "1024", str(8 + 512)])
+        self.assertTrue(os.path.exists(pattern_database_path(directory, 4, 5)))
+
+        # Seven disks stacked on A, gathered on D like a classic 4-peg game
+        code, out = self.run_cli("solve", "AAAAAAA", "--dir", directory)
+        self.assertEqual(code, 0)
+        report = verify_moves(parse_moves(out.strip()), 7, 4)
+        self.assertTrue(report['optimal'])
+
+        code, out = self.run_cli("solve", "DDDDDDA", "--target", "A", "--dir", directory)
+        self.assertEqual(len(out.strip().split(",")), 17)  # Six disks from D to A over the largest
+
+        # 16 moves into the 33-move classic game
+        code, out = self.run_cli("bench", "--disks", "8", "--samples", "2", "--progress", "0.5", "--dir", directory)
+        self.assertEqual(code, 0)
+        rows = [line.split("\t") for line in out.strip().split("\n")[1:]]
+        self.assertEqual([row[1:4] for row in rows], [["5", "0", "17"], ["5", "1", "17"]])
+
+    def test_bad_arguments(self):
+        """Test that bad pegs and targets are reported, and that searches can give up"""
+        self.assertEqual(self.run_cli("build", "--pegs", "11", "--disks", "2")[0], 2)
+        self.assertEqual(self.run_cli("solve", "AAA", "--target", "Q", "--dir", self.temp_dir.name)[0], 2)
+        self.assertEqual(self.run_cli("solve", "AAAAAA", "--max-expanded", "1", "--dir", self.temp_dir.name)[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import unittest
+from database import Database, ResultWriter
+from game_engine import solution_moves
+from server import HanoiServer, run_load, percentile
+
+
+class TestHanoiServer(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the tournament server protocol"""
+
+    async def asyncSetUp(self):
+        self.db = Database(memory=True)
+        self.writer = ResultWriter(self.db).start()
+        self.server = HanoiServer(self.db, self.writer, players_per_match=2, match_wait=0.05)
+        await self.server.start("127.0.0.1", 0)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.writer.close()
+        self.db.close()
+
+    async def connect(self):
+        return await asyncio.open_connection("127.0.0.1", self.server.port)
+
+    async def request(self, connection, message):
+        """Send a request and return (reply, messages pushed before it)"""
+        reader, writer = connection
+        writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+        pushed = []
+        while True:
+            reply = json.loads(await reader.readline())
+            if 'id' not in reply:
+                pushed.append(reply)
+            elif reply['id'] == message['id']:
+                return reply, pushed
+
+    async def test_race_between_two_players(self):
+        """Test matchmaking, move replies, standings and the saved result"""
+        alice, bob = await self.connect(), await self.connect()
+        await self.request(alice, {'id': 1, 'op': 'hello', 'name': "alice"})
+        await self.request(bob, {'id': 1, 'op': 'hello', 'name': "bob"})
+        reply, _ = await self.request(alice, {'id': 2, 'op': 'join', 'disks': 3, 'pegs': 3})
+        self.assertEqual(reply['op'], 'queued')
+        reply, pushed = await self.request(bob, {'id': 2, 'op': 'join', 'disks': 3, 'pegs': 3})
+        self.assertEqual(pushed[0]['op'], 'start')
+        self.assertEqual(pushed[0]['players'], ["alice", "bob"])
+        self.assertEqual(pushed[0]['min_moves'], 7)
+
+        reply, _ = await self.request(alice, {'id': 3, 'op': 'move', 'source': 'B', 'target': 'C'})
+        self.assertFalse(reply['ok'])
+        self.assertEqual(reply['error'], "source peg is empty")
+
+        for i, (source, target) in enumerate(solution_moves(3, 3), start=4):
+            reply, _ = await self.request(alice, {'id': i, 'op': 'move', 'source': source, 'target': target})
+        self.assertEqual(reply['state'], "won")
+
+        # Bob hears about Alice finishing with his next reply
+        reply, pushed = await self.request(bob, {'id': 3, 'op': 'move', 'source': 'A', 'target': 'C'})
+        self.assertTrue(reply['ok'])
+        standings = [message for message in pushed if message['op'] == 'standings']
+        self.assertEqual(standings[-1]['standings'][0]['name'], "alice")
+
+        self.writer.flush()
+        reply, _ = await self.request(bob, {'id': 4, 'op': 'leaderboard', 'disks': 3})
+        self.assertEqual([row['name'] for row in reply['rows']], ["alice"])
+        reply, _ = await self.request(bob, {'id': 5, 'op': 'leaderboard', 'limit': -5})
+        self.assertEqual(len(reply['rows']), 1)
+
+        for _, writer in (alice, bob):
+            writer.close()
+
+    async def test_lone_player_starts_after_waiting(self):
+        """Test that a player without opponents races alone after the wait"""
+        connection = await self.connect()
+        await self.request(connection, {'id': 1, 'op': 'hello', 'name': "solo"})
+        await self.request(connection, {'id': 2, 'op': 'join', 'disks': 2, 'pegs': 4})
+        start = json.loads(await connection[0].readline())
+        self.assertEqual(start['op'], 'start')
+        self.assertEqual(start['players'], ["solo"])
+        connection[1].close()
+
+    async def test_bad_requests(self):
+        """Test that malformed or out-of-order requests get an error reply"""
+        connection = await self.connect()
+        reply, _ = await self.request(connection, {'id': 1, 'op': 'join'})
+        self.assertEqual(reply['error'], "Say hello first")
+        reply, _ = await self.request(connection, {'id': 2, 'op': 'hello', 'name': ""})
+        self.assertFalse(reply['ok'])
+        await self.request(connection, {'id': 3, 'op': 'hello', 'name': "x"})
+        reply, _ = await self.request(connection, {'id': 4, 'op': 'join', 'disks': 3, 'pegs': 11})
+        self.assertFalse(reply['ok'])
+        reply, _ = await self.request(connection, {'id': 5, 'op': 'move', 'source': 'A', 'target': 'B'})
+        self.assertEqual(reply['error'], "Not in a game")
+        reply, _ = await self.request(connection, {'id': 6, 'op': 'dance'})
+        self.assertIn("Unknown op", reply['error'])
+
+        connection[1].write(b"not json\n")
+        reply = json.loads(await connection[0].readline())
+        self.assertFalse(reply['ok'])
+        connection[1].close()
+
+    async def test_load_generator(self):
+        """Test that many simulated clients all finish their races"""
+        report = await run_load(50, self.connect, disks=3, pegs=3)
+        self.assertEqual(report['failures'], 0, report['first_failure'])
+        self.assertEqual(report['moves'], 50 * 7)
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
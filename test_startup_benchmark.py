@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+from startup_benchmark import parse_importtime, build_report, write_report, PhaseTimer
+
+IMPORTTIME_STDERR = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       310 |        950 |     encodings
+import time:      1500 |       4200 | tkinter
+import time:        80 |       6400 | main
+import time: garbled line
+Traceback-like noise that is not importtime output
+"""
+
+
+class TestStartupBenchmark(unittest.TestCase):
+    """Test cases for the startup benchmark report"""
+
+    def test_parse_importtime(self):
+        """Test that module timings and nesting depth are read, and other lines skipped"""
+        modules = parse_importtime(IMPORTTIME_STDERR)
+        self.assertEqual(set(modules), {"_io", "encodings", "tkinter", "main"})
+        self.assertEqual(modules["tkinter"], {"self_us": 1500, "cumulative_us": 4200, "depth": 0})
+        self.assertEqual(modules["_io"]["depth"], 1)
+        self.assertEqual(modules["encodings"]["depth"], 2)
+        self.assertEqual(parse_importtime(""), {})
+
+    def test_build_report(self):
+        """Test the totals and the tracked-module summary"""
+        report = build_report(parse_importtime(IMPORTTIME_STDERR), {"tk_root": 12.5}, None)
+        self.assertEqual(report["import_total_ms"], 6.4)
+        self.assertEqual(report["imports_ms"], {"tkinter": 4.2})
+        self.assertEqual(report["phases_ms"], {"tk_root": 12.5})
+        self.assertIsNone(report["audio_setup_ms"])
+
+        timer = PhaseTimer()
+        with timer.phase("setup"):
+            pass
+        timer.mark("first_idle")
+        self.assertEqual(set(timer.phases), {"setup", "first_idle"})
+
+    def test_write_report(self):
+        """Test that .json is overwritten and .jsonl appended one line per run"""
+        report = build_report({}, {}, 1.5)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.json")
+            write_report(report, path)
+            write_report(report, path)
+            with open(path) as f:
+                self.assertEqual(json.load(f), report)
+
+            path = os.path.join(temp_dir, "report.jsonl")
+            write_report(report, path)
+            write_report(dict(report, audio_setup_ms=2.0), path)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual([line["audio_setup_ms"] for line in lines], [1.5, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
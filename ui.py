@@ -3,6 +3,96 @@ from tkinter import ttk, simpledialog
 import time
 import math
 import random
+from functools import lru_cache
+
+
+ALGORITHM_COLORS = {
+    'recursive': "#4CAF50",
+    'iterative': "#2196F3",
+    'frame_stewart': "#9C27B0"
+}
+
+ALGORITHM_DISPLAY_NAMES = {
+    'recursive': "Recursive",
+    'iterative': "Iterative",
+    'frame_stewart': "Frame-Stewart"
+}
+
+
+def get_algorithm_color(alg_name):
+    """Return the chart color used for an algorithm"""
+    return ALGORITHM_COLORS.get(alg_name, "#666666")
+
+
+def get_algorithm_display_name(alg_name):
+    """Return the human readable name of an algorithm"""
+    return ALGORITHM_DISPLAY_NAMES.get(alg_name, alg_name)
+
+
+@lru_cache(maxsize=1024)
+def blend_color(start, end, t):
+    """Blend two #rrggbb colors; t=0 gives start, t=1 gives end"""
+    channels = []
+    for i in (1, 3, 5):
+        a = int(start[i:i + 2], 16)
+        b = int(end[i:i + 2], 16)
+        channels.append(int(a + (b - a) * t))
+    return "#{:02x}{:02x}{:02x}".format(*channels)
+
+
+@lru_cache(maxsize=256)
+def shade_color(color, factor):
+    """Scale the brightness of a #rrggbb color by factor"""
+    return blend_color("#000000", color, factor)
+
+
+def draw_vertical_gradient(canvas, x0, y0, x1, y1, top_color, bottom_color, bands=8, tags=()):
+    """Fill a rectangle with a top-to-bottom gradient made of a few solid bands"""
+    height = y1 - y0
+    if height <= 0:
+        return
+    bands = max(1, min(bands, int(height)))
+    for i in range(bands):
+        color = blend_color(top_color, bottom_color, (i + 0.5) / bands)
+        canvas.create_rectangle(
+            x0, y0 + height * i / bands,
+            x1, y0 + height * (i + 1) / bands,
+            fill=color, outline="", tags=tags
+        )
+
+
+def stack_strip_spans(stack, strip_width, disk_height, disk_width):
+    """
+    Pixel rectangles of a peg's stack drawn as one image strip.
+
+    Several disks share a pixel row when disks are thinner than a pixel; only
+    the lowest disk of each row is painted, so a strip costs at most one
+    rectangle per pixel row however many disks it holds.
+
+    Args:
+        stack: Disk sizes, bottom first
+        strip_width: Strip width in pixels
+        disk_height: Disk height in pixels, possibly fractional
+        disk_width: Function returning the width of a disk size in pixels
+
+    Returns:
+        Tuple of (strip height, list of (disk size, x0, y0, x1, y1) with
+        exclusive x1 and y1, bottom disk first)
+    """
+    strip_height = max(1, math.ceil(disk_height * len(stack)))
+    center = strip_width / 2
+    spans = []
+    last_row = strip_height
+    for level, disk_size in enumerate(stack):
+        y1 = strip_height - int(disk_height * level)
+        if y1 > last_row:
+            continue
+        y0 = max(0, min(y1 - 1, strip_height - int(disk_height * (level + 1))))
+        half = disk_width(disk_size) / 2
+        spans.append((disk_size, max(0, int(center - half)), y0,
+                      min(strip_width, int(center + half) + 1), y1))
+        last_row = y0
+    return strip_height, spans
 
 
 class ModernDialog(tk.Toplevel):
@@ -200,7 +290,26 @@ class CustomDialog(simpledialog.Dialog):
 
 class HanoiCanvas:
     """Enhanced canvas for Tower of Hanoi game visualization"""
-    def __init__(self, root, peg_click_callback):
+
+    # Level-of-detail thresholds (total disks drawn). Up to DETAILED_MAX_DISKS
+    # every disk gets shadow, reflection and label; up to SIMPLE_MAX_DISKS each disk
+    # is a single rectangle; beyond that each peg's stack is rasterized into one
+    # image. The game stops at 20 disks; frame_benchmark draws the larger tiers
+    DETAILED_MAX_DISKS = 15
+    SIMPLE_MAX_DISKS = 120
+
+    MAX_DISK_HEIGHT = 20
+    MIN_DISK_WIDTH = 20
+    MAX_DISK_STEP = 12
+
+    def __init__(self, root, peg_click_callback, background_rng=None, effects_rng=None):
+        """
+        Args:
+            root: Parent widget
+            peg_click_callback: Called with the peg name when a peg is clicked
+            background_rng: random.Random for the background decorations
+            effects_rng: random.Random for the victory particles
+        """
         self.root = root
         self.frame = ttk.Frame(root)
         self.frame.pack(pady=10, fill=tk.BOTH, expand=True)
@@ -223,6 +332,19 @@ class HanoiCanvas:
         
         # Victory effects
         self.particles = []
+        self.effects_rng = effects_rng or random.Random()
+
+        # Decorations are drawn from this seed on every redraw, so they stay in place
+        self.decoration_seed = (background_rng or random.Random()).getrandbits(64)
+
+        # Disk geometry, recomputed by update_layout() on every draw
+        self.detail_level = "detailed"
+        self.disk_height = self.MAX_DISK_HEIGHT
+        self.disk_step = self.MAX_DISK_STEP
+        self.peg_spacing = 800 // 4
+
+        # Rasterized peg stacks: peg name -> (cache key, PhotoImage)
+        self.strip_cache = {}
 
     def highlight_peg(self, peg_name):
         """Highlight the selected peg"""
@@ -239,21 +361,25 @@ class HanoiCanvas:
         # Background gradients and decorations
         self.draw_background_gradient()
 
+        width, height = self.get_canvas_size()
+        num_disks = sum(len(stack) for stack in peg_state.values())
+        self.update_layout(num_disks, num_pegs, width, height)
+
         peg_width = 12
-        peg_height = 200
-        base_y = 350
-        base_width = 120
-        spacing = 800 // (num_pegs + 1)
+        base_y = height - 50
+        peg_height = min(base_y - 30, max(200, self.disk_height * num_disks + 10))
+        base_width = min(120, self.peg_spacing - 10)
+        spacing = self.peg_spacing
 
         self.pegs = {}
 
         for idx, peg_name in enumerate(sorted(peg_state.keys())):
             x = spacing * (idx + 1)
             self.pegs[peg_name] = (x, base_y)
-            
+
             # Draw peg base with shadow
             self.draw_base(x, base_y, base_width)
-            
+
             # Draw peg
             self.canvas.create_rectangle(
                 x - peg_width // 2, base_y - peg_height,
@@ -262,15 +388,15 @@ class HanoiCanvas:
                 outline="#888",
                 tags=(f"peg_{peg_name}",)
             )
-            
+
             # Draw disks on the peg (bottom to top)
-            for level, disk_size in enumerate(peg_state[peg_name]):
-                disk_width = 20 + disk_size * 12
-                disk_height = 20
-                y = base_y - disk_height * (level + 1)
-                
-                # Draw disk with optional effects
-                self.draw_disk(x, y, disk_width, disk_height, disk_size)
+            if self.detail_level == "raster":
+                self.draw_stack_image(peg_name, x, base_y, peg_state[peg_name])
+            else:
+                disk_height = self.disk_height
+                for level, disk_size in enumerate(peg_state[peg_name]):
+                    y = base_y - disk_height * (level + 1)
+                    self.draw_disk(x, y, self.get_disk_width(disk_size), disk_height, disk_size)
 
             # Draw peg label with better styling
             self.canvas.create_rectangle(
@@ -289,27 +415,70 @@ class HanoiCanvas:
         # Restore highlight if needed
         if self.highlighted_peg in self.pegs:
             self.highlight_peg(self.highlighted_peg)
-    
+
+    def get_canvas_size(self):
+        """Return the canvas size, falling back to the requested size before it is mapped"""
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        return (width if width > 1 else 800), (height if height > 1 else 400)
+
+    def update_layout(self, num_disks, num_pegs, width, height):
+        """Scale disk geometry to the canvas and pick a level of detail"""
+        self.peg_spacing = width // (num_pegs + 1)
+
+        # Stack the tallest possible tower between the base and the top margin
+        available_height = height - 80
+        self.disk_height = min(self.MAX_DISK_HEIGHT, available_height / max(num_disks, 1))
+
+        # The largest disk must not reach into the neighbouring peg's stack
+        max_width = self.peg_spacing - 10
+        self.disk_step = min(self.MAX_DISK_STEP,
+                             (max_width - self.MIN_DISK_WIDTH) / max(num_disks, 1))
+
+        if num_disks <= self.DETAILED_MAX_DISKS:
+            self.detail_level = "detailed"
+        elif num_disks <= self.SIMPLE_MAX_DISKS:
+            self.detail_level = "simple"
+        else:
+            self.detail_level = "raster"
+
+    def get_disk_width(self, size):
+        """Return the on-screen width of a disk for the current layout"""
+        return self.MIN_DISK_WIDTH + size * self.disk_step
+
+    def draw_stack_image(self, peg_name, x, base_y, stack):
+        """Draw a whole peg's stack as one image, rebuilt only when the stack or layout changes"""
+        strip_width = max(1, int(self.peg_spacing - 10))
+        key = (tuple(stack), strip_width, self.disk_height, self.disk_step)
+
+        cached = self.strip_cache.get(peg_name)
+        if cached and cached[0] == key:
+            image = cached[1]
+        else:
+            strip_height, spans = stack_strip_spans(stack, strip_width, self.disk_height, self.get_disk_width)
+            image = tk.PhotoImage(width=strip_width, height=strip_height)
+            for disk_size, x0, y0, x1, y1 in spans:
+                image.put(self.get_disk_color(disk_size), to=(x0, y0, x1, y1))
+            self.strip_cache[peg_name] = (key, image)
+
+        if stack:
+            self.canvas.create_image(x, base_y, image=image, anchor="s",
+                                     tags=(f"stack_{peg_name}", "disk"))
+
     def draw_background_gradient(self):
         """Draw a gradient background"""
-        width = self.canvas.winfo_width() or 800
-        height = self.canvas.winfo_height() or 400
-        
+        width, height = self.get_canvas_size()
+
         # Create a subtle gradient background
-        for i in range(height):
-            # Calculate gradient color from top to bottom
-            r = int(240 - i * 20 / height)
-            g = int(244 - i * 20 / height)
-            b = int(248 - i * 15 / height)
-            color = f"#{r:02x}{g:02x}{b:02x}"
-            
-            self.canvas.create_line(0, i, width, i, fill=color, width=1)
-        
+        draw_vertical_gradient(self.canvas, 0, 0, width, height,
+                               "#f0f4f8", "#dce0e9", bands=16, tags="background")
+
         # Add some decorative elements
+        rng = random.Random(self.decoration_seed)
         for _ in range(10):
-            x = random.randint(0, width)
-            y = random.randint(0, height // 2)
-            size = random.randint(2, 5)
+            x = rng.randint(0, width)
+            y = rng.randint(0, height // 2)
+            size = rng.randint(2, 5)
             self.canvas.create_oval(
                 x, y, x + size, y + size,
                 fill="#e1e5eb", outline="",
@@ -355,6 +524,17 @@ class HanoiCanvas:
         """Draw a disk with optional shadow and reflection effects"""
         color = self.get_disk_color(size)
 
+        if self.detail_level != "detailed":
+            # Single canvas item per disk; outlines would swallow thin disks
+            self.canvas.create_rectangle(
+                x - width / 2, y,
+                x + width / 2, y + height,
+                fill=color,
+                outline="#000000" if height >= 6 else "",
+                tags=(f"disk_{size}", "disk")
+            )
+            return
+
         # Create disk shadow
         if self.use_effects:
             shadow_offset = 3
@@ -398,7 +578,7 @@ class HanoiCanvas:
     def on_click(self, event):
         """Handle mouse click on the canvas"""
         for peg_name, (x, y) in self.pegs.items():
-            if abs(event.x - x) < 60:
+            if abs(event.x - x) < min(60, self.peg_spacing / 2):
                 self.peg_click_callback(peg_name)
                 break
 
@@ -454,7 +634,7 @@ class HanoiCanvas:
             self.canvas.delete(items)
         
         # Get disk height
-        disk_height = 20
+        disk_height = self.disk_height
         
         # Get number of disks on source and target pegs
         source_disks = len([tag for tag in self.canvas.gettags("disk") if f"disk_{disk_size}" in tag])
@@ -493,8 +673,8 @@ class HanoiCanvas:
         x = start_x + (end_x - start_x) * progress
         
         # Draw disk at current position
-        disk_width = 20 + disk_size * 12
-        disk_height = 20
+        disk_width = self.get_disk_width(disk_size)
+        disk_height = self.disk_height
         
         # Clear previous frame
         self.canvas.delete(f"animating_disk")
@@ -544,13 +724,14 @@ class HanoiCanvas:
         """Display a celebration animation when player wins"""
         # Create particles
         self.particles = []
+        rng = self.effects_rng
         for _ in range(50):
-            x = random.randint(0, self.canvas.winfo_width())
-            y = random.randint(0, self.canvas.winfo_height())
-            dx = random.uniform(-2, 2)
-            dy = random.uniform(-4, -1)
-            color = random.choice(["#ffca3a", "#ff595e", "#8ac926", "#1982c4", "#6a4c93"])
-            size = random.randint(5, 15)
+            x = rng.randint(0, self.canvas.winfo_width())
+            y = rng.randint(0, self.canvas.winfo_height())
+            dx = rng.uniform(-2, 2)
+            dy = rng.uniform(-4, -1)
+            color = rng.choice(["#ffca3a", "#ff595e", "#8ac926", "#1982c4", "#6a4c93"])
+            size = rng.randint(5, 15)
             self.particles.append({
                 "x": x, "y": y, "dx": dx, "dy": dy,
                 "color": color, "size": size, "life": 100
@@ -595,67 +776,114 @@ class HanoiCanvas:
 
 
 class AlgorithmComparisonChart:
-    """Create a chart for comparing algorithm performance"""
-    def __init__(self, root, times_dict):
+    """Grouped bar chart comparing algorithm timings across one or more categories.
+
+    ``times_dict`` is either ``{algorithm: seconds}`` for a single run or
+    ``{algorithm: {category: seconds}}`` for several series, e.g. one category per
+    (disks, pegs) configuration pulled from the game history.
+    """
+
+    # Number of stacked rectangles used to fake each bar's gradient
+    GRADIENT_BANDS = 6
+
+    def __init__(self, root, times_dict, title="Algorithm Execution Time Comparison",
+                 subtitle=None, footer=None):
         self.root = root
         self.top = tk.Toplevel(root)
-        self.top.title("Algorithm Performance Comparison")
+        self.top.title("📊 Algorithm Performance Comparison")
         self.top.geometry("700x500")
         self.top.configure(bg="#f5f5f7")
-        
-        self.times = times_dict
-        
-       # Create header frame
+
+        self.title = title
+        self.series = self.normalize_series(times_dict)
+        self.categories = []
+        for values in self.series.values():
+            for category in values:
+                if category not in self.categories:
+                    self.categories.append(category)
+
+        # Create header frame
         header_frame = tk.Frame(self.top, bg="#4285f4", padx=10, pady=10)
         header_frame.pack(fill=tk.X)
-        
-        header_label = tk.Label(header_frame, text="⏱️ ALGORITHM PERFORMANCE COMPARISON ⏱️", 
+
+        header_label = tk.Label(header_frame, text="⏱️ ALGORITHM PERFORMANCE COMPARISON ⏱️",
                                font=("Arial", 16, "bold"), bg="#4285f4", fg="white")
         header_label.pack()
-        
+
+        if subtitle:
+            tk.Label(self.top, text=subtitle, font=("Arial", 12, "bold"),
+                     bg="#f5f5f7").pack(pady=(10, 0))
+
         # Chart area
         self.chart_frame = tk.Frame(self.top, bg="white", padx=20, pady=20)
-        self.chart_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
-        self.canvas = tk.Canvas(self.chart_frame, width=650, height=300, bg="white")
+        self.chart_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(10, 10))
+
+        self.canvas = tk.Canvas(self.chart_frame, width=650, height=300, bg="white",
+                                highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        
-        # Draw chart
-        self.draw_chart()
-        
+
+        if footer:
+            tk.Label(self.top, text=footer, font=("Arial", 11, "bold"),
+                     bg="#f5f5f7").pack(pady=(0, 5))
+
+        # Redraw whenever the canvas is resized; the item count does not depend on size
+        self.redraw_pending = False
+        self.canvas.bind("<Configure>", self.schedule_redraw)
+
         # Button frame
         button_frame = tk.Frame(self.top, bg="#f5f5f7", pady=10)
         button_frame.pack(fill=tk.X)
-        
+
         close_btn = tk.Button(button_frame, text="Close", command=self.top.destroy,
                              bg="#f44336", fg="white", font=("Arial", 11), padx=15, pady=5)
         close_btn.pack()
-        
+
+    @staticmethod
+    def normalize_series(times_dict):
+        """Return ``{algorithm: {category: seconds}}`` without empty values"""
+        series = {}
+        for alg_name, values in (times_dict or {}).items():
+            if not isinstance(values, dict):
+                values = {"This game": values}
+            values = {category: t for category, t in values.items() if t is not None}
+            if values:
+                series[alg_name] = values
+        return series
+
+    def schedule_redraw(self, event=None):
+        """Coalesce bursts of resize events into a single redraw"""
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.canvas.after_idle(self.draw_chart)
+
     def draw_chart(self):
         """Draw the performance comparison chart"""
-        if not self.times:
+        self.redraw_pending = False
+        self.canvas.delete("all")
+
+        # Get canvas dimensions
+        width = max(self.canvas.winfo_width(), 200)
+        height = max(self.canvas.winfo_height(), 150)
+
+        if not self.series:
             self.canvas.create_text(
-                325, 150, 
-                text="No algorithm data available", 
-                font=("Arial", 14, "bold"), 
+                width / 2, height / 2,
+                text="No algorithm data available",
+                font=("Arial", 14, "bold"),
                 fill="#999"
             )
             return
-        
-        # Get canvas dimensions
-        width = self.canvas.winfo_width()
-        height = self.canvas.winfo_height()
-        
+
         # Set chart margins
         left_margin = 100
-        right_margin = 50
-        top_margin = 50
-        bottom_margin = 80
-        
+        right_margin = 30
+        top_margin = 60
+        bottom_margin = 50
+
         # Calculate chart area
         chart_width = width - left_margin - right_margin
         chart_height = height - top_margin - bottom_margin
-        
+
         # Draw background grid
         for i in range(5):
             y = top_margin + i * chart_height / 4
@@ -663,15 +891,11 @@ class AlgorithmComparisonChart:
                 left_margin, y, left_margin + chart_width, y,
                 fill="#e0e0e0", dash=(4, 4)
             )
-        
-        # Find max time value
-        max_time = max(self.times.values()) if self.times else 0
-        if max_time == 0:
-            max_time = 0.001  # Prevent division by zero
-        
-        # Pad max value by 20%
-        max_time *= 1.2
-        
+
+        # Find max time value and pad it by 20%
+        max_time = max(t for values in self.series.values() for t in values.values())
+        max_time = (max_time or 0.001) * 1.2
+
         # Draw time axis labels
         for i in range(5):
             y = top_margin + i * chart_height / 4
@@ -683,80 +907,318 @@ class AlgorithmComparisonChart:
                 anchor="e",
                 fill="#666"
             )
-        
-        # Draw algorithms
-        bar_width = chart_width / (len(self.times) * 2)
-        colors = {
-            'recursive': "#4CAF50",
-            'iterative': "#2196F3",
-            'frame_stewart': "#9C27B0"
-        }
-        
-        # Draw bars
-        for i, (alg_name, time) in enumerate(self.times.items()):
-            if time is None:
-                continue
-                
-            x = left_margin + (i * 2 + 1) * bar_width
-            bar_height = (time / max_time) * chart_height
-            y = top_margin + chart_height - bar_height
-            
-            # Bar with gradient effect
-            for j in range(int(bar_height)):
-                # Create gradient effect
-                factor = 1 - j / bar_height / 2  # Less dramatic gradient
-                color = colors.get(alg_name, "#666")
-                r = int(int(color[1:3], 16) * factor)
-                g = int(int(color[3:5], 16) * factor)
-                b = int(int(color[5:7], 16) * factor)
-                bar_color = f"#{r:02x}{g:02x}{b:02x}"
-                
-                self.canvas.create_line(
-                    x, y + j, x + bar_width, y + j,
-                    fill=bar_color, width=1
+
+        # One group of bars per category, one bar per algorithm inside a group
+        group_width = chart_width / len(self.categories)
+        bar_width = group_width * 0.8 / len(self.series)
+        show_values = bar_width >= 40
+
+        for c, category in enumerate(self.categories):
+            group_x = left_margin + c * group_width + group_width * 0.1
+
+            for s, (alg_name, values) in enumerate(self.series.items()):
+                time_value = values.get(category)
+                if time_value is None:
+                    continue
+
+                x = group_x + s * bar_width
+                bar_height = (time_value / max_time) * chart_height
+                y = top_margin + chart_height - bar_height
+                color = get_algorithm_color(alg_name)
+
+                # Bar with gradient effect (darkens to half brightness at the base)
+                draw_vertical_gradient(self.canvas, x, y, x + bar_width, y + bar_height,
+                                       color, shade_color(color, 0.5), self.GRADIENT_BANDS)
+
+                # Draw bar outline
+                self.canvas.create_rectangle(
+                    x, y, x + bar_width, top_margin + chart_height,
+                    outline="#444444", width=1
                 )
-            
-            # Draw bar outline
-            self.canvas.create_rectangle(
-                x, y, x + bar_width, top_margin + chart_height,
-                outline="#00000044", width=1
-            )
-            
-            # Draw time value at top of bar
-            self.canvas.create_text(
-                x + bar_width / 2, y - 10,
-                text=f"{time:.6f}s",
-                font=("Arial", 9),
-                fill="#333"
-            )
-            
-            # Draw algorithm name at bottom
-            alg_display_name = {
-                'recursive': "Recursive",
-                'iterative': "Iterative",
-                'frame_stewart': "Frame-Stewart"
-            }.get(alg_name, alg_name)
-            
+
+                # Draw time value at top of bar
+                if show_values:
+                    self.canvas.create_text(
+                        x + bar_width / 2, y - 10,
+                        text=f"{time_value:.6f}s",
+                        font=("Arial", 9),
+                        fill="#333"
+                    )
+
+            # Draw category name under the group
             self.canvas.create_text(
-                x + bar_width / 2, top_margin + chart_height + 15,
-                text=alg_display_name,
+                left_margin + (c + 0.5) * group_width, top_margin + chart_height + 15,
+                text=str(category),
                 font=("Arial", 10, "bold"),
-                fill=colors.get(alg_name, "#666")
+                fill="#333",
+                width=max(group_width - 4, 10)
             )
-            
+
+        # Draw legend
+        legend_x = left_margin
+        for alg_name in self.series:
+            color = get_algorithm_color(alg_name)
+            self.canvas.create_rectangle(legend_x, 38, legend_x + 12, 50, fill=color, outline="")
+            label = self.canvas.create_text(
+                legend_x + 16, 44,
+                text=get_algorithm_display_name(alg_name),
+                font=("Arial", 9, "bold"),
+                anchor="w",
+                fill=color
+            )
+            legend_x = self.canvas.bbox(label)[2] + 15
+
         # Draw chart title
         self.canvas.create_text(
             width / 2, 20,
-            text="Algorithm Execution Time Comparison",
+            text=self.title,
             font=("Arial", 12, "bold"),
             fill="#333"
         )
-        
+
         # Draw y-axis title
         self.canvas.create_text(
-            30, height / 2,
+            30, top_margin + chart_height / 2,
             text="Execution Time (seconds)",
             font=("Arial", 10),
             fill="#666",
             angle=90
-        )
\ No newline at end of file
+        )
+
+
+class PagedTreeview:
+    """A ttk.Treeview that shows one page of a keyset-paginated query at a time.
+
+    Only the rows that fit in the visible area are ever inserted into the widget,
+    so browsing a table with millions of games costs the same as browsing ten.
+    ``fetch_page(cursor, limit)`` must return ``(rows, next_cursor)`` as the
+    ``Database.get_*_page`` methods do; ``format_row(row, position)`` turns a row
+    into the column values, where ``position`` is its 1-based index in the results.
+    ``on_activate(row)``, if given, is called when a row is double-clicked.
+    """
+
+    # Fallback row height before the widget has been mapped
+    ROW_HEIGHT = 22
+
+    def __init__(self, parent, columns, fetch_page, format_row, on_activate=None):
+        """
+        Args:
+            parent: Container widget
+            columns: List of (column id, heading, width) tuples
+            fetch_page: Callable(cursor, limit) -> (rows, next_cursor)
+            format_row: Callable(row, position) -> tuple of column values
+            on_activate: Optional callable(row) for double-clicked rows
+        """
+        self.fetch_page = fetch_page
+        self.format_row = format_row
+        self.on_activate = on_activate
+        self.page_size = 10
+        self.rows = []
+
+        self.frame = tk.Frame(parent, bg="white")
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in columns],
+                                 show="headings", selectmode="browse")
+        for column, heading, width in columns:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="center")
+        self.tree.tag_configure("odd", background="#f9f9f9")
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        nav = tk.Frame(self.frame, bg="white")
+        nav.pack(fill=tk.X, pady=(5, 0))
+        self.prev_btn = tk.Button(nav, text="◀ Prev", command=self.prev_page, width=8)
+        self.prev_btn.pack(side=tk.LEFT)
+        self.next_btn = tk.Button(nav, text="Next ▶", command=self.next_page, width=8)
+        self.next_btn.pack(side=tk.RIGHT)
+        self.page_label = tk.Label(nav, text="", bg="white", font=("Arial", 10))
+        self.page_label.pack(side=tk.LEFT, expand=True)
+
+        # Cursors of the pages before the current one; None starts the first page
+        self.cursors = [None]
+        self.next_cursor = None
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.prev_page())
+        self.tree.bind("<Button-5>", lambda event: self.next_page())
+        self.tree.bind("<Double-1>", self.on_double_click)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def visible_rows(self):
+        """Number of rows that fit in the tree's current height"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return self.page_size
+        return max(1, (height - self.ROW_HEIGHT) // self.ROW_HEIGHT)
+
+    def reset(self):
+        """Go back to the first page, e.g. after the filters changed"""
+        self.cursors = [None]
+        self.load()
+
+    def load(self):
+        """Fetch the current page and replace the rows shown"""
+        rows, self.next_cursor = self.fetch_page(self.cursors[-1], self.page_size)
+        self.tree.delete(*self.tree.get_children())
+        self.rows = rows
+
+        first = (len(self.cursors) - 1) * self.page_size + 1
+        for i, row in enumerate(rows):
+            self.tree.insert("", tk.END, iid=str(i), values=self.format_row(row, first + i),
+                             tags=("odd",) if i % 2 else ())
+
+        self.page_label.config(text=f"Page {len(self.cursors)}" if rows else "No games found")
+        self.prev_btn.config(state=tk.NORMAL if len(self.cursors) > 1 else tk.DISABLED)
+        self.next_btn.config(state=tk.NORMAL if self.next_cursor is not None else tk.DISABLED)
+
+    def next_page(self):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+            self.load()
+
+    def prev_page(self):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+            self.load()
+
+    def on_wheel(self, event):
+        if event.delta < 0:
+            self.next_page()
+        elif event.delta > 0:
+            self.prev_page()
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item and self.on_activate:
+            self.on_activate(self.rows[int(item)])
+
+    def on_resize(self, event=None):
+        """Fit the page to the visible area; restarts from page 1 so ranks stay consistent"""
+        rows = self.visible_rows()
+        if rows != self.page_size:
+            self.page_size = rows
+            self.reset()
+
+
+class ReplayViewer:
+    """Window that plays back a recorded game on a HanoiCanvas.
+
+    ``replay`` is a ``game_engine.GameReplay``. Playback follows the recorded
+    timing; the slider and step buttons jump to any move, and each jump draws
+    the state straight from the replay's snapshots instead of replaying from
+    the first move.
+    """
+
+    # Longest pause between two moves during playback, in ms
+    MAX_STEP_MS = 1500
+    # Pause between moves of games recorded without timing
+    DEFAULT_STEP_MS = 300
+
+    SPEEDS = ("0.5x", "1x", "2x", "4x", "16x")
+
+    def __init__(self, root, replay, title="Game Replay"):
+        self.replay = replay
+        self.position = 0
+        self.playing = False
+        self.after_id = None
+
+        self.top = tk.Toplevel(root)
+        self.top.title("🎬 " + title)
+        self.top.geometry("900x620")
+        self.top.configure(bg="#f5f5f7")
+
+        header_frame = tk.Frame(self.top, bg="#4285f4", padx=10, pady=10)
+        header_frame.pack(fill=tk.X)
+        tk.Label(header_frame, text=f"🎬 {title.upper()} 🎬", font=("Arial", 16, "bold"),
+                 bg="#4285f4", fg="white").pack()
+
+        canvas_frame = tk.Frame(self.top, bg="white", relief=tk.RIDGE, bd=2)
+        canvas_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        self.canvas = HanoiCanvas(canvas_frame, lambda peg_name: None)
+
+        self.scale = tk.Scale(self.top, from_=0, to=len(replay), orient=tk.HORIZONTAL,
+                              showvalue=False, command=self.on_scale, bg="#f5f5f7",
+                              highlightthickness=0)
+        self.scale.pack(fill=tk.X, padx=20)
+
+        controls = tk.Frame(self.top, bg="#f5f5f7", pady=5)
+        controls.pack(fill=tk.X, padx=20)
+        for text, command in (("⏮", lambda: self.step(-len(self.replay))), ("◀", lambda: self.step(-1))):
+            tk.Button(controls, text=text, command=command, width=3).pack(side=tk.LEFT, padx=2)
+        self.play_btn = tk.Button(controls, text="▶ Play", command=self.toggle_play, width=8,
+                                  bg="#4CAF50", fg="white")
+        self.play_btn.pack(side=tk.LEFT, padx=2)
+        for text, command in (("▶|", lambda: self.step(1)), ("⏭", lambda: self.step(len(self.replay)))):
+            tk.Button(controls, text=text, command=command, width=3).pack(side=tk.LEFT, padx=2)
+
+        self.speed = tk.StringVar(value="1x")
+        tk.OptionMenu(controls, self.speed, *self.SPEEDS).pack(side=tk.LEFT, padx=10)
+
+        self.status_label = tk.Label(controls, text="", bg="#f5f5f7", font=("Arial", 11))
+        self.status_label.pack(side=tk.RIGHT)
+
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+        self.top.after_idle(lambda: self.seek(0))
+
+    def seek(self, index):
+        """Show the game after index moves"""
+        self.position = max(0, min(index, len(self.replay)))
+        self.canvas.draw(self.replay.state_at(self.position))
+        if int(self.scale.get()) != self.position:
+            self.scale.set(self.position)
+        self.status_label.config(
+            text=f"Move {self.position} / {len(self.replay)} • "
+                 f"{self.replay.time_at(self.position):.1f}s • "
+                 f"hints used: {self.replay.hints_before(self.position)}"
+        )
+
+    def on_scale(self, value):
+        if int(float(value)) != self.position:
+            self.pause()
+            self.seek(int(float(value)))
+
+    def step(self, delta):
+        self.pause()
+        self.seek(self.position + delta)
+
+    def toggle_play(self):
+        if self.playing:
+            self.pause()
+            return
+        if self.position >= len(self.replay):
+            self.seek(0)
+        self.playing = True
+        self.play_btn.config(text="⏸ Pause")
+        self.schedule_next()
+
+    def pause(self):
+        self.playing = False
+        self.play_btn.config(text="▶ Play")
+        if self.after_id is not None:
+            self.top.after_cancel(self.after_id)
+            self.after_id = None
+
+    def schedule_next(self):
+        """Wait as long as the player did before the next move, scaled by the speed"""
+        if self.position >= len(self.replay):
+            self.pause()
+            return
+        speed = float(self.speed.get().rstrip("x"))
+        if self.replay.duration > 0:
+            delay = (self.replay.time_at(self.position + 1) - self.replay.time_at(self.position)) * 1000
+        else:
+            delay = self.DEFAULT_STEP_MS
+        delay = max(1, min(self.MAX_STEP_MS, int(delay / speed)))
+        self.after_id = self.top.after(delay, self.advance)
+
+    def advance(self):
+        self.after_id = None
+        self.seek(self.position + 1)
+        if self.playing:
+            self.schedule_next()
+
+    def close(self):
+        self.pause()
+        self.top.destroy()